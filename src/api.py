@@ -1,28 +1,87 @@
 from __future__ import annotations
 
+import asyncio
 import io
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any
 
+# Taken before the third-party imports so startup can report what importing the app cost.
+_IMPORT_STARTED = time.perf_counter()
+
+import numpy as np
 import pandas as pd
-import uvicorn
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
+from src.inference.batch_frame import BATCH_FRAME_STATS, BatchFrame, BatchHeaderResolver
 from src.inference.explainer import (
+    BatchInsightAccumulator,
     ShapComputationError,
     ShapDependencyError,
-    build_batch_consulting_insights,
+    build_batch_recommendations,
+    compute_row_risk_drivers,
     explain_client_prediction,
+    explain_client_prediction_within_budget,
     get_risk_level,
 )
-from src.inference.predictor import load_model, predict_churn_proba
-from src.utils.config import MODEL_PATH, TARGET_COLUMN_ALIASES
-from src.utils.data_utils import drop_identifier_columns, normalize_column_name, standardize_columns
+from src.inference.explanation_budget import EXPLANATION_STATS
+from src.inference.customer_store import CustomerScoreStore, normalize_customer_id
+from src.inference.predictor import compute_model_version, load_model, load_threshold_report
+from src.inference.registry import ModelRegistry, ModelRegistryError, parse_traffic_split
+from src.inference.segment_cube import SegmentCube
+from src.utils.config import (
+    AB_TRAFFIC_SPLIT,
+    BATCH_EXPLANATION_TIMEOUT_SECONDS,
+    CSV_COLUMN_ALIASES,
+    CUSTOMER_STORE_PATH,
+    EXPLANATION_TIMEOUT_SECONDS,
+    HIGH_RISK_THRESHOLD,
+    MEDIUM_RISK_THRESHOLD,
+    METRICS_PATH,
+    MODEL_PATH,
+    MODEL_REGISTRY_PATH,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MAX_BYTES,
+    SERVING_MODE,
+    SHADOW_MODELS,
+    UPLOAD_MAX_DECOMPRESSED_BYTES,
+    WARM_UP_ON_STARTUP,
+)
+from src.utils.memory import StageMemoryProfiler, current_rss_mb
+from src.utils.result_cache import ResultCache, build_cache_key
+from src.utils.upload_streams import (
+    UploadDependencyError,
+    UploadFormatError,
+    UploadTooLargeError,
+    decodes_as,
+    detect_upload_format,
+    open_decompressed,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    # Warm up off the event loop so /health answers while models load.
+    if WARM_UP_ON_STARTUP:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
 
-app = FastAPI(title="Churn Backend API", version="2.2.0")
+
+app = FastAPI(title="Churn Backend API", version="2.2.0", lifespan=_lifespan)
 
 # Allows separated frontend to call backend from another origin/port.
 app.add_middleware(
@@ -34,6 +93,44 @@ app.add_middleware(
 )
 
 _MODEL = None
+_MODEL_VERSION: str | None = None
+_MODEL_REGISTRY: ModelRegistry | None = None
+_RESULT_CACHE = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+_CUSTOMER_STORE = CustomerScoreStore(CUSTOMER_STORE_PATH)
+_CSV_CHUNK_ROWS = 20_000
+# Tried in order; latin-1 decodes any byte sequence, so it is the last resort.
+_CSV_ENCODINGS = ("utf-8-sig", "latin-1")
+_TOP_RISK_ROWS_LIMIT = 200
+_TRANSIENT_EXPLANATION_REASONS = ("timeout", "shap_failed", "overloaded")
+_MAX_TOP_CUSTOMERS = 1000
+_STREAM_BATCH_SIZE = 512
+_STREAM_MAX_BATCH_WAIT_SECONDS = 0.05
+_STREAM_READ_AHEAD_CHUNKS = 8
+_STREAM_MAX_LINE_BYTES = 64 * 1024
+_STREAM_LINE_TOO_LONG = "Record exceeds the maximum line size."
+_WHAT_IF_MAX_MESSAGE_BYTES = 16 * 1024
+_MAX_STORED_SEGMENT_CUBES = 32
+_SEGMENT_CUBES: OrderedDict[str, SegmentCube] = OrderedDict()
+_SEGMENT_CUBES_LOCK = threading.Lock()
+_WARM_UP_LOCK = threading.Lock()
+# Re-entrant: get_model_registry loads the primary model through get_model.
+_MODEL_LOAD_LOCK = threading.RLock()
+_WARM_UP_STATE: dict[str, Any] = {
+    "status": "cold",
+    "error": None,
+    "explainer_error": None,
+    "flat_forest_parity": {},
+    "phases": [],
+}
+_WARM_UP_CLIENT = {
+    "Age": 45,
+    "Gender": "Female",
+    "Tenure": 10,
+    "MonthlyCharges": 70.5,
+    "Contract": "Month-to-month",
+    "PaymentMethod": "Electronic check",
+    "TotalCharges": 705.0,
+}
 
 
 class ClientFeatures(BaseModel):
@@ -46,64 +143,148 @@ class ClientFeatures(BaseModel):
     TotalCharges: float = Field(..., ge=0)
 
 
+class SegmentQuery(BaseModel):
+    group_by: list[str] = Field(default_factory=list)
+    filters: dict[str, list[str]] = Field(default_factory=dict)
+
+
 REQUIRED_FEATURES = list(ClientFeatures.model_fields.keys())
-CSV_COLUMN_ALIASES = {
-    "Tenure in Months": "Tenure",
-    "Monthly Charge": "MonthlyCharges",
-    "Payment Method": "PaymentMethod",
-    "Total Charges": "TotalCharges",
-}
+NUMERIC_FEATURES = [name for name, field in ClientFeatures.model_fields.items() if field.annotation in (int, float)]
+_BATCH_HEADERS = BatchHeaderResolver(REQUIRED_FEATURES, CSV_COLUMN_ALIASES)
 
 
 def get_model():
-    global _MODEL
-    if _MODEL is None:
+    global _MODEL, _MODEL_VERSION
+    if _MODEL is not None:
+        return _MODEL
+    with _MODEL_LOAD_LOCK:
+        if _MODEL is not None:
+            return _MODEL
         model_path = Path(MODEL_PATH)
         if not model_path.exists():
             raise HTTPException(
                 status_code=500,
                 detail="Model not found. Run training first: python -m src.main",
             )
-        _MODEL = load_model(str(model_path))
+        model = load_model(str(model_path))
+        # Publish the version first: readers skip the lock as soon as _MODEL is set.
+        _MODEL_VERSION = compute_model_version(str(model_path))
+        _MODEL = model
     return _MODEL
 
 
-def _normalize_uploaded_csv_columns(raw_df: pd.DataFrame) -> pd.DataFrame:
-    # Trim whitespace around uploaded headers first.
-    df = raw_df.rename(columns=lambda col: col.strip() if isinstance(col, str) else col)
+def get_model_version() -> str:
+    get_model()
+    return _MODEL_VERSION or "unversioned"
 
-    missing_before_mapping = [col for col in REQUIRED_FEATURES if col not in df.columns]
-    if not missing_before_mapping:
-        return df
 
-    rename_map: dict[str, str] = {}
-    for source_col, target_col in CSV_COLUMN_ALIASES.items():
-        if source_col in df.columns and target_col not in df.columns:
-            rename_map[source_col] = target_col
+def get_model_registry() -> ModelRegistry:
+    global _MODEL_REGISTRY
+    if _MODEL_REGISTRY is not None:
+        return _MODEL_REGISTRY
+    with _MODEL_LOAD_LOCK:
+        if _MODEL_REGISTRY is not None:
+            return _MODEL_REGISTRY
+        if SERVING_MODE == "single":
+            primary = Path(MODEL_PATH).stem
+            _MODEL_REGISTRY = ModelRegistry(
+                models={primary: get_model()},
+                versions={primary: get_model_version()},
+                primary=primary,
+            )
+        else:
+            # The registry primary is usually the same artifact as MODEL_PATH: share one instance.
+            loaded_models = {get_model_version(): get_model()} if Path(MODEL_PATH).exists() else None
+            try:
+                _MODEL_REGISTRY = ModelRegistry.from_registry_file(
+                    MODEL_REGISTRY_PATH,
+                    mode=SERVING_MODE,
+                    shadow_models=SHADOW_MODELS or None,
+                    traffic_split=parse_traffic_split(AB_TRAFFIC_SPLIT) or None,
+                    loaded_models=loaded_models,
+                )
+            except ModelRegistryError as exc:
+                raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return _MODEL_REGISTRY
+
+
+def warm_up() -> dict:
+    """Load every served model, build its explainer and run dummy predictions.
+
+    Each phase's wall time and memory is recorded; ``/ready`` reports the result.
+    """
+    with _WARM_UP_LOCK:
+        if _WARM_UP_STATE["status"] == "warm":
+            return dict(_WARM_UP_STATE)
+        _WARM_UP_STATE.update(status="warming", error=None, explainer_error=None, phases=[_IMPORT_PHASE])
+        profiler = StageMemoryProfiler(log_prefix="[startup]")
+        try:
+            with profiler.stage("load_models"):
+                registry = get_model_registry()
 
-    return df.rename(columns=rename_map) if rename_map else df
+            dummy_df = pd.DataFrame([_WARM_UP_CLIENT], columns=REQUIRED_FEATURES)
+            with profiler.stage("warm_predict"):
+                # Direct calls so the warm-up does not show in the served-model stats.
+                for model in registry.models.values():
+                    model.predict_proba(dummy_df)
+                _WARM_UP_STATE["flat_forest_parity"] = registry.check_flat_forests(_build_warm_up_frame())
 
+            with profiler.stage("warm_explainer"):
+                try:
+                    explain_client_prediction(registry.models[registry.primary], _WARM_UP_CLIENT, REQUIRED_FEATURES)
+                except (ShapDependencyError, ShapComputationError) as exc:
+                    _WARM_UP_STATE["explainer_error"] = str(exc)
 
-def _prepare_batch_features(raw_df: pd.DataFrame) -> pd.DataFrame:
-    df = _normalize_uploaded_csv_columns(raw_df.copy())
-    df = standardize_columns(df)
-    df = drop_identifier_columns(df)
+            with profiler.stage("open_customer_store"):
+                _CUSTOMER_STORE.stats()
+        except Exception as exc:
+            # Any failure must leave a reportable state; a dead thread would keep /ready at "warming".
+            _WARM_UP_STATE["status"] = "failed"
+            _WARM_UP_STATE["error"] = exc.detail if isinstance(exc, HTTPException) else f"{type(exc).__name__}: {exc}"
+        else:
+            _WARM_UP_STATE["status"] = "warm"
+        finally:
+            _WARM_UP_STATE["phases"] = [_IMPORT_PHASE, *profiler.report()]
+        return dict(_WARM_UP_STATE)
+
+
+def _build_warm_up_frame() -> pd.DataFrame:
+    # Every contract/payment/gender combination with spread-out numeric values.
+    rows = []
+    for index, (contract, payment_method, gender) in enumerate(
+        itertools.product(
+            ["Month-to-month", "One year", "Two year"],
+            ["Electronic check", "Mailed check", "Bank transfer", "Credit card"],
+            ["Female", "Male"],
+        )
+    ):
+        tenure = (index * 7) % 72
+        monthly_charges = 20.0 + (index * 13.7) % 100
+        rows.append(
+            {
+                "Age": 18 + (index * 11) % 60,
+                "Gender": gender,
+                "Tenure": tenure,
+                "MonthlyCharges": monthly_charges,
+                "Contract": contract,
+                "PaymentMethod": payment_method,
+                "TotalCharges": tenure * monthly_charges,
+            }
+        )
+    return pd.DataFrame(rows, columns=REQUIRED_FEATURES)
 
-    target_cols = [col for col in df.columns if normalize_column_name(col) in TARGET_COLUMN_ALIASES]
-    if target_cols:
-        df = df.drop(columns=target_cols)
 
-    missing_cols = [col for col in REQUIRED_FEATURES if col not in df.columns]
-    if missing_cols:
+def _build_batch_frame(raw_df: pd.DataFrame) -> BatchFrame:
+    header = _BATCH_HEADERS.resolve(raw_df.columns)
+    if header.missing_features:
         raise HTTPException(
             status_code=400,
             detail=(
-                f"Missing required columns for prediction: {missing_cols}. "
-                f"Columns found in CSV: {list(df.columns)}"
+                f"Missing required columns for prediction: {header.missing_features}. "
+                f"Columns found in CSV: {header.columns_found}"
             ),
         )
-
-    return df[REQUIRED_FEATURES].copy()
+    return BatchFrame(raw_df, header, NUMERIC_FEATURES)
 
 
 def _to_french_risk_level(probability: float) -> str:
@@ -116,54 +297,214 @@ def _to_french_risk_level(probability: float) -> str:
     return mapping[risk_level]
 
 
-def _build_actionable_rows(raw_df: pd.DataFrame, probabilities: pd.Series) -> list[dict]:
-    standardized_df = standardize_columns(_normalize_uploaded_csv_columns(raw_df.copy()))
+def _build_actionable_frame(batch: BatchFrame, probabilities: np.ndarray, positions: np.ndarray) -> pd.DataFrame:
+    features_df = batch.features.iloc[positions]
+    customer_ids = (
+        batch.customer_ids.iloc[positions].to_numpy()
+        if batch.customer_ids is not None
+        else np.full(len(positions), None, dtype=object)
+    )
+
+    return pd.DataFrame(
+        {
+            "Customer ID": customer_ids,
+            "churn_probability": probabilities[positions],
+            "Contract": features_df["Contract"],
+            "Tenure": features_df["Tenure"],
+            "MonthlyCharges": features_df["MonthlyCharges"],
+            "PaymentMethod": features_df["PaymentMethod"],
+            "TotalCharges": features_df["TotalCharges"],
+            "recommendations": build_batch_recommendations(
+                features_df, {feature: keys[positions] for feature, keys in batch.label_keys.items()}
+            ),
+        },
+        index=features_df.index,
+    )
 
-    if "CustomerID" in standardized_df.columns:
-        customer_ids = standardized_df["CustomerID"]
-    else:
-        customer_ids = pd.Series([None] * len(standardized_df), index=standardized_df.index)
 
-    monthly_charges = pd.to_numeric(standardized_df.get("MonthlyCharges"), errors="coerce")
-    total_charges = pd.to_numeric(standardized_df.get("TotalCharges"), errors="coerce")
-    tenure_values = pd.to_numeric(standardized_df.get("Tenure"), errors="coerce")
+def _keep_top_risk_rows(top_rows_df: pd.DataFrame | None, batch: BatchFrame, probabilities: np.ndarray) -> pd.DataFrame:
+    # Only the chunk's own top rows can make the cut, so only those are turned into output rows.
+    positions = np.argsort(-probabilities, kind="stable")[:_TOP_RISK_ROWS_LIMIT]
+    chunk_rows_df = _build_actionable_frame(batch, probabilities, positions)
+    batch.bounded_copies += 1
+    if top_rows_df is None:
+        return chunk_rows_df
+    candidates_df = pd.concat([top_rows_df, chunk_rows_df])
+    batch.bounded_copies += 1
+    return candidates_df.sort_values(by="churn_probability", ascending=False, kind="stable").head(_TOP_RISK_ROWS_LIMIT)
+
+
+def _format_actionable_rows(rows_df: pd.DataFrame) -> list[dict]:
+    probabilities = rows_df["churn_probability"]
+    # Nullable integers, so a missing tenure stays missing instead of turning the column back into floats.
+    tenure_values = rows_df["Tenure"].round(0).astype("Int64")
 
     output_df = pd.DataFrame(
         {
-            "Customer ID": customer_ids,
+            "Customer ID": rows_df["Customer ID"],
             "churn_probability": probabilities.round(6),
             "churn_risk_percent": (probabilities * 100).map(lambda value: f"{value:.2f}%"),
             "risk_level": probabilities.map(_to_french_risk_level),
-            "Contract": standardized_df.get("Contract"),
-            "Tenure": tenure_values.round(0),
-            "MonthlyCharges": monthly_charges.round(2),
-            "PaymentMethod": standardized_df.get("PaymentMethod"),
-            "TotalCharges": total_charges.round(2),
+            "Contract": rows_df["Contract"],
+            "Tenure": tenure_values,
+            "MonthlyCharges": rows_df["MonthlyCharges"].round(2).map(
+                lambda value: f"{float(value):.2f}" if pd.notna(value) else None
+            ),
+            "PaymentMethod": rows_df["PaymentMethod"],
+            "TotalCharges": rows_df["TotalCharges"].round(2).map(
+                lambda value: f"{float(value):.2f}" if pd.notna(value) else None
+            ),
+            "recommendations": rows_df["recommendations"],
         },
-        index=standardized_df.index,
+        index=rows_df.index,
     )
+    # Missing cells of float and string columns only become None once the frame holds objects.
+    output_df = output_df.astype(object).where(output_df.notna(), None)
+    return output_df.to_dict(orient="records")
+
 
-    output_df["Tenure"] = output_df["Tenure"].where(output_df["Tenure"].notna(), None)
-    output_df["Tenure"] = output_df["Tenure"].map(lambda value: int(value) if value is not None else None)
-    output_df["MonthlyCharges"] = output_df["MonthlyCharges"].map(
-        lambda value: f"{float(value):.2f}" if pd.notna(value) else None
+def _store_customer_scores(
+    registry: ModelRegistry,
+    batch: BatchFrame,
+    probabilities: np.ndarray,
+    served_by: np.ndarray,
+) -> None:
+    risk_levels = np.select(
+        [probabilities >= HIGH_RISK_THRESHOLD, probabilities >= MEDIUM_RISK_THRESHOLD],
+        ["HIGH", "MEDIUM"],
+        default="LOW",
     )
-    output_df["TotalCharges"] = output_df["TotalCharges"].map(
-        lambda value: f"{float(value):.2f}" if pd.notna(value) else None
+    model_versions = pd.Series(served_by).map(registry.versions).to_numpy()
+    _CUSTOMER_STORE.upsert(
+        batch.customer_ids.to_numpy(),
+        probabilities,
+        risk_levels,
+        compute_row_risk_drivers(batch.features, batch.label_keys),
+        served_by,
+        model_versions,
     )
-    output_df = output_df.where(pd.notnull(output_df), None)
 
-    # Keep only top-risk rows for table rendering.
-    top_risk_rows_df = output_df.sort_values(by="churn_probability", ascending=False).head(200)
-    return top_risk_rows_df.to_dict(orient="records")
+
+def _store_segment_cube(cube: SegmentCube) -> str:
+    upload_id = uuid.uuid4().hex
+    with _SEGMENT_CUBES_LOCK:
+        _SEGMENT_CUBES[upload_id] = cube
+        while len(_SEGMENT_CUBES) > _MAX_STORED_SEGMENT_CUBES:
+            _SEGMENT_CUBES.popitem(last=False)
+    return upload_id
+
+
+def _get_segment_cube(upload_id: str) -> SegmentCube:
+    with _SEGMENT_CUBES_LOCK:
+        cube = _SEGMENT_CUBES.get(upload_id)
+        if cube is not None:
+            _SEGMENT_CUBES.move_to_end(upload_id)
+    if cube is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload id: {upload_id}")
+    return cube
+
+
+class _UploadScoring:
+    """Running state of one scoring pass over a /predict-csv upload.
+
+    Only insight counters, the segment cube and the top-risk rows are kept, so an
+    upload of any size is consumed chunk by chunk.
+    """
+
+    def __init__(self, model, registry: ModelRegistry) -> None:
+        self.registry = registry
+        self.accumulator = BatchInsightAccumulator(
+            model=model,
+            required_features=REQUIRED_FEATURES,
+            explanation_timeout_seconds=BATCH_EXPLANATION_TIMEOUT_SECONDS,
+        )
+        self.segment_cube = SegmentCube()
+        self.top_rows_df: pd.DataFrame | None = None
+        self.served_by_counts: dict[str, int] = {}
+        self._chunk_counts = {"chunks": 0, "rows": 0, "copies": 0, "bounded_copies": 0, "conversions": 0}
+
+    def add_chunk(self, raw_chunk: pd.DataFrame) -> None:
+        if raw_chunk.empty:
+            return
+        # Each chunk is turned into one typed BatchFrame that every consumer below reads from.
+        batch = _build_batch_frame(raw_chunk)
+        features_df = batch.features
+        scores, served_by = self.registry.score(features_df, routing_keys=batch.customer_ids)
+        if batch.customer_ids is not None:
+            _store_customer_scores(self.registry, batch, scores, served_by)
+        for name, count in zip(*np.unique(served_by.astype(str), return_counts=True)):
+            self.served_by_counts[name] = self.served_by_counts.get(name, 0) + int(count)
+        self.top_rows_df = _keep_top_risk_rows(self.top_rows_df, batch, scores)
+        self.accumulator.update(features_df, scores, batch.label_keys)
+        self.segment_cube.update(features_df, scores, batch.labels)
+
+        self._chunk_counts["chunks"] += 1
+        self._chunk_counts["rows"] += len(features_df)
+        self._chunk_counts["copies"] += batch.copies
+        self._chunk_counts["bounded_copies"] += batch.bounded_copies
+        self._chunk_counts["conversions"] += batch.conversions
+
+    @property
+    def frame_counts(self) -> dict[str, int]:
+        # The insight sample counts the bounded frames it builds itself.
+        bounded_copies = self._chunk_counts["bounded_copies"] + self.accumulator.sample_copies
+        return {**self._chunk_counts, "bounded_copies": bounded_copies}
+
+
+def _open_upload(file: UploadFile, upload_format: str):
+    try:
+        return open_decompressed(file.file, upload_format, max_bytes=UPLOAD_MAX_DECOMPRESSED_BYTES)
+    except UploadDependencyError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    except UploadFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _detect_csv_encoding(file: UploadFile, upload_format: str) -> str:
+    # Settled before anything is scored: a decode error halfway through the parse would leave the
+    # chunks already scored in the customer store and the model stats, and a retry would add them twice.
+    # It also reads the whole decompressed upload, so an oversized one is refused here.
+    try:
+        for encoding in _CSV_ENCODINGS[:-1]:
+            if decodes_as(_open_upload(file, upload_format), encoding):
+                return encoding
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    return _CSV_ENCODINGS[-1]
+
+
+def _iter_csv_chunks(file: UploadFile, upload_format: str, encoding: str):
+    # The stream is decompressed and decoded lazily, one parser block at a time. The CustomerID
+    # column is read as text, so IDs keep leading zeros and never come back as "1001.0".
+    try:
+        columns = pd.read_csv(_open_upload(file, upload_format), encoding=encoding, nrows=0).columns
+        id_position = _BATCH_HEADERS.resolve(columns).customer_id_position
+        dtype = None if id_position is None else {columns[id_position]: str}
+        for chunk in pd.read_csv(
+            _open_upload(file, upload_format), encoding=encoding, chunksize=_CSV_CHUNK_ROWS, dtype=dtype
+        ):
+            yield chunk
+    except HTTPException:
+        raise
+    except UnicodeDecodeError as exc:
+        raise HTTPException(status_code=400, detail="Could not decode CSV file.") from exc
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV format: {exc}") from exc
 
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    detail = _describe_validation_errors(exc.errors())
+    return JSONResponse(status_code=422, content={"detail": detail, "errors": exc.errors()})
+
+
+def _describe_validation_errors(errors) -> str:
     missing_fields: list[str] = []
     invalid_fields: list[str] = []
 
-    for error in exc.errors():
+    for error in errors:
         location = [str(part) for part in error.get("loc", ()) if part not in {"body", "query", "path"}]
         field_name = ".".join(location) if location else "payload"
         error_type = error.get("type", "")
@@ -182,34 +523,198 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     detail = "Invalid request payload."
     if message_parts:
         detail = f"{detail} {' '.join(message_parts)}"
-
-    return JSONResponse(status_code=422, content={"detail": detail, "errors": exc.errors()})
+    return detail
 
 
 @app.get("/health")
 def health() -> dict:
+    """Liveness: the process answers, whether or not models are loaded yet."""
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready() -> JSONResponse:
+    """Readiness: 200 once the warm-up finished, 503 while it runs or after it failed."""
+    state = dict(_WARM_UP_STATE)
+    return JSONResponse(status_code=200 if state["status"] == "warm" else 503, content=state)
+
+
+@app.post("/warm-up")
+def trigger_warm_up() -> JSONResponse:
+    state = warm_up()
+    return JSONResponse(status_code=200 if state["status"] == "warm" else 503, content=state)
+
+
 @app.post("/predict")
-def predict(payload: ClientFeatures) -> dict:
-    model = get_model()
-    proba, percent = predict_churn_proba(model, payload.model_dump())
+def predict(payload: ClientFeatures, customer_id: str | None = None) -> dict:
+    registry = get_model_registry()
+    client_df = pd.DataFrame([payload.model_dump()], columns=REQUIRED_FEATURES)
+    routing_keys = pd.Series([normalize_customer_id(customer_id)], dtype=object)
+    probabilities, served_by = registry.score(client_df, routing_keys=routing_keys)
+    proba = float(probabilities[0])
     return {
         "churn_probability": proba,
-        "risk_percent": percent,
+        "risk_percent": f"{proba:.0%}",
+        "model": served_by[0],
     }
 
 
+class _DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse that leaves the request body to its content generator.
+
+    The stock response listens for client disconnects on ``receive``, which would swallow
+    the body chunks the generator is still reading.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+@app.post("/predict-stream")
+async def predict_stream(request: Request) -> StreamingResponse:
+    """Score newline-delimited JSON clients and stream NDJSON results while the body is still arriving."""
+    registry = get_model_registry()
+    return _DuplexStreamingResponse(_stream_predictions(request, registry), media_type="application/x-ndjson")
+
+
+async def _stream_predictions(request: Request, registry: ModelRegistry):
+    buffer = b""
+    line_number = 0
+    pending: list[tuple[int, dict, Any]] = []
+    pending_since = 0.0
+    # Set while the rest of an oversized record is skipped up to its newline.
+    discarding = False
+
+    def accept_line(raw_line: bytes) -> bytes | None:
+        nonlocal pending_since
+        if len(raw_line) > _STREAM_MAX_LINE_BYTES:
+            return _ndjson_line({"line": line_number, "error": _STREAM_LINE_TOO_LONG})
+        record, error = _parse_stream_record(raw_line)
+        if error is not None:
+            return _ndjson_line({"line": line_number, "error": error})
+        if not pending:
+            pending_since = time.perf_counter()
+        pending.append((line_number, record, record.get("CustomerID")))
+        return None
+
+    # The body is read by its own task so a quiet producer cannot hold back a partial batch:
+    # waiting for the next chunk times out when the oldest pending record is due.
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=_STREAM_READ_AHEAD_CHUNKS)
+    reader = asyncio.create_task(_read_stream_body(request, chunks))
+    try:
+        while True:
+            wait_seconds = None
+            if pending:
+                wait_seconds = max(0.0, pending_since + _STREAM_MAX_BATCH_WAIT_SECONDS - time.perf_counter())
+            try:
+                chunk = await asyncio.wait_for(chunks.get(), timeout=wait_seconds)
+            except asyncio.TimeoutError:
+                yield await _score_stream_batch(registry, pending)
+                pending = []
+                continue
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+
+            buffer += chunk
+            if discarding:
+                newline = buffer.find(b"\n")
+                if newline < 0:
+                    buffer = b""
+                    continue
+                buffer = buffer[newline + 1 :]
+                discarding = False
+
+            *lines, buffer = buffer.split(b"\n")
+            for raw_line in lines:
+                line_number += 1
+                if not raw_line.strip():
+                    continue
+                error_line = accept_line(raw_line)
+                if error_line is not None:
+                    yield error_line
+                if len(pending) >= _STREAM_BATCH_SIZE:
+                    yield await _score_stream_batch(registry, pending)
+                    pending = []
+
+            # An unterminated record past the limit is reported now and the stream goes on after it.
+            if len(buffer) > _STREAM_MAX_LINE_BYTES:
+                line_number += 1
+                yield _ndjson_line({"line": line_number, "error": _STREAM_LINE_TOO_LONG})
+                buffer = b""
+                discarding = True
+    finally:
+        reader.cancel()
+
+    if buffer.strip():
+        line_number += 1
+        error_line = accept_line(buffer)
+        if error_line is not None:
+            yield error_line
+    if pending:
+        yield await _score_stream_batch(registry, pending)
+
+
+async def _read_stream_body(request: Request, chunks: asyncio.Queue) -> None:
+    # Ends with None, or with the exception that interrupted the body (e.g. a client disconnect).
+    try:
+        async for chunk in request.stream():
+            await chunks.put(chunk)
+    except Exception as exc:
+        await chunks.put(exc)
+        return
+    await chunks.put(None)
+
+
+def _parse_stream_record(raw_line: bytes) -> tuple[dict, str | None]:
+    try:
+        record = json.loads(raw_line)
+    except ValueError as exc:
+        return {}, f"Invalid JSON: {exc}"
+    if not isinstance(record, dict):
+        return {}, "Each line must be a JSON object."
+    try:
+        features = ClientFeatures.model_validate(record).model_dump()
+    except ValidationError as exc:
+        return {}, _describe_validation_errors(exc.errors())
+    features["CustomerID"] = record.get("CustomerID")
+    return features, None
+
+
+async def _score_stream_batch(registry: ModelRegistry, pending: list[tuple[int, dict, Any]]) -> bytes:
+    batch_df = pd.DataFrame.from_records([record for _, record, _ in pending], columns=REQUIRED_FEATURES)
+    routing_keys = pd.Series([customer_id for _, _, customer_id in pending], dtype=object)
+    probabilities, served_by = await run_in_threadpool(registry.score, batch_df, routing_keys)
+
+    return b"".join(
+        _ndjson_line(
+            {
+                "line": line_number,
+                "CustomerID": customer_id,
+                "churn_probability": float(probability),
+                "risk_level": get_risk_level(float(probability)),
+                "model": model_name,
+            }
+        )
+        for (line_number, _, customer_id), probability, model_name in zip(pending, probabilities, served_by)
+    )
+
+
+def _ndjson_line(payload: dict) -> bytes:
+    return json.dumps(payload).encode("utf-8") + b"\n"
+
+
 @app.post("/explain")
 def explain(payload: ClientFeatures) -> dict:
     model = get_model()
 
     try:
-        return explain_client_prediction(
+        return explain_client_prediction_within_budget(
             model=model,
             client_features=payload.model_dump(),
             required_features=REQUIRED_FEATURES,
+            timeout_seconds=EXPLANATION_TIMEOUT_SECONDS,
         )
     except ShapDependencyError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -225,58 +730,343 @@ def explain(payload: ClientFeatures) -> dict:
         ) from exc
 
 
-@app.post("/predict-csv")
-async def predict_csv(file: UploadFile = File(...)):
-    if not file.filename or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Please upload a .csv file.")
+class _WhatIfSession:
+    """State of one what-if WebSocket connection.
 
-    data = await file.read()
-    if not data:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    Updates are merged into ``features`` as they arrive; the scorer only ever looks at
+    the latest merged state, so edits received while a score is in flight collapse into
+    a single follow-up score.
+    """
+
+    def __init__(self) -> None:
+        self.features: dict[str, Any] = {}
+        self.customer_id: str | None = None
+        self.explain = True
+        self.seq = 0
+        self.pending_updates = 0
+        self.received = 0
+        self.scored = 0
+        self.changed = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+
+    def apply(self, message: dict) -> None:
+        if message.get("type") == "reset":
+            self.features = {}
+            self.customer_id = None
+        features = message.get("features") or {}
+        if not isinstance(features, dict):
+            raise ValueError("'features' must be a JSON object.")
+        unknown = [name for name in features if name not in REQUIRED_FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown features: {unknown}. Expected: {REQUIRED_FEATURES}")
+
+        self.features.update(features)
+        if "customer_id" in message:
+            self.customer_id = message["customer_id"]
+        if "explain" in message:
+            self.explain = bool(message["explain"])
+        self.seq = int(message["seq"]) if isinstance(message.get("seq"), int) else self.seq + 1
+        self.received += 1
+        self.pending_updates += 1
+        self.changed.set()
+
+    def take_snapshot(self) -> tuple[int, dict[str, Any], str | None, bool, int]:
+        coalesced = self.pending_updates
+        self.pending_updates = 0
+        self.changed.clear()
+        return self.seq, dict(self.features), self.customer_id, self.explain, coalesced
+
+    async def send(self, websocket: WebSocket, payload: dict) -> None:
+        async with self._send_lock:
+            await websocket.send_json(payload)
+
+
+@app.websocket("/ws/what-if")
+async def what_if_session(websocket: WebSocket) -> None:
+    """Interactive what-if channel: clients push partial feature edits, the server pushes scores.
+
+    Client messages are JSON objects such as
+    ``{"seq": 3, "features": {"Tenure": 24}, "explain": true, "customer_id": "C-1"}``;
+    ``{"type": "reset"}`` clears the session features. Each ``result`` message carries
+    the ``seq`` of the latest update it reflects and how many updates it coalesced.
+    """
+    await websocket.accept()
+    session = _WhatIfSession()
+    try:
+        registry = get_model_registry()
+    except HTTPException as exc:
+        await session.send(websocket, {"type": "error", "detail": exc.detail})
+        await websocket.close(code=1011)
+        return
 
-    decoded = None
-    for encoding in ("utf-8-sig", "utf-8", "latin-1"):
+    scorer = asyncio.create_task(_score_what_if_updates(websocket, session, registry))
+    try:
+        while True:
+            raw_message = await websocket.receive_text()
+            if len(raw_message) > _WHAT_IF_MAX_MESSAGE_BYTES:
+                await session.send(websocket, {"type": "error", "detail": "Message exceeds the maximum size."})
+                continue
+            try:
+                message = json.loads(raw_message)
+                if not isinstance(message, dict):
+                    raise ValueError("Each message must be a JSON object.")
+                session.apply(message)
+            except ValueError as exc:
+                await session.send(websocket, {"type": "error", "detail": str(exc)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        scorer.cancel()
+        try:
+            await scorer
+        except (asyncio.CancelledError, WebSocketDisconnect):
+            pass
+
+
+async def _score_what_if_updates(websocket: WebSocket, session: _WhatIfSession, registry: ModelRegistry) -> None:
+    while True:
+        await session.changed.wait()
+        seq, features, customer_id, explain_requested, coalesced = session.take_snapshot()
+
+        missing = [name for name in REQUIRED_FEATURES if name not in features]
+        if missing:
+            await session.send(websocket, {"type": "incomplete", "seq": seq, "missing": missing})
+            continue
         try:
-            decoded = data.decode(encoding)
-            break
-        except UnicodeDecodeError:
+            client_features = ClientFeatures.model_validate(features).model_dump()
+        except ValidationError as exc:
+            await session.send(
+                websocket, {"type": "error", "seq": seq, "detail": _describe_validation_errors(exc.errors())}
+            )
             continue
 
-    if decoded is None:
-        raise HTTPException(status_code=400, detail="Could not decode CSV file.")
+        try:
+            result = await _score_what_if_snapshot(registry, client_features, customer_id, explain_requested)
+        except Exception as exc:
+            # A failed snapshot is reported on its seq; the session keeps scoring later updates.
+            detail = exc.detail if isinstance(exc, HTTPException) else f"Scoring failed: {type(exc).__name__}: {exc}"
+            await session.send(websocket, {"type": "error", "seq": seq, "detail": detail})
+            continue
+        session.scored += 1
+        await session.send(
+            websocket,
+            {
+                "type": "result",
+                "seq": seq,
+                "coalesced_updates": coalesced,
+                "session": {"received": session.received, "scored": session.scored},
+                **result,
+            },
+        )
 
-    try:
-        raw_df = pd.read_csv(io.StringIO(decoded))
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Invalid CSV format: {exc}") from exc
 
-    if raw_df.empty:
-        raise HTTPException(status_code=400, detail="CSV has no rows.")
+async def _score_what_if_snapshot(
+    registry: ModelRegistry,
+    client_features: dict[str, Any],
+    customer_id: str | None,
+    explain_requested: bool,
+) -> dict[str, Any]:
+    if explain_requested:
+        try:
+            explanation = await run_in_threadpool(
+                explain_client_prediction_within_budget,
+                model=registry.models[registry.primary],
+                client_features=client_features,
+                required_features=REQUIRED_FEATURES,
+                timeout_seconds=EXPLANATION_TIMEOUT_SECONDS,
+            )
+            return {**explanation, "model": registry.primary}
+        except (ShapDependencyError, ShapComputationError) as exc:
+            explanation_error = str(exc)
+    else:
+        explanation_error = None
+
+    client_df = pd.DataFrame([client_features], columns=REQUIRED_FEATURES)
+    routing_keys = pd.Series([customer_id], dtype=object)
+    probabilities, served_by = await run_in_threadpool(registry.score, client_df, routing_keys)
+    proba = float(probabilities[0])
+    result = {
+        "churn_probability": proba,
+        "risk_percent": f"{proba:.0%}",
+        "risk_level": get_risk_level(proba),
+        "model": served_by[0],
+    }
+    if explanation_error is not None:
+        result["explanation_error"] = explanation_error
+    return result
+
+
+@app.get("/explain/stats")
+def explanation_stats() -> dict:
+    return EXPLANATION_STATS.summary()
+
+
+@app.get("/predict-csv/stats")
+def batch_frame_stats() -> dict:
+    return {**BATCH_FRAME_STATS.summary(), "header_cache": _BATCH_HEADERS.stats()}
+
+
+@app.post("/predict-csv")
+async def predict_csv(file: UploadFile = File(...)):
+    upload_format = detect_upload_format(file.filename)
+    if upload_format is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Please upload a .csv, .csv.gz or .csv.zst file, or a .zip containing a single CSV.",
+        )
+    # Hashing, decompressing, parsing and scoring a large upload would otherwise hold the event loop
+    # that /predict-stream and the /what-if sockets are served from.
+    return await run_in_threadpool(_score_csv_upload, file, upload_format)
+
+
+def _score_csv_upload(file: UploadFile, upload_format: str) -> dict:
+    # The upload stays in its spooled temporary file; it is hashed and parsed as a stream.
+    upload_bytes = file.file.seek(0, io.SEEK_END)
+    if not upload_bytes:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
-    features_df = _prepare_batch_features(raw_df)
     model = get_model()
-    probabilities = pd.Series(model.predict_proba(features_df)[:, 1], index=features_df.index)
-    rows_payload = _build_actionable_rows(raw_df=raw_df, probabilities=probabilities)
-    insights = build_batch_consulting_insights(
-        model=model,
-        features_df=features_df,
-        probabilities=probabilities.to_numpy(),
-        required_features=REQUIRED_FEATURES,
-    )
+    registry = get_model_registry()
+    cache_key = build_cache_key(file.file, registry.version)
+    cached_result = _RESULT_CACHE.get(cache_key)
+    if cached_result is not None:
+        segment_cube = SegmentCube.from_records(cached_result["segment_cells"], n_rows=cached_result["segment_rows"])
+        return {
+            **cached_result["response"],
+            "upload_id": _store_segment_cube(segment_cube),
+            "filename": file.filename,
+            "cached": True,
+        }
 
-    return {
+    encoding = _detect_csv_encoding(file, upload_format)
+    scoring = _UploadScoring(model, registry)
+    for raw_chunk in _iter_csv_chunks(file, upload_format, encoding):
+        scoring.add_chunk(raw_chunk)
+
+    accumulator = scoring.accumulator
+    segment_cube = scoring.segment_cube
+    served_by_counts = scoring.served_by_counts
+    if accumulator.n_rows == 0:
+        raise HTTPException(status_code=400, detail="CSV has no rows.")
+    BATCH_FRAME_STATS.record(scoring.frame_counts)
+
+    rows_payload = _format_actionable_rows(scoring.top_rows_df)
+    insights = accumulator.finalize()
+    segment_cube.cells()
+    upload_id = _store_segment_cube(segment_cube)
+
+    response = {
+        "upload_id": upload_id,
+        "cached": False,
         "filename": file.filename,
-        "row_count": int(len(features_df)),
+        "upload": {"format": upload_format, "bytes": upload_bytes},
+        "row_count": accumulator.n_rows,
         "summary": {
             "avg_probability": insights["probability_mean"],
             "high_risk_count": insights["high_risk_count"],
             "high_risk_rate": insights["high_risk_rate"],
         },
+        "served_by": served_by_counts,
         "predictions": rows_payload,
         "rows": rows_payload,
         **insights,
     }
+    if registry.cascade is not None:
+        escalated_rows = served_by_counts.get(registry.cascade["expensive_model"], 0)
+        response["cascade"] = {
+            "escalated_rows": escalated_rows,
+            "escalation_rate": escalated_rows / accumulator.n_rows,
+            "band_width": registry.cascade["band_width"],
+        }
+    # A timed out or failed explanation is transient: caching it would pin every later identical
+    # upload to the degraded drivers, so that result is recomputed next time instead.
+    if insights["global_drivers_explanation"]["reason"] not in _TRANSIENT_EXPLANATION_REASONS:
+        _RESULT_CACHE.put(
+            cache_key,
+            {"response": response, "segment_cells": segment_cube.to_records(), "segment_rows": segment_cube.n_rows},
+        )
+    return response
+
+
+@app.get("/models")
+def served_models() -> dict:
+    return get_model_registry().describe()
+
+
+@app.get("/model/thresholds")
+def model_thresholds() -> dict:
+    report = load_threshold_report(METRICS_PATH)
+    if report is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Threshold analysis not found. Run training first: python -m src.main",
+        )
+    return report
+
+
+@app.get("/cache/stats")
+def cache_stats() -> dict:
+    return _RESULT_CACHE.stats()
+
+
+@app.get("/customers/top-risk")
+def top_risk_customers(limit: int = 20, risk_level: str | None = None) -> dict:
+    if not 1 <= limit <= _MAX_TOP_CUSTOMERS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {_MAX_TOP_CUSTOMERS}.")
+    customers = _CUSTOMER_STORE.top_k(limit, risk_level=risk_level.upper() if risk_level else None)
+    return {"limit": limit, "risk_level": risk_level, "customers": customers}
+
+
+@app.get("/customers/stats")
+def customer_store_stats() -> dict:
+    return _CUSTOMER_STORE.stats()
+
+
+@app.get("/customers/{customer_id}")
+def customer_score(customer_id: str) -> dict:
+    record = _CUSTOMER_STORE.get(customer_id)
+    if record is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No stored score for customer {customer_id}. Score it through /predict-csv first.",
+        )
+    return record
+
+
+@app.get("/segments/{upload_id}")
+def describe_segments(upload_id: str) -> dict:
+    cube = _get_segment_cube(upload_id)
+    return {"upload_id": upload_id, **cube.describe()}
+
+
+@app.post("/segments/{upload_id}")
+def query_segments(upload_id: str, query: SegmentQuery) -> dict:
+    cube = _get_segment_cube(upload_id)
+    try:
+        groups = cube.query(group_by=query.group_by, filters=query.filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return {
+        "upload_id": upload_id,
+        "group_by": query.group_by,
+        "filters": query.filters,
+        "groups": groups,
+    }
+
+
+# Importing this module (pandas, scikit-learn, FastAPI and the routes above) is the first startup phase.
+_IMPORT_RSS_MB = current_rss_mb()
+_IMPORT_PHASE = {
+    "stage": "import_app",
+    "seconds": round(time.perf_counter() - _IMPORT_STARTED, 3),
+    "rss_after_mb": None if _IMPORT_RSS_MB is None else round(_IMPORT_RSS_MB, 1),
+}
+_WARM_UP_STATE["phases"] = [_IMPORT_PHASE]
+logger.info("import_app: rss_after=%s MB time=%ss", _IMPORT_PHASE["rss_after_mb"], _IMPORT_PHASE["seconds"])
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("src.api:app", host="127.0.0.1", port=8000, reload=True)
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from src.utils.config import PROJECT_ROOT
+
+ENDPOINTS = ("predict", "explain", "predict-csv")
+DEFAULT_MIX = "predict=0.7,explain=0.2,predict-csv=0.1"
+DEFAULT_OUTPUT_PATH = str(PROJECT_ROOT / "reports" / "load_test.json")
+
+_GENDERS = ["Female", "Male"]
+_CONTRACTS = ["Month-to-month", "One year", "Two year"]
+_PAYMENT_METHODS = ["Electronic check", "Mailed check", "Bank transfer", "Credit card"]
+_CSV_COLUMNS = ["CustomerID", "Age", "Gender", "Tenure", "MonthlyCharges", "Contract", "PaymentMethod", "TotalCharges"]
+
+
+def build_client_payload(rng: random.Random) -> dict:
+    """Random client that satisfies the ClientFeatures schema of src.api."""
+    tenure = rng.randint(0, 72)
+    monthly_charges = round(rng.uniform(18.0, 120.0), 2)
+    return {
+        "Age": rng.randint(18, 90),
+        "Gender": rng.choice(_GENDERS),
+        "Tenure": tenure,
+        "MonthlyCharges": monthly_charges,
+        "Contract": rng.choice(_CONTRACTS),
+        "PaymentMethod": rng.choice(_PAYMENT_METHODS),
+        "TotalCharges": round(tenure * monthly_charges, 2),
+    }
+
+
+class PayloadFactory:
+    def __init__(self, csv_rows: int, seed: int) -> None:
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # CSV bodies are pre-rendered once; each request only gets a unique id prefix so
+        # the server's upload result cache does not turn the test into cache hits.
+        self._csv_lines = [
+            ",".join(str(value) for value in build_client_payload(self._rng).values())
+            for _ in range(csv_rows)
+        ]
+
+    def json_body(self) -> bytes:
+        with self._lock:
+            payload = build_client_payload(self._rng)
+        return json.dumps(payload).encode("utf-8")
+
+    def multipart_body(self) -> tuple[bytes, str]:
+        upload_id = uuid.uuid4().hex[:12]
+        csv_text = "\n".join(
+            [",".join(_CSV_COLUMNS)]
+            + [f"{upload_id}-{index},{line}" for index, line in enumerate(self._csv_lines)]
+        )
+        boundary = f"loadtest{uuid.uuid4().hex}"
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="load_test.csv"\r\n'
+            "Content-Type: text/csv\r\n\r\n"
+            f"{csv_text}\r\n"
+            f"--{boundary}--\r\n"
+        ).encode("utf-8")
+        return body, f"multipart/form-data; boundary={boundary}"
+
+
+class LoadClient:
+    """Sends requests over one keep-alive connection per thread."""
+
+    def __init__(self, host: str, port: int, payloads: PayloadFactory, timeout: float) -> None:
+        self.host = host
+        self.port = port
+        self.payloads = payloads
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, endpoint: str) -> bool:
+        if endpoint == "predict-csv":
+            body, content_type = self.payloads.multipart_body()
+        else:
+            body, content_type = self.payloads.json_body(), "application/json"
+
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request("POST", f"/{endpoint}", body=body, headers={"Content-Type": content_type})
+                response = connection.getresponse()
+                response.read()
+                return 200 <= response.status < 300
+            except (http.client.HTTPException, OSError):
+                # A dropped keep-alive connection is retried once on a fresh socket.
+                self._local.connection = None
+                connection.close()
+                if attempt == 1:
+                    return False
+        return False
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights: dict[str, float] = {}
+    for part in mix.split(","):
+        if not part.strip():
+            continue
+        endpoint, _, weight = part.partition("=")
+        endpoint = endpoint.strip().lstrip("/")
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {endpoint}. Expected one of {list(ENDPOINTS)}")
+        weights[endpoint] = float(weight or 1.0)
+
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Traffic mix must contain at least one positive weight.")
+    return {endpoint: weight / total for endpoint, weight in weights.items()}
+
+
+def run_closed_loop(client: LoadClient, mix: dict[str, float], concurrency: int, duration: float, seed: int) -> dict:
+    """Each of `concurrency` workers sends its next request as soon as the previous one returns."""
+    samples: list[tuple[str, float, bool]] = []
+    samples_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_index: int) -> None:
+        rng = random.Random(seed + worker_index)
+        endpoints, weights = list(mix), list(mix.values())
+        local_samples = []
+        while time.perf_counter() < deadline:
+            endpoint = rng.choices(endpoints, weights)[0]
+            start = time.perf_counter()
+            ok = client.send(endpoint)
+            local_samples.append((endpoint, time.perf_counter() - start, ok))
+        with samples_lock:
+            samples.extend(local_samples)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {"mode": "closed", "concurrency": concurrency, **summarize_samples(samples, elapsed)}
+
+
+def run_open_loop(
+    client: LoadClient,
+    mix: dict[str, float],
+    rate: float,
+    duration: float,
+    max_in_flight: int,
+    seed: int,
+) -> dict:
+    """Poisson arrivals at `rate` req/s; latency counts from the scheduled send time."""
+    rng = random.Random(seed)
+    endpoints, weights = list(mix), list(mix.values())
+    samples: list[tuple[str, float, bool]] = []
+    samples_lock = threading.Lock()
+
+    def fire(endpoint: str, scheduled_at: float) -> None:
+        ok = client.send(endpoint)
+        # Measuring from the schedule avoids coordinated omission when the server falls behind.
+        latency = time.perf_counter() - scheduled_at
+        with samples_lock:
+            samples.append((endpoint, latency, ok))
+
+    started = time.perf_counter()
+    next_send = started
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        while next_send < started + duration:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(fire, rng.choices(endpoints, weights)[0], next_send)
+            next_send += rng.expovariate(rate)
+    elapsed = time.perf_counter() - started
+
+    return {"mode": "open", "target_rate": rate, **summarize_samples(samples, elapsed)}
+
+
+def summarize_samples(samples: list[tuple[str, float, bool]], elapsed: float) -> dict:
+    elapsed = max(elapsed, 1e-9)
+    by_endpoint: dict[str, dict] = {}
+    for endpoint in sorted({endpoint for endpoint, _, _ in samples}):
+        endpoint_samples = [(latency, ok) for name, latency, ok in samples if name == endpoint]
+        by_endpoint[endpoint] = _latency_stats(endpoint_samples, elapsed)
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": _latency_stats([(latency, ok) for _, latency, ok in samples], elapsed),
+        "endpoints": by_endpoint,
+    }
+
+
+def _latency_stats(samples: list[tuple[float, bool]], elapsed: float) -> dict:
+    if not samples:
+        return {"requests": 0, "errors": 0, "error_rate": 0.0, "throughput_rps": 0.0}
+
+    latencies_ms = np.array([latency for latency, _ in samples]) * 1000.0
+    errors = sum(1 for _, ok in samples if not ok)
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples),
+        "throughput_rps": round((len(samples) - errors) / elapsed, 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(latencies_ms.max()), 3),
+    }
+
+
+def start_local_server(host: str, port: int, workers: int, startup_timeout: float) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", "src.api:app", "--host", host, "--port", str(port)]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    print(f"[load_test] Starting server: {' '.join(command)}")
+    process = subprocess.Popen(command, cwd=str(PROJECT_ROOT))
+
+    deadline = time.perf_counter() + startup_timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup with code {process.returncode}.")
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1.0)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server did not become healthy within {startup_timeout:.0f}s.")
+
+
+def print_saturation_curve(points: list[dict]) -> None:
+    for point in points:
+        level = f"concurrency={point['concurrency']}" if point["mode"] == "closed" else f"rate={point['target_rate']}/s"
+        print(f"[load_test] {point['mode']} {level}")
+        for endpoint, stats in point["endpoints"].items():
+            if not stats["requests"]:
+                continue
+            print(
+                f"    {endpoint:<12} n={stats['requests']:<6} rps={stats['throughput_rps']:<9} "
+                f"p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms "
+                f"errors={stats['error_rate']:.2%}"
+            )
+
+
+def _parse_number_list(value: str, cast) -> list:
+    return [cast(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Load test the churn API against a local uvicorn server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-server", action="store_true", help="Target an already running server.")
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. predict=0.7,explain=0.3")
+    parser.add_argument("--mode", choices=["closed", "open", "both"], default="both")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Closed-loop worker counts.")
+    parser.add_argument("--rates", default="5,10,20,40", help="Open-loop target request rates (req/s).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per load level.")
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--csv-rows", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    client = LoadClient(args.host, args.port, PayloadFactory(args.csv_rows, args.seed), timeout=args.timeout)
+    server = None if args.no_server else start_local_server(args.host, args.port, args.server_workers, 60.0)
+
+    points: list[dict] = []
+    try:
+        # Warm the model and explainers so the first load level is not skewed by lazy loading.
+        for endpoint in mix:
+            client.send(endpoint)
+
+        if args.mode in {"closed", "both"}:
+            for concurrency in _parse_number_list(args.concurrency, int):
+                points.append(run_closed_loop(client, mix, concurrency, args.duration, args.seed))
+                print_saturation_curve(points[-1:])
+        if args.mode in {"open", "both"}:
+            for rate in _parse_number_list(args.rates, float):
+                points.append(run_open_loop(client, mix, rate, args.duration, args.max_in_flight, args.seed))
+                print_saturation_curve(points[-1:])
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "target": f"http://{args.host}:{args.port}",
+        "mix": mix,
+        "duration_per_level_seconds": args.duration,
+        "csv_rows": args.csv_rows,
+        "saturation_curve": points,
+    }
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[load_test] Saved report to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
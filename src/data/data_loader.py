@@ -2,26 +2,46 @@
 
 import pandas as pd
 
-from src.utils.data_utils import standardize_columns
+from src.utils.config import CATEGORICAL_COLUMNS, COLUMN_NAME_MAPPING, ID_COLUMN_ALIASES
+from src.utils.data_utils import normalize_column_name, optimize_dtypes, standardize_columns
 
 
-def load_data(path: str) -> pd.DataFrame:
-    """Load churn data and print diagnostics."""
+def load_data(path: str, low_memory: bool = False) -> pd.DataFrame:
+    """Load churn data and print diagnostics.
+
+    With ``low_memory`` identifier columns are never read, known categoricals are parsed
+    straight into ``category`` dtype and numerics are downcast.
+    """
     print(f"[data_loader] Loading data from: {path}")
-    df = pd.read_csv(path)
+    df = _read_csv_low_memory(path) if low_memory else pd.read_csv(path)
     df = standardize_columns(df)
 
-    if "TotalCharges" in df.columns:
+    if "TotalCharges" in df.columns and not (low_memory and df["TotalCharges"].dtype.kind in {"i", "u", "f"}):
         df["TotalCharges"] = pd.to_numeric(
             df["TotalCharges"].astype(str).str.replace(",", "", regex=False).str.strip(),
             errors="coerce",
         )
 
+    if low_memory:
+        df = optimize_dtypes(df)
+
     print(f"[data_loader] Shape: {df.shape}")
     print("[data_loader] Columns:", list(df.columns))
     print("[data_loader] Dtypes:")
     print(df.dtypes)
     print("[data_loader] Missing values per column:")
     print(df.isna().sum())
+    print(f"[data_loader] Memory usage: {df.memory_usage(deep=True).sum() / (1024 * 1024):.1f} MB")
 
     return df
+
+
+def _read_csv_low_memory(path: str) -> pd.DataFrame:
+    raw_columns = pd.read_csv(path, nrows=0).columns
+    use_columns = [col for col in raw_columns if normalize_column_name(col) not in ID_COLUMN_ALIASES]
+    categorical_dtypes = {
+        col: "category"
+        for col in use_columns
+        if COLUMN_NAME_MAPPING.get(normalize_column_name(col)) in CATEGORICAL_COLUMNS
+    }
+    return pd.read_csv(path, usecols=use_columns, dtype=categorical_dtypes)
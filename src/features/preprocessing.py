@@ -1,28 +1,37 @@
 ﻿from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 
 
-def build_preprocessor(df: pd.DataFrame) -> ColumnTransformer:
-    """Build preprocessing pipeline with automatic numeric/categorical detection."""
+def build_preprocessor(df: pd.DataFrame, low_memory: bool = False) -> ColumnTransformer:
+    """Build preprocessing pipeline with automatic numeric/categorical detection.
+
+    With ``low_memory`` the transformed matrix is float32 end to end.
+    """
     numeric_features = df.select_dtypes(include=["number", "bool"]).columns.tolist()
     categorical_features = [col for col in df.columns if col not in numeric_features]
 
-    numeric_transformer = Pipeline(
-        steps=[
-            ("imputer", SimpleImputer(strategy="median")),
-            ("scaler", StandardScaler()),
-        ]
-    )
+    numeric_steps = [
+        ("imputer", SimpleImputer(strategy="median")),
+        ("scaler", StandardScaler()),
+    ]
+    if low_memory:
+        # SimpleImputer would otherwise upcast downcast integer columns to float64.
+        numeric_steps.insert(0, ("to_float32", FunctionTransformer(to_float32, feature_names_out="one-to-one")))
+    numeric_transformer = Pipeline(steps=numeric_steps)
 
     categorical_transformer = Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy="most_frequent")),
-            ("onehot", OneHotEncoder(handle_unknown="ignore")),
+            (
+                "onehot",
+                OneHotEncoder(handle_unknown="ignore", dtype=np.float32 if low_memory else np.float64),
+            ),
         ]
     )
 
@@ -38,3 +47,7 @@ def build_preprocessor(df: pd.DataFrame) -> ColumnTransformer:
     print(f"[preprocessing] Categorical columns: {categorical_features}")
 
     return preprocessor
+
+
+def to_float32(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float32)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config import COLUMN_NAME_MAPPING, ID_COLUMN_ALIASES, TARGET_COLUMN_ALIASES
+from src.utils.data_utils import normalize_column_name
+
+_MAX_CACHED_HEADERS = 256
+
+
+class BatchHeader:
+    """Where each canonical column lives in an uploaded header, by position."""
+
+    def __init__(
+        self,
+        feature_positions: dict[str, int],
+        customer_id_position: int | None,
+        missing_features: list[str],
+        columns_found: list[Any],
+    ) -> None:
+        self.feature_positions = feature_positions
+        self.customer_id_position = customer_id_position
+        self.missing_features = missing_features
+        self.columns_found = columns_found
+
+
+class BatchHeaderResolver:
+    """Maps uploaded CSV headers to the model's feature columns, memoized by header tuple.
+
+    Resolution applies, on names only, the same steps the upload frame used to go
+    through: trimming, the upload-specific aliases, ``standardize_columns``, then
+    dropping identifier and target columns. Every chunk of an upload, and every later
+    upload with the same header, reuses the result.
+    """
+
+    def __init__(self, required_features: list[str], column_aliases: dict[str, str]) -> None:
+        self.required_features = list(required_features)
+        self.column_aliases = dict(column_aliases)
+        self.hits = 0
+        self.misses = 0
+        self._headers: OrderedDict[tuple, BatchHeader] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, columns) -> BatchHeader:
+        key = tuple(columns)
+        with self._lock:
+            header = self._headers.get(key)
+            if header is not None:
+                self._headers.move_to_end(key)
+                self.hits += 1
+                return header
+            self.misses += 1
+
+        header = self._resolve(key)
+        with self._lock:
+            self._headers[key] = header
+            while len(self._headers) > _MAX_CACHED_HEADERS:
+                self._headers.popitem(last=False)
+        return header
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._headers),
+            }
+
+    def _resolve(self, header: tuple) -> BatchHeader:
+        names = [name.strip() if isinstance(name, str) else name for name in header]
+
+        if any(feature not in names for feature in self.required_features):
+            present = set(names)
+            renames = {
+                source: target
+                for source, target in self.column_aliases.items()
+                if source in present and target not in present
+            }
+            names = [renames.get(name, name) for name in names]
+
+        names = [
+            COLUMN_NAME_MAPPING.get(normalize_column_name(name), name) if isinstance(name, str) else name
+            for name in names
+        ]
+        dropped = [
+            isinstance(name, str) and normalize_column_name(name) in ID_COLUMN_ALIASES | TARGET_COLUMN_ALIASES
+            for name in names
+        ]
+
+        first_position: dict[Any, int] = {}
+        for position, (name, is_dropped) in enumerate(zip(names, dropped)):
+            if not is_dropped:
+                first_position.setdefault(name, position)
+        feature_positions = {
+            feature: first_position[feature] for feature in self.required_features if feature in first_position
+        }
+
+        return BatchHeader(
+            feature_positions=feature_positions,
+            customer_id_position=names.index("CustomerID") if "CustomerID" in names else None,
+            missing_features=[feature for feature in self.required_features if feature not in feature_positions],
+            columns_found=[name for name, is_dropped in zip(names, dropped) if not is_dropped],
+        )
+
+
+class BatchFrame:
+    """Canonical typed view of one uploaded chunk, built once and shared by every consumer.
+
+    ``features`` holds the required columns in model order with numeric columns parsed;
+    it is the only chunk-sized frame built. Each categorical column is factorized once:
+    ``labels`` maps it to per-row codes and the stripped distinct values (code -1 is
+    missing), and ``label_keys`` to the per-row lower-cased label used by the
+    recommendation and risk-flag rules. The text is normalized on the distinct values
+    only, so the customer store, the actionable rows, the insights and the segment cube
+    read codes and arrays instead of reconverting the chunk.
+
+    ``copies`` counts chunk-sized frames, ``bounded_copies`` the small extracts that must
+    outlive the chunk (the top-risk rows), and ``conversions`` the columns parsed or
+    normalized, each at most once.
+    """
+
+    def __init__(self, raw_df: pd.DataFrame, header: BatchHeader, numeric_features: list[str]) -> None:
+        self.conversions = 0
+        self.bounded_copies = 0
+        columns: dict[str, pd.Series] = {}
+        for feature, position in header.feature_positions.items():
+            values = raw_df.iloc[:, position]
+            if feature in numeric_features and not pd.api.types.is_numeric_dtype(values):
+                values = _parse_numeric(values)
+                self.conversions += 1
+            columns[feature] = values
+
+        self.features = pd.DataFrame(columns, index=raw_df.index)
+        self.copies = 1
+
+        self.labels: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self.label_keys: dict[str, np.ndarray] = {}
+        for feature in columns:
+            if feature in numeric_features:
+                continue
+            codes, labels = factorize_labels(columns[feature])
+            lowered = np.append(pd.Index(labels, dtype=object).str.lower().to_numpy(dtype=object), np.nan)
+            self.labels[feature] = (codes, labels)
+            self.label_keys[feature] = lowered[codes]
+            self.conversions += 1
+        self.customer_ids = None if header.customer_id_position is None else raw_df.iloc[:, header.customer_id_position]
+
+
+def factorize_labels(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Per-row codes into the distinct stripped text labels; missing values get code -1.
+
+    Stripping runs on the distinct raw values, and values equal once stripped share a code.
+    """
+    codes, uniques = pd.factorize(values)
+    stripped = pd.Index(uniques, dtype=object).astype(str).str.strip()
+    merged_codes, labels = pd.factorize(stripped)
+    codes = np.where(codes >= 0, merged_codes[codes] if len(merged_codes) else -1, -1)
+    return codes, np.asarray(labels, dtype=object)
+
+
+class BatchFrameStats:
+    """Per-request copy and conversion counters for ``/predict-csv``.
+
+    The floor per chunk is one copy (the typed ``BatchFrame.features``) and one
+    conversion per column that needs parsing or label normalization. The top-risk rows
+    and the insight sample outlive their chunk, so they are kept as bounded extracts
+    (at most a few hundred rows) and counted separately as ``bounded_copies``.
+    """
+
+    _COUNTERS = ("chunks", "rows", "copies", "bounded_copies", "conversions")
+    _FLOOR = {
+        "copies_per_chunk": 1,
+        "conversions_per_chunk": "one per column that needs parsing or label normalization",
+        "bounded_copies": "top-risk rows and insight-sample rows kept after their chunk is released",
+    }
+
+    def __init__(self) -> None:
+        self._totals = {"requests": 0, **dict.fromkeys(self._COUNTERS, 0)}
+        self._last_request: dict[str, int] | None = None
+        self._lock = threading.Lock()
+
+    def record(self, counts: dict[str, int]) -> None:
+        with self._lock:
+            self._totals["requests"] += 1
+            for name in self._COUNTERS:
+                self._totals[name] += counts[name]
+            self._last_request = dict(counts)
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            requests = self._totals["requests"]
+            return {
+                **self._totals,
+                "copies_per_request": self._totals["copies"] / requests if requests else 0.0,
+                "conversions_per_request": self._totals["conversions"] / requests if requests else 0.0,
+                "last_request": self._last_request,
+                "floor": dict(self._FLOOR),
+            }
+
+
+BATCH_FRAME_STATS = BatchFrameStats()
+
+
+def _parse_numeric(values: pd.Series) -> pd.Series:
+    # Same parsing as the training loader: thousands separators and padding are tolerated.
+    text = values.astype(str).str.replace(",", "", regex=False).str.strip()
+    return pd.to_numeric(text, errors="coerce")
+
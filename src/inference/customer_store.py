@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customer_scores (
+    customer_id TEXT PRIMARY KEY,
+    churn_probability REAL NOT NULL,
+    risk_level TEXT NOT NULL,
+    top_drivers TEXT NOT NULL,
+    model TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    scored_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_customer_scores_probability ON customer_scores (churn_probability DESC);
+"""
+
+_UPSERT = """
+INSERT INTO customer_scores (customer_id, churn_probability, risk_level, top_drivers, model, model_version, scored_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (customer_id) DO UPDATE SET
+    churn_probability = excluded.churn_probability,
+    risk_level = excluded.risk_level,
+    top_drivers = excluded.top_drivers,
+    model = excluded.model,
+    model_version = excluded.model_version,
+    scored_at = excluded.scored_at
+"""
+
+_COLUMNS = ("customer_id", "churn_probability", "risk_level", "top_drivers", "model", "model_version", "scored_at")
+
+
+class CustomerScoreStore:
+    """Embedded SQLite table holding the latest batch score of every known CustomerID.
+
+    Lookups go through the primary-key index and top-k queries walk the probability
+    index, so neither touches the model.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = Path(db_path)
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def upsert(
+        self,
+        customer_ids,
+        probabilities: np.ndarray,
+        risk_levels: np.ndarray,
+        top_drivers: np.ndarray,
+        models: np.ndarray,
+        model_versions: np.ndarray,
+    ) -> int:
+        """Insert or replace one row per customer; rows without a CustomerID are skipped."""
+        scored_at = time.time()
+        rows = [
+            (key, float(probability), str(risk_level), json.dumps(drivers), str(model), str(version), scored_at)
+            for key, probability, risk_level, drivers, model, version in zip(
+                map(normalize_customer_id, customer_ids), probabilities, risk_levels, top_drivers, models, model_versions
+            )
+            if key is not None
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def get(self, customer_id: str) -> dict[str, Any] | None:
+        key = normalize_customer_id(customer_id)
+        if key is None:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM customer_scores WHERE customer_id = ?",
+                (key,),
+            ).fetchone()
+        return None if row is None else _row_to_record(row)
+
+    def top_k(self, k: int, risk_level: str | None = None) -> list[dict[str, Any]]:
+        query = f"SELECT {', '.join(_COLUMNS)} FROM customer_scores"
+        params: tuple = ()
+        if risk_level is not None:
+            query += " WHERE risk_level = ?"
+            params = (risk_level,)
+        query += " ORDER BY churn_probability DESC LIMIT ?"
+
+        with self._lock:
+            rows = self._connect().execute(query, (*params, int(k))).fetchall()
+        return [_row_to_record(row) for row in rows]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            connection = self._connect()
+            customers = connection.execute("SELECT COUNT(*) FROM customer_scores").fetchone()[0]
+            by_level = dict(connection.execute("SELECT risk_level, COUNT(*) FROM customer_scores GROUP BY risk_level"))
+        return {"path": str(self.db_path), "customers": int(customers), "by_risk_level": by_level}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+
+def normalize_customer_id(customer_id: Any) -> str | None:
+    """Text key a CustomerID is stored and looked up under; None when it is missing or blank.
+
+    pandas reads a numeric ID column as int64, or as float64 once a value is missing, so an
+    integral float is keyed as its integer: 1001, 1001.0 and " 1001 " all become "1001".
+    """
+    if customer_id is None:
+        return None
+    if isinstance(customer_id, (float, np.floating)):
+        if customer_id != customer_id:
+            return None
+        if float(customer_id).is_integer():
+            customer_id = int(customer_id)
+    key = str(customer_id).strip()
+    return key or None
+
+
+def _row_to_record(row: tuple) -> dict[str, Any]:
+    record = dict(zip(_COLUMNS, row))
+    record["top_drivers"] = json.loads(record["top_drivers"])
+    return record
@@ -1,16 +1,39 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import logging
+import threading
+import weakref
 from typing import Any
 
 import numpy as np
 import pandas as pd
 
+from src.inference.explanation_budget import EXPLANATION_STATS, ExplanationOverloadedError, run_with_deadline
+from src.utils.config import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
 MONTHLY_CHARGES_HIGH_THRESHOLD = 70.0
-MEDIUM_RISK_THRESHOLD = 0.40
-HIGH_RISK_THRESHOLD = 0.70
 _BATCH_SHAP_MAX_ROWS = 300
 _BATCH_SHAP_BACKGROUND_ROWS = 80
+_BATCH_LINEAR_MAX_ROWS = 50_000
+# Rows per SHAP call in the batch path; the deadline is checked between calls.
+_BATCH_SHAP_CHUNK_ROWS_TREE = 100
+_BATCH_SHAP_CHUNK_ROWS_KERNEL = 10
+# Tree explainers only depend on the fitted classifier, so one is built per model and reused.
+_TREE_EXPLAINERS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# Transformed-column -> business-feature groups, built once per fitted preprocessor.
+_FEATURE_GROUPS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_RISK_FLAG_FEATURES = ("Contract", "Tenure", "MonthlyCharges", "PaymentMethod", "TotalCharges")
+
+# Ordered like the rules in build_recommendations; bit i of a recommendation mask selects entry i.
+_RECOMMENDATION_RULES = (
+    "Proposer une offre avec engagement 12 ou 24 mois incluant une remise.",
+    "Mettre en place une stratégie de fidélisation personnalisée.",
+    "Encourager l'adoption de moyens de paiement automatiques (prélèvement, carte bancaire).",
+    "Réévaluer la politique tarifaire et proposer une offre groupée adaptée.",
+)
+_DEFAULT_RECOMMENDATION = "Maintenir un suivi proactif de la rétention avec des actions personnalisées."
 
 
 class ShapDependencyError(RuntimeError):
@@ -21,10 +44,14 @@ class ShapComputationError(RuntimeError):
     """Raised when SHAP explanation cannot be computed."""
 
 
+class _ExplanationCancelled(Exception):
+    """Raised from inside a model call once the explanation's deadline has passed."""
+
+
 def get_risk_level(probability: float) -> str:
-    if probability < 0.40:
+    if probability < MEDIUM_RISK_THRESHOLD:
         return "LOW"
-    if probability < 0.70:
+    if probability < HIGH_RISK_THRESHOLD:
         return "MEDIUM"
     return "HIGH"
 
@@ -58,80 +85,248 @@ def build_recommendations(client_features: dict[str, Any]) -> list[str]:
         monthly_charges_value = 0.0
 
     if contract_value == "month-to-month":
-        add_unique("Proposer une offre avec engagement 12 ou 24 mois incluant une remise.")
+        add_unique(_RECOMMENDATION_RULES[0])
     if tenure_value < 12:
-        add_unique("Mettre en place une stratégie de fidélisation personnalisée.")
+        add_unique(_RECOMMENDATION_RULES[1])
     if payment_method_value == "electronic check":
-        add_unique("Encourager l'adoption de moyens de paiement automatiques (prélèvement, carte bancaire).")
+        add_unique(_RECOMMENDATION_RULES[2])
     if monthly_charges_value >= MONTHLY_CHARGES_HIGH_THRESHOLD:
-        add_unique("Réévaluer la politique tarifaire et proposer une offre groupée adaptée.")
+        add_unique(_RECOMMENDATION_RULES[3])
 
     if not recommendations:
-        add_unique("Maintenir un suivi proactif de la rétention avec des actions personnalisées.")
+        add_unique(_DEFAULT_RECOMMENDATION)
 
     return recommendations
 
 
+def compute_recommendation_masks(features_df: pd.DataFrame, label_keys: dict[str, np.ndarray] | None = None) -> np.ndarray:
+    """Columnar version of ``build_recommendations``: bit ``i`` is set when rule ``i`` fires.
+
+    A mask of 0 means only the default follow-up recommendation applies. ``label_keys``
+    (see ``BatchFrame``) supplies the already normalized text columns.
+    """
+    n_rows = len(features_df)
+    contract = _normalized_text_column(features_df, "Contract", n_rows, label_keys)
+    payment_method = _normalized_text_column(features_df, "PaymentMethod", n_rows, label_keys)
+    tenure = _float_column_like_builtin(features_df, "Tenure", n_rows)
+    monthly_charges = _float_column_like_builtin(features_df, "MonthlyCharges", n_rows)
+
+    rule_hits = (
+        contract == "month-to-month",
+        tenure < 12,
+        payment_method == "electronic check",
+        monthly_charges >= MONTHLY_CHARGES_HIGH_THRESHOLD,
+    )
+    masks = np.zeros(n_rows, dtype=np.uint8)
+    for bit, hits in enumerate(rule_hits):
+        masks |= hits.astype(np.uint8) << bit
+    return masks
+
+
+def build_batch_recommendations(features_df: pd.DataFrame, label_keys: dict[str, np.ndarray] | None = None) -> np.ndarray:
+    """Per-row recommendation lists, identical to ``build_recommendations`` on each row."""
+    return _RECOMMENDATIONS_BY_MASK[compute_recommendation_masks(features_df, label_keys)]
+
+
 def build_batch_consulting_insights(
     model,
     features_df: pd.DataFrame,
     probabilities: np.ndarray,
     required_features: list[str],
 ) -> dict[str, Any]:
-    probs = np.asarray(probabilities, dtype=float)
-    n_rows = int(len(probs))
-    if n_rows == 0:
+    accumulator = BatchInsightAccumulator(model=model, required_features=required_features)
+    accumulator.update(features_df, probabilities)
+    return accumulator.finalize()
+
+
+class BatchInsightAccumulator:
+    """Single-pass batch insights over scored chunks.
+
+    Segment counts and heuristic driver ratios are kept as running counts and the
+    rows explained for the global drivers are a reservoir sample, so an upload can
+    be consumed chunk by chunk without materializing the full frame.
+    """
+
+    def __init__(
+        self,
+        model,
+        required_features: list[str],
+        sample_size: int | None = None,
+        random_state: int = 42,
+        explanation_timeout_seconds: float | None = None,
+    ) -> None:
+        self.model = model
+        self.required_features = list(required_features)
+        self.explanation_timeout_seconds = explanation_timeout_seconds
+        if sample_size is None:
+            classifier = model.named_steps.get("classifier") if hasattr(model, "named_steps") else None
+            is_linear = classifier is not None and _is_linear_model(classifier)
+            sample_size = _BATCH_LINEAR_MAX_ROWS if is_linear else _BATCH_SHAP_MAX_ROWS
+        self.sample_size = int(sample_size)
+        self.n_rows = 0
+
+        self._rng = np.random.default_rng(random_state)
+        self._sample: pd.DataFrame | None = None
+        # Frames built from chunk rows for the bounded sample, reported with the batch copy counters.
+        self.sample_copies = 0
+        self._probability_sum = 0.0
+        self._segment_counts = {"high": 0, "medium": 0, "low": 0}
+        self._flag_counts_all = dict.fromkeys(_RISK_FLAG_FEATURES, 0)
+        self._flag_counts_high = dict.fromkeys(_RISK_FLAG_FEATURES, 0)
+
+    def update(
+        self,
+        features_df: pd.DataFrame,
+        probabilities: np.ndarray,
+        label_keys: dict[str, np.ndarray] | None = None,
+    ) -> None:
+        probs = np.asarray(probabilities, dtype=float)
+        if len(probs) == 0:
+            return
+
+        high_mask = probs >= HIGH_RISK_THRESHOLD
+        medium_mask = (probs >= MEDIUM_RISK_THRESHOLD) & (probs < HIGH_RISK_THRESHOLD)
+        low_mask = probs < MEDIUM_RISK_THRESHOLD
+
+        self._probability_sum += float(probs.sum())
+        self._segment_counts["high"] += int(high_mask.sum())
+        self._segment_counts["medium"] += int(medium_mask.sum())
+        self._segment_counts["low"] += int(low_mask.sum())
+
+        for feature, flag_mask in _compute_risk_flags(features_df, label_keys).items():
+            self._flag_counts_all[feature] += int(flag_mask.sum())
+            self._flag_counts_high[feature] += int(flag_mask[high_mask].sum())
+
+        self._update_sample(features_df)
+        self.n_rows += int(len(probs))
+
+    def export_state(self) -> tuple[dict[str, Any], pd.DataFrame | None]:
+        """Running counts (JSON-serializable) and the row sample, for ``merge_state`` in another process."""
+        counts = {
+            "n_rows": self.n_rows,
+            "probability_sum": self._probability_sum,
+            "segment_counts": dict(self._segment_counts),
+            "flag_counts_all": dict(self._flag_counts_all),
+            "flag_counts_high": dict(self._flag_counts_high),
+        }
+        return counts, self._sample
+
+    def merge_state(self, counts: dict[str, Any], sample: pd.DataFrame | None) -> None:
+        """Fold in the state of an accumulator that saw other rows, as if this one had seen them too.
+
+        Both samples are uniform over their own rows, so drawing how many rows each keeps
+        from a hypergeometric law gives a uniform sample of the union.
+        """
+        other_rows = int(counts["n_rows"])
+        if other_rows == 0:
+            return
+
+        self._probability_sum += float(counts["probability_sum"])
+        for name in self._segment_counts:
+            self._segment_counts[name] += int(counts["segment_counts"][name])
+        for feature in _RISK_FLAG_FEATURES:
+            self._flag_counts_all[feature] += int(counts["flag_counts_all"][feature])
+            self._flag_counts_high[feature] += int(counts["flag_counts_high"][feature])
+
+        if self.sample_size > 0 and sample is not None:
+            own_sample = self._sample if self._sample is not None else sample.iloc[:0]
+            target = min(self.sample_size, self.n_rows + other_rows)
+            kept_own = int(self._rng.hypergeometric(self.n_rows, other_rows, target))
+            own_positions = self._rng.choice(len(own_sample), size=kept_own, replace=False)
+            other_positions = self._rng.choice(len(sample), size=target - kept_own, replace=False)
+            self._sample = pd.concat([own_sample.iloc[np.sort(own_positions)], sample.iloc[np.sort(other_positions)]])
+
+        self.n_rows += other_rows
+
+    def finalize(self) -> dict[str, Any]:
+        if self.n_rows == 0:
+            return {
+                "n_rows": 0,
+                "probability_mean": 0.0,
+                "high_risk_count": 0,
+                "high_risk_rate": 0.0,
+                "risk_level_global": "FAIBLE",
+                "segments": {
+                    "high": {"count": 0, "rate": 0.0},
+                    "medium": {"count": 0, "rate": 0.0},
+                    "low": {"count": 0, "rate": 0.0},
+                },
+                "global_top_drivers": [],
+                "global_drivers_explanation": _explanation_status("heuristic", reason="empty"),
+                "recommendations": [],
+            }
+
+        segments = {
+            name: {"count": count, "rate": count / self.n_rows}
+            for name, count in self._segment_counts.items()
+        }
+        high_count = segments["high"]["count"]
+        high_rate = segments["high"]["rate"]
+        flag_ratios = _risk_flag_ratios(
+            flag_counts_high=self._flag_counts_high,
+            high_count=high_count,
+            flag_counts_all=self._flag_counts_all,
+            n_rows=self.n_rows,
+        )
+
+        global_top_drivers: list[dict[str, Any]] = []
+        drivers_explanation = _explanation_status("heuristic", reason="sampling_disabled")
+        if self._sample is not None:
+            global_top_drivers, drivers_explanation = _compute_batch_shap_drivers(
+                model=self.model,
+                features_df=self._sample,
+                required_features=self.required_features,
+                timeout_seconds=self.explanation_timeout_seconds,
+            )
+        if not global_top_drivers:
+            global_top_drivers = _heuristic_drivers_from_ratios(flag_ratios)
+
         return {
-            "n_rows": 0,
-            "probability_mean": 0.0,
-            "high_risk_count": 0,
-            "high_risk_rate": 0.0,
-            "risk_level_global": "FAIBLE",
-            "segments": {
-                "high": {"count": 0, "rate": 0.0},
-                "medium": {"count": 0, "rate": 0.0},
-                "low": {"count": 0, "rate": 0.0},
-            },
-            "global_top_drivers": [],
-            "recommendations": [],
+            "n_rows": self.n_rows,
+            "probability_mean": self._probability_sum / self.n_rows,
+            "high_risk_count": high_count,
+            "high_risk_rate": high_rate,
+            "risk_level_global": get_global_risk_level(high_rate),
+            "segments": segments,
+            "global_top_drivers": global_top_drivers,
+            "global_drivers_explanation": drivers_explanation,
+            "recommendations": _build_global_recommendations(flag_ratios),
         }
 
-    high_mask = probs >= HIGH_RISK_THRESHOLD
-    medium_mask = (probs >= MEDIUM_RISK_THRESHOLD) & (probs < HIGH_RISK_THRESHOLD)
-    low_mask = probs < MEDIUM_RISK_THRESHOLD
+    def _update_sample(self, features_df: pd.DataFrame) -> None:
+        # Vectorized Algorithm R: row i (0-based, across chunks) replaces a uniform slot in [0, i].
+        if self.sample_size <= 0:
+            return
 
-    high_count = int(high_mask.sum())
-    high_rate = float(high_mask.mean())
+        n_chunk = len(features_df)
+        sample = self._sample
+        filled = 0 if sample is None else len(sample)
+        n_fill = min(max(self.sample_size - filled, 0), n_chunk)
 
-    segments = {
-        "high": {"count": high_count, "rate": high_rate},
-        "medium": {"count": int(medium_mask.sum()), "rate": float(medium_mask.mean())},
-        "low": {"count": int(low_mask.sum()), "rate": float(low_mask.mean())},
-    }
+        if n_fill:
+            head = features_df.iloc[:n_fill]
+            sample = head.copy() if sample is None else pd.concat([sample, head])
+            self.sample_copies += 1
 
-    global_top_drivers = _build_global_top_drivers(
-        model=model,
-        features_df=features_df,
-        probabilities=probs,
-        required_features=required_features,
-    )
+        if n_fill < n_chunk:
+            positions = self.n_rows + np.arange(n_fill, n_chunk)
+            slots = self._rng.integers(0, positions + 1)
+            keep = slots < self.sample_size
+            if keep.any():
+                replacements = features_df.iloc[n_fill:].iloc[keep]
+                order = np.arange(len(sample))
+                order[slots[keep]] = len(sample) + np.arange(len(replacements))
+                sample = pd.concat([sample, replacements]).iloc[order]
+                self.sample_copies += 1
 
-    return {
-        "n_rows": n_rows,
-        "probability_mean": float(probs.mean()),
-        "high_risk_count": high_count,
-        "high_risk_rate": high_rate,
-        "risk_level_global": get_global_risk_level(high_rate),
-        "segments": segments,
-        "global_top_drivers": global_top_drivers,
-        "recommendations": _build_global_recommendations(features_df, probs),
-    }
+        self._sample = sample
 
 
 def explain_client_prediction(
     model,
     client_features: dict[str, Any],
     required_features: list[str],
+    cancel_event: threading.Event | None = None,
 ) -> dict[str, Any]:
     client_df = pd.DataFrame([client_features], columns=required_features)
     probability = float(model.predict_proba(client_df)[0, 1])
@@ -145,30 +340,32 @@ def explain_client_prediction(
         raise ShapComputationError("Pipeline must expose 'preprocessor' and 'classifier' steps.")
 
     transformed_client = preprocessor.transform(client_df)
-    transformed_client_array = _to_dense_array(transformed_client)
-
-    try:
-        transformed_feature_names = list(preprocessor.get_feature_names_out(required_features))
-    except Exception:
-        transformed_feature_names = [f"feature_{idx}" for idx in range(transformed_client_array.shape[1])]
+    feature_groups = _get_feature_groups(preprocessor, required_features, transformed_client.shape[1])
 
     background_df = _build_background_df(client_features, required_features)
     transformed_background = preprocessor.transform(background_df)
-    transformed_background_array = _to_dense_array(transformed_background)
-
-    shap = _import_shap()
-    shap_output = _compute_shap_output(
-        shap=shap,
-        classifier=classifier,
-        transformed_client=transformed_client_array,
-        transformed_background=transformed_background_array,
-        transformed_feature_names=transformed_feature_names,
-    )
 
-    shap_row_values = _extract_positive_class_shap_values(shap_output)
+    if _is_linear_model(classifier):
+        shap_row_values = _compute_linear_attributions(
+            classifier=classifier,
+            transformed_rows=transformed_client,
+            transformed_background=transformed_background,
+        )[0]
+    else:
+        shap = _import_shap()
+        shap_output = _compute_shap_output(
+            shap=shap,
+            classifier=classifier,
+            transformed_client=_to_dense_array(transformed_client),
+            transformed_background=_to_dense_array(transformed_background),
+            transformed_feature_names=feature_groups.transformed_feature_names,
+            cancel_event=cancel_event,
+        )
+        shap_row_values = _extract_positive_class_shap_values(shap_output)
+
     aggregated_impacts = _aggregate_impacts_by_business_feature(
         shap_values=shap_row_values,
-        transformed_feature_names=transformed_feature_names,
+        feature_groups=feature_groups,
         required_features=required_features,
     )
 
@@ -193,76 +390,197 @@ def explain_client_prediction(
     }
 
 
-def _build_global_top_drivers(
+def explain_client_prediction_within_budget(
     model,
-    features_df: pd.DataFrame,
-    probabilities: np.ndarray,
+    client_features: dict[str, Any],
     required_features: list[str],
-) -> list[dict[str, Any]]:
-    shap_drivers = _compute_batch_shap_drivers(
-        model=model,
-        features_df=features_df,
-        required_features=required_features,
-    )
-    if shap_drivers:
-        return shap_drivers
-    return _compute_batch_heuristic_drivers(features_df, probabilities)
+    timeout_seconds: float | None,
+) -> dict[str, Any]:
+    """``explain_client_prediction`` under a deadline.
+
+    Past the deadline, or when the explanation workers are saturated, the risk-flag
+    attribution of the client is returned instead, with ``degraded`` set. SHAP errors
+    still propagate to the caller.
+    """
+    try:
+        finished, explanation = run_with_deadline(
+            _explain_client_prediction_task,
+            timeout_seconds,
+            model,
+            client_features,
+            required_features,
+        )
+    except ExplanationOverloadedError:
+        EXPLANATION_STATS.record("client", "fallback")
+        reason = "overloaded"
+    else:
+        if finished:
+            EXPLANATION_STATS.record("client", "completed")
+            return {**explanation, "degraded": False}
+        EXPLANATION_STATS.record("client", "timeout")
+        reason = "timeout"
+
+    return {
+        **_heuristic_client_explanation(model, client_features, required_features),
+        "degraded": True,
+        "degraded_reason": reason,
+    }
+
+
+def _explain_client_prediction_task(cancel_event, model, client_features, required_features) -> dict[str, Any]:
+    # Task signature expected by run_with_deadline: the cancel event comes first.
+    return explain_client_prediction(model, client_features, required_features, cancel_event=cancel_event)
+
+
+def _heuristic_client_explanation(
+    model,
+    client_features: dict[str, Any],
+    required_features: list[str],
+) -> dict[str, Any]:
+    client_df = pd.DataFrame([client_features], columns=required_features)
+    probability = float(model.predict_proba(client_df)[0, 1])
+    raised_flags = compute_row_risk_drivers(client_df)[0]
+    return {
+        "probability": round(probability, 4),
+        "churn": bool(probability >= 0.5),
+        "risk_level": get_risk_level(probability),
+        "top_drivers": [
+            {
+                "feature": feature,
+                "direction": "increases",
+                "shap_value": None,
+                "human_explanation": _human_explanation(feature, "increases", client_features),
+            }
+            for feature in raised_flags[:3]
+        ],
+        "recommendations": build_recommendations(client_features),
+    }
 
 
 def _compute_batch_shap_drivers(
     model,
     features_df: pd.DataFrame,
     required_features: list[str],
-) -> list[dict[str, Any]]:
+    timeout_seconds: float | None = None,
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Global drivers of a batch sample and how they were obtained.
+
+    An empty driver list means the caller should fall back to the heuristic drivers.
+    """
     if not hasattr(model, "named_steps"):
-        return []
+        return [], _record_batch_fallback("unsupported_model")
 
     preprocessor = model.named_steps.get("preprocessor")
     classifier = model.named_steps.get("classifier")
     if preprocessor is None or classifier is None:
-        return []
+        return [], _record_batch_fallback("unsupported_model")
+
+    is_linear = _is_linear_model(classifier)
 
+    # Linear attributions are closed-form, so the whole batch is explained instead of a sample.
     sample_df = features_df
-    if len(features_df) > _BATCH_SHAP_MAX_ROWS:
+    if not is_linear and len(features_df) > _BATCH_SHAP_MAX_ROWS:
         sample_df = features_df.sample(n=_BATCH_SHAP_MAX_ROWS, random_state=42)
 
-    transformed_sample = _to_dense_array(preprocessor.transform(sample_df))
-    if transformed_sample.size == 0:
-        return []
+    # Sparse preprocessor output stays sparse; only the SHAP path densifies, chunk by chunk.
+    transformed_sample = preprocessor.transform(sample_df)
+    if 0 in transformed_sample.shape:
+        return [], _record_batch_fallback("empty")
+
+    feature_groups = _get_feature_groups(preprocessor, required_features, transformed_sample.shape[1])
+    transformed_feature_names = feature_groups.transformed_feature_names
+
+    status = _explanation_status("linear", explained_rows=transformed_sample.shape[0])
+    if is_linear:
+        mean_abs_values = _mean_abs_linear_attributions(classifier, transformed_sample)
+        EXPLANATION_STATS.record("batch", "completed")
+    else:
+        completed_chunks: list[np.ndarray] = []
+        try:
+            shap = _import_shap()
+            finished, _ = run_with_deadline(
+                _explain_batch_in_chunks,
+                timeout_seconds,
+                shap,
+                classifier,
+                transformed_sample,
+                transformed_feature_names,
+                completed_chunks,
+            )
+        except ShapDependencyError as exc:
+            logger.warning("Batch SHAP unavailable, using heuristic drivers: %s", exc)
+            return [], _record_batch_fallback("shap_unavailable")
+        except ExplanationOverloadedError:
+            return [], _record_batch_fallback("overloaded")
+        except ShapComputationError as exc:
+            logger.warning("Batch SHAP failed, using heuristic drivers: %s", exc.__cause__ or exc)
+            return [], _record_batch_fallback("shap_failed")
+
+        # Chunks finished before the deadline still give an unbiased, smaller sample.
+        chunks = list(completed_chunks)
+        if not chunks:
+            EXPLANATION_STATS.record("batch", "timeout")
+            return [], _explanation_status("heuristic", reason="timeout")
+
+        shap_matrix = np.vstack(chunks)
+        if finished:
+            EXPLANATION_STATS.record("batch", "completed")
+            status = _explanation_status("shap", explained_rows=len(shap_matrix))
+        else:
+            EXPLANATION_STATS.record("batch", "timeout")
+            status = _explanation_status("shap_partial", reason="timeout", explained_rows=len(shap_matrix))
 
-    try:
-        transformed_feature_names = list(preprocessor.get_feature_names_out(required_features))
-    except Exception:
-        transformed_feature_names = [f"feature_{idx}" for idx in range(transformed_sample.shape[1])]
+        if shap_matrix.size == 0:
+            return [], _explanation_status("heuristic", reason="empty")
+        mean_abs_values = np.mean(np.abs(shap_matrix), axis=0)
+
+    return _format_global_drivers(feature_groups.reduce(mean_abs_values), limit=5), status
 
+
+def _explain_batch_in_chunks(
+    cancel_event,
+    shap,
+    classifier,
+    transformed_sample,
+    transformed_feature_names: list[str],
+    completed_chunks: list[np.ndarray],
+) -> None:
     try:
-        shap = _import_shap()
         if _is_tree_model(classifier):
-            explainer = shap.TreeExplainer(classifier, feature_names=transformed_feature_names)
-            shap_output = explainer(transformed_sample)
+            explainer = _get_tree_explainer(shap, classifier, transformed_feature_names)
+            chunk_rows = _BATCH_SHAP_CHUNK_ROWS_TREE
         else:
             background_rows = min(_BATCH_SHAP_BACKGROUND_ROWS, transformed_sample.shape[0])
-            background = transformed_sample[:background_rows]
             explainer = shap.Explainer(
-                classifier.predict_proba,
-                background,
+                _cancellable_predict(classifier.predict_proba, cancel_event),
+                _to_dense_array(transformed_sample[:background_rows]),
                 feature_names=transformed_feature_names,
             )
-            shap_output = explainer(transformed_sample)
-    except Exception:
-        return []
+            chunk_rows = _BATCH_SHAP_CHUNK_ROWS_KERNEL
+
+        for start in range(0, transformed_sample.shape[0], chunk_rows):
+            if cancel_event.is_set():
+                return
+            shap_output = explainer(_to_dense_array(transformed_sample[start : start + chunk_rows]))
+            completed_chunks.append(_extract_positive_class_shap_matrix(shap_output))
+    except _ExplanationCancelled:
+        return
+    except Exception as exc:
+        raise ShapComputationError("Unable to compute batch SHAP values.") from exc
 
-    shap_matrix = _extract_positive_class_shap_matrix(shap_output)
-    if shap_matrix.size == 0:
-        return []
 
-    mean_abs_values = np.mean(np.abs(shap_matrix), axis=0)
-    aggregated: dict[str, float] = defaultdict(float)
-    for transformed_feature, mean_abs in zip(transformed_feature_names, mean_abs_values):
-        business_feature = _extract_business_feature_name(transformed_feature, required_features)
-        aggregated[business_feature] += float(mean_abs)
+def _explanation_status(method: str, reason: str | None = None, explained_rows: int = 0) -> dict[str, Any]:
+    return {
+        "method": method,
+        "degraded": reason is not None,
+        "reason": reason,
+        "explained_rows": int(explained_rows),
+    }
 
-    return _format_global_drivers(aggregated, limit=5)
+
+def _record_batch_fallback(reason: str) -> dict[str, Any]:
+    EXPLANATION_STATS.record("batch", "fallback")
+    return _explanation_status("heuristic", reason=reason)
 
 
 def _compute_batch_heuristic_drivers(
@@ -272,24 +590,119 @@ def _compute_batch_heuristic_drivers(
     if features_df.empty:
         return []
 
-    high_risk_df = features_df.loc[probabilities >= HIGH_RISK_THRESHOLD]
-    analysis_df = high_risk_df if not high_risk_df.empty else features_df
-    n_rows = max(1, len(analysis_df))
-
-    contract_series = analysis_df["Contract"].astype(str).str.lower()
-    payment_series = analysis_df["PaymentMethod"].astype(str).str.lower()
-    tenure_series = pd.to_numeric(analysis_df["Tenure"], errors="coerce").fillna(0.0)
-    monthly_series = pd.to_numeric(analysis_df["MonthlyCharges"], errors="coerce").fillna(0.0)
-
-    scores = {
-        "Contract": float((contract_series == "month-to-month").sum()) / n_rows,
-        "Tenure": float((tenure_series < 12).sum()) / n_rows,
-        "MonthlyCharges": float((monthly_series >= MONTHLY_CHARGES_HIGH_THRESHOLD).sum()) / n_rows,
-        "PaymentMethod": float((payment_series == "electronic check").sum()) / n_rows,
-        "TotalCharges": float((pd.to_numeric(analysis_df["TotalCharges"], errors="coerce").fillna(0.0) < 1000).sum())
-        / n_rows,
+    high_mask = np.asarray(probabilities, dtype=float) >= HIGH_RISK_THRESHOLD
+    flags = _compute_risk_flags(features_df)
+    flag_ratios = _risk_flag_ratios(
+        flag_counts_high={feature: int(mask[high_mask].sum()) for feature, mask in flags.items()},
+        high_count=int(high_mask.sum()),
+        flag_counts_all={feature: int(mask.sum()) for feature, mask in flags.items()},
+        n_rows=len(features_df),
+    )
+    return _heuristic_drivers_from_ratios(flag_ratios)
+
+
+def _build_recommendations_by_mask() -> np.ndarray:
+    table = np.empty(2 ** len(_RECOMMENDATION_RULES), dtype=object)
+    for mask in range(len(table)):
+        table[mask] = [rule for bit, rule in enumerate(_RECOMMENDATION_RULES) if mask >> bit & 1] or [
+            _DEFAULT_RECOMMENDATION
+        ]
+    return table
+
+
+_RECOMMENDATIONS_BY_MASK = _build_recommendations_by_mask()
+
+
+def _normalized_text_column(
+    features_df: pd.DataFrame,
+    column: str,
+    n_rows: int,
+    label_keys: dict[str, np.ndarray] | None = None,
+) -> np.ndarray:
+    if label_keys is not None and column in label_keys:
+        return label_keys[column]
+    if column not in features_df.columns:
+        return np.full(n_rows, "", dtype=object)
+    return features_df[column].astype(str).str.strip().str.lower().to_numpy()
+
+
+def _float_column_like_builtin(features_df: pd.DataFrame, column: str, n_rows: int) -> np.ndarray:
+    """Numeric column with ``float()`` semantics: unparsable cells and None become 0, NaN stays NaN."""
+    if column not in features_df.columns:
+        return np.zeros(n_rows, dtype=float)
+    values = features_df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+
+    numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, copy=True)
+    # Cells the vectorized parser rejects are rare; resolve them one by one exactly like float().
+    for position in np.flatnonzero(np.isnan(numeric)):
+        try:
+            numeric[position] = float(values.iat[position])
+        except (TypeError, ValueError):
+            numeric[position] = 0.0
+    return numeric
+
+
+def _compute_risk_flags(features_df: pd.DataFrame, label_keys: dict[str, np.ndarray] | None = None) -> dict[str, np.ndarray]:
+    """Per-row boolean risk signals shared by the heuristic drivers and the global recommendations."""
+    n_rows = len(features_df)
+    tenure_values = _numeric_column(features_df, "Tenure").fillna(0.0)
+    monthly_values = _numeric_column(features_df, "MonthlyCharges").fillna(0.0)
+    total_values = _numeric_column(features_df, "TotalCharges").fillna(0.0)
+    contract = _normalized_text_column(features_df, "Contract", n_rows, label_keys)
+    payment_method = _normalized_text_column(features_df, "PaymentMethod", n_rows, label_keys)
+
+    return {
+        "Contract": contract == "month-to-month",
+        "Tenure": (tenure_values < 12).to_numpy(),
+        "MonthlyCharges": (monthly_values >= MONTHLY_CHARGES_HIGH_THRESHOLD).to_numpy(),
+        "PaymentMethod": payment_method == "electronic check",
+        "TotalCharges": (total_values < 1000).to_numpy(),
     }
 
+
+def _numeric_column(features_df: pd.DataFrame, column: str) -> pd.Series:
+    # Typed frames (BatchFrame, validated requests) are read as is; anything else is parsed here.
+    values = features_df[column]
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    return pd.to_numeric(values, errors="coerce")
+
+
+def compute_row_risk_drivers(features_df: pd.DataFrame, label_keys: dict[str, np.ndarray] | None = None) -> np.ndarray:
+    """Per-row list of raised risk flags, ordered like ``_RISK_FLAG_FEATURES``.
+
+    Rows are encoded as a bitmask over the flags, so only the 2**n distinct lists are built.
+    """
+    flags = _compute_risk_flags(features_df, label_keys)
+    masks = np.zeros(len(features_df), dtype=np.int64)
+    for bit, feature in enumerate(_RISK_FLAG_FEATURES):
+        masks |= flags[feature].astype(np.int64) << bit
+
+    combinations = np.empty(2 ** len(_RISK_FLAG_FEATURES), dtype=object)
+    for mask in range(len(combinations)):
+        combinations[mask] = [feature for bit, feature in enumerate(_RISK_FLAG_FEATURES) if mask >> bit & 1]
+    return combinations[masks]
+
+
+def _risk_flag_ratios(
+    flag_counts_high: dict[str, int],
+    high_count: int,
+    flag_counts_all: dict[str, int],
+    n_rows: int,
+) -> dict[str, float]:
+    # Ratios are taken over the high-risk rows, or over every row when none is high risk.
+    if high_count > 0:
+        return {feature: count / high_count for feature, count in flag_counts_high.items()}
+    return {feature: count / max(1, n_rows) for feature, count in flag_counts_all.items()}
+
+
+def _heuristic_drivers_from_ratios(flag_ratios: dict[str, float]) -> list[dict[str, Any]]:
+    scores = {feature: float(flag_ratios[feature]) for feature in _RISK_FLAG_FEATURES}
+
     if max(scores.values(), default=0.0) <= 0.0:
         scores = {
             "Contract": 0.25,
@@ -321,7 +734,7 @@ def _format_global_drivers(importance_by_feature: dict[str, float], limit: int)
     ]
 
 
-def _build_global_recommendations(features_df: pd.DataFrame, probabilities: np.ndarray) -> list[str]:
+def _build_global_recommendations(flag_ratios: dict[str, float]) -> list[str]:
     recommendations: list[str] = []
 
     def add_unique(message: str) -> None:
@@ -330,29 +743,13 @@ def _build_global_recommendations(features_df: pd.DataFrame, probabilities: np.n
 
     add_unique("Prioriser les clients à risque élevé avec une offre de rétention immédiate")
 
-    high_risk_df = features_df.loc[probabilities >= HIGH_RISK_THRESHOLD]
-    analysis_df = high_risk_df if not high_risk_df.empty else features_df
-    n_rows = max(1, len(analysis_df))
-
-    contract_ratio = (
-        float((analysis_df["Contract"].astype(str).str.lower() == "month-to-month").sum()) / n_rows
-    )
-    tenure_ratio = float((pd.to_numeric(analysis_df["Tenure"], errors="coerce").fillna(0.0) < 12).sum()) / n_rows
-    payment_ratio = (
-        float((analysis_df["PaymentMethod"].astype(str).str.lower() == "electronic check").sum()) / n_rows
-    )
-    pricing_ratio = (
-        float((pd.to_numeric(analysis_df["MonthlyCharges"], errors="coerce").fillna(0.0) >= MONTHLY_CHARGES_HIGH_THRESHOLD).sum())
-        / n_rows
-    )
-
-    if contract_ratio >= 0.10:
+    if flag_ratios["Contract"] >= 0.10:
         add_unique("Proposer un engagement 12/24 mois avec remise pour réduire le churn des contrats mensuels")
-    if tenure_ratio >= 0.10:
+    if flag_ratios["Tenure"] >= 0.10:
         add_unique("Mettre en place une stratégie de fidélisation pour les clients récents (< 12 mois)")
-    if payment_ratio >= 0.10:
+    if flag_ratios["PaymentMethod"] >= 0.10:
         add_unique("Encourager les moyens de paiement automatiques (prélèvement/carte) via une incitation")
-    if pricing_ratio >= 0.10:
+    if flag_ratios["MonthlyCharges"] >= 0.10:
         add_unique("Proposer une offre groupée ou ajustement tarifaire pour réduire la sensibilité au prix")
 
     if len(recommendations) == 1:
@@ -374,6 +771,14 @@ def _driver_interpretation(feature: str) -> str:
     return mapping.get(feature, f"Le facteur {feature} présente une contribution notable au risque de résiliation")
 
 
+def _get_tree_explainer(shap, classifier, transformed_feature_names: list[str]):
+    explainer = _TREE_EXPLAINERS.get(classifier)
+    if explainer is None:
+        explainer = shap.TreeExplainer(classifier, feature_names=transformed_feature_names)
+        _TREE_EXPLAINERS[classifier] = explainer
+    return explainer
+
+
 def _import_shap():
     try:
         import shap  # type: ignore
@@ -449,7 +854,54 @@ def _build_background_df(client_features: dict[str, Any], required_features: lis
 
 def _is_tree_model(classifier) -> bool:
     class_name = classifier.__class__.__name__.lower()
-    return any(token in class_name for token in ("tree", "forest", "xgb", "lgbm", "catboost"))
+    return any(token in class_name for token in ("tree", "forest", "boosting", "xgb", "lgbm", "catboost"))
+
+
+def _is_linear_model(classifier) -> bool:
+    coefficients = getattr(classifier, "coef_", None)
+    if coefficients is None or not hasattr(classifier, "intercept_"):
+        return False
+    return np.ndim(coefficients) == 2 and np.shape(coefficients)[0] == 1
+
+
+def _compute_linear_attributions(
+    classifier,
+    transformed_rows,
+    transformed_background,
+) -> np.ndarray:
+    """Exact log-odds attributions of a binary linear model: coef * (x - E[x]).
+
+    Both inputs may be sparse; the background mean is taken without densifying it.
+    """
+    coefficients = np.asarray(classifier.coef_, dtype=float).ravel()
+    background_mean = np.asarray(transformed_background.mean(axis=0), dtype=float).ravel()
+    return (_to_dense_array(transformed_rows).astype(float, copy=False) - background_mean) * coefficients
+
+
+def _mean_abs_linear_attributions(classifier, transformed_rows) -> np.ndarray:
+    """Column means of ``|coef * (x - E[x])|`` over the rows, with the rows as their own background.
+
+    A sparse matrix is reduced over its stored entries only: every implicit zero of
+    column j contributes the same ``|coef_j * E[x_j]|``, so the dense attribution
+    matrix is never built.
+    """
+    # scipy is only needed here, so it stays out of the API's import phase.
+    from scipy import sparse
+
+    if not sparse.issparse(transformed_rows):
+        return np.mean(np.abs(_compute_linear_attributions(classifier, transformed_rows, transformed_rows)), axis=0)
+
+    coefficients = np.asarray(classifier.coef_, dtype=float).ravel()
+    columns = sparse.csc_matrix(transformed_rows)
+    n_rows, n_columns = columns.shape
+    column_mean = np.asarray(columns.mean(axis=0), dtype=float).ravel()
+    stored_per_column = np.diff(columns.indptr)
+    stored_columns = np.repeat(np.arange(n_columns), stored_per_column)
+
+    stored_abs = np.abs((columns.data - column_mean[stored_columns]) * coefficients[stored_columns])
+    abs_sums = np.bincount(stored_columns, weights=stored_abs, minlength=n_columns)
+    abs_sums += (n_rows - stored_per_column) * np.abs(coefficients * column_mean)
+    return abs_sums / n_rows
 
 
 def _compute_shap_output(
@@ -458,24 +910,44 @@ def _compute_shap_output(
     transformed_client: np.ndarray,
     transformed_background: np.ndarray,
     transformed_feature_names: list[str],
+    cancel_event: threading.Event | None = None,
 ):
     try:
         if _is_tree_model(classifier):
-            explainer = shap.TreeExplainer(classifier, feature_names=transformed_feature_names)
+            explainer = _get_tree_explainer(shap, classifier, transformed_feature_names)
             return explainer(transformed_client)
 
         explainer = shap.Explainer(
-            classifier.predict_proba,
+            _cancellable_predict(classifier.predict_proba, cancel_event),
             transformed_background,
             feature_names=transformed_feature_names,
         )
         return explainer(transformed_client)
+    except _ExplanationCancelled:
+        raise
     except Exception as exc:
         raise ShapComputationError(
             "Unable to compute SHAP values. Ensure shap is installed and compatible."
         ) from exc
 
 
+def _cancellable_predict(predict, cancel_event: threading.Event | None):
+    """``predict`` with a deadline checkpoint before every call.
+
+    Model-agnostic explainers evaluate the model in batches, one call per batch, so a
+    timed out explanation stops at the next batch and frees its explanation worker.
+    """
+    if cancel_event is None:
+        return predict
+
+    def predict_until_cancelled(rows):
+        if cancel_event.is_set():
+            raise _ExplanationCancelled()
+        return predict(rows)
+
+    return predict_until_cancelled
+
+
 def _extract_positive_class_shap_matrix(shap_output) -> np.ndarray:
     values = getattr(shap_output, "values", shap_output)
 
@@ -507,16 +979,46 @@ def _extract_positive_class_shap_values(shap_output) -> np.ndarray:
 
 def _aggregate_impacts_by_business_feature(
     shap_values: np.ndarray,
-    transformed_feature_names: list[str],
+    feature_groups: _BusinessFeatureGroups,
     required_features: list[str],
 ) -> dict[str, float]:
     impacts: dict[str, float] = {feature: 0.0 for feature in required_features}
+    impacts.update(feature_groups.reduce(shap_values))
+    return impacts
 
-    for transformed_feature, shap_value in zip(transformed_feature_names, shap_values):
-        business_feature = _extract_business_feature_name(transformed_feature, required_features)
-        impacts[business_feature] = impacts.get(business_feature, 0.0) + float(shap_value)
 
-    return impacts
+class _BusinessFeatureGroups:
+    """Business feature of every transformed column, as an index array for one-pass reductions."""
+
+    def __init__(self, transformed_feature_names: list[str], required_features: list[str]) -> None:
+        self.transformed_feature_names = list(transformed_feature_names)
+        labels = [_extract_business_feature_name(name, required_features) for name in self.transformed_feature_names]
+        positions: dict[str, int] = {}
+        self.group_index = np.array([positions.setdefault(label, len(positions)) for label in labels], dtype=np.intp)
+        self.group_names = list(positions)
+
+    def reduce(self, values: np.ndarray) -> dict[str, float]:
+        """Sum of ``values`` (one per transformed column) per business feature, in first-seen order."""
+        sums = np.bincount(
+            self.group_index,
+            weights=np.asarray(values, dtype=float),
+            minlength=len(self.group_names),
+        )
+        return dict(zip(self.group_names, sums.tolist()))
+
+
+def _get_feature_groups(preprocessor, required_features: list[str], n_columns: int) -> _BusinessFeatureGroups:
+    groups_by_key = _FEATURE_GROUPS.setdefault(preprocessor, {})
+    key = (tuple(required_features), int(n_columns))
+    groups = groups_by_key.get(key)
+    if groups is None:
+        try:
+            transformed_feature_names = list(preprocessor.get_feature_names_out(required_features))
+        except Exception:
+            transformed_feature_names = [f"feature_{idx}" for idx in range(n_columns)]
+        groups = _BusinessFeatureGroups(transformed_feature_names, required_features)
+        groups_by_key[key] = groups
+    return groups
 
 
 def _extract_business_feature_name(transformed_feature: str, required_features: list[str]) -> str:
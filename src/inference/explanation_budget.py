@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+
+from src.utils.config import EXPLANATION_MAX_QUEUED, EXPLANATION_WORKERS
+
+_EXPLANATION_POOL = ThreadPoolExecutor(max_workers=EXPLANATION_WORKERS, thread_name_prefix="explanation")
+# One slot per running or waiting task; a task keeps its slot until it has really stopped.
+_EXPLANATION_SLOTS = threading.BoundedSemaphore(EXPLANATION_WORKERS + EXPLANATION_MAX_QUEUED)
+
+
+class ExplanationOverloadedError(RuntimeError):
+    """Raised when every explanation worker is busy and the wait queue is full."""
+
+
+def run_with_deadline(
+    task: Callable[..., Any],
+    timeout_seconds: float | None,
+    *args: Any,
+    **kwargs: Any,
+) -> tuple[bool, Any]:
+    """Run ``task(cancel_event, *args, **kwargs)`` on the explanation pool for at most ``timeout_seconds``.
+
+    Returns ``(finished, result)``. Threads cannot be killed, so on timeout the cancel
+    event is set and the task is expected to stop at its next checkpoint; whatever it
+    returns afterwards is discarded. Exceptions raised by the task propagate.
+
+    Raises ``ExplanationOverloadedError`` without queueing the task when the workers and
+    the wait queue are all taken, so a backlog never turns into requests that time out
+    before they start.
+    """
+    if not _EXPLANATION_SLOTS.acquire(blocking=False):
+        raise ExplanationOverloadedError("Every explanation worker is busy and the wait queue is full.")
+    cancel_event = threading.Event()
+    try:
+        future = _EXPLANATION_POOL.submit(task, cancel_event, *args, **kwargs)
+    except BaseException:
+        _EXPLANATION_SLOTS.release()
+        raise
+    future.add_done_callback(lambda _future: _EXPLANATION_SLOTS.release())
+    try:
+        return True, future.result(timeout=timeout_seconds)
+    except FutureTimeoutError:
+        cancel_event.set()
+        future.cancel()
+        return False, None
+
+
+class ExplanationStats:
+    """Outcome counters for explanation work, split by scope ("client" or "batch")."""
+
+    def __init__(self) -> None:
+        self._counts: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, scope: str, outcome: str) -> None:
+        """``outcome`` is one of "completed", "timeout" or "fallback"."""
+        with self._lock:
+            counts = self._counts.setdefault(scope, {"requests": 0, "completed": 0, "timeout": 0, "fallback": 0})
+            counts["requests"] += 1
+            counts[outcome] += 1
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                scope: {
+                    **counts,
+                    "timeout_rate": counts["timeout"] / counts["requests"],
+                    "degraded_rate": (counts["timeout"] + counts["fallback"]) / counts["requests"],
+                }
+                for scope, counts in self._counts.items()
+            }
+
+
+EXPLANATION_STATS = ExplanationStats()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import numpy as np
+
+_TREE_LEAF = -1
+_BLOCK_ROWS = 1024
+_COMPACT_EVERY_LEVELS = 8
+# Largest absolute difference from RandomForestClassifier.predict_proba accepted as parity. The leaves
+# reached are identical; only the summation of the per-tree distributions can round differently,
+# since sklearn adds them in whatever order its worker threads finish.
+PARITY_ATOL = 1e-12
+
+
+class FlatForest:
+    """A fitted random forest packed into contiguous node arrays.
+
+    Every tree's nodes are concatenated into shared ``feature``/``threshold``/``left``/
+    ``right`` arrays and each leaf stores its normalized class distribution, so a batch
+    is scored by walking all (row, tree) pairs one level at a time with array indexing
+    instead of dispatching to one sklearn estimator per tree. Probabilities match
+    sklearn's to within ``PARITY_ATOL``.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        missing_go_left: np.ndarray,
+        leaf_values: np.ndarray,
+        roots: np.ndarray,
+        classes: np.ndarray,
+        n_features: int,
+    ) -> None:
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_go_left = missing_go_left
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features = int(n_features)
+        self.is_leaf = left == _TREE_LEAF
+
+        # Traversal layout: children interleaved as [right, left] so one gather at 2*node + go_left
+        # moves a pair down a level, and leaves point to themselves so finished pairs stay put.
+        node_ids = np.arange(len(left), dtype=np.int32)
+        self._children = np.stack(
+            [np.where(self.is_leaf, node_ids, right), np.where(self.is_leaf, node_ids, left)], axis=1
+        ).ravel().astype(np.int32)
+        self._feature = feature.astype(np.int32)
+        self._roots = roots.astype(np.int32)
+        self._has_missing_rule = bool(missing_go_left[~self.is_leaf].any())
+
+    @classmethod
+    def from_estimator(cls, forest) -> FlatForest:
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+
+        def concat_children(attribute: str) -> np.ndarray:
+            parts = []
+            for tree, offset in zip(trees, offsets):
+                children = getattr(tree, attribute).astype(np.int64)
+                parts.append(np.where(children == _TREE_LEAF, _TREE_LEAF, children + offset))
+            return np.concatenate(parts)
+
+        left = concat_children("children_left")
+        # Leaves keep feature 0 so the level step can index X without a branch; their result is never used.
+        feature = np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(np.int64)
+        threshold = np.concatenate([tree.threshold for tree in trees])
+        missing_go_left = np.concatenate(
+            [
+                np.asarray(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool)
+                for tree in trees
+            ]
+        )
+
+        # Same normalization as DecisionTreeClassifier.predict_proba.
+        n_classes = len(forest.classes_)
+        values = np.concatenate([tree.value[:, 0, :n_classes] for tree in trees]).astype(float)
+        normalizer = values.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            left=left,
+            right=concat_children("children_right"),
+            missing_go_left=missing_go_left,
+            leaf_values=values / normalizer,
+            roots=offsets.astype(np.int64),
+            classes=np.asarray(forest.classes_),
+            n_features=forest.n_features_in_,
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict_proba(self, X) -> np.ndarray:
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        # sklearn trees compare float32 inputs against float64 thresholds; doing the same reaches the same leaves.
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected a 2D input with {self.n_features} features, got shape {X.shape}.")
+
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=float)
+        for start in range(0, X.shape[0], _BLOCK_ROWS):
+            proba[start : start + _BLOCK_ROWS] = self._predict_block(X[start : start + _BLOCK_ROWS])
+        return proba
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_trees = X.shape[0], self.n_trees
+        flat_X = X.ravel()
+        # One entry per (tree, row) pair, tree-major so a level's node lookups stay within one tree's
+        # slice of the arrays. row_offsets index the row's start in flat_X.
+        pair_index = np.arange(n_rows * n_trees)
+        row_offsets = np.tile(np.arange(n_rows, dtype=np.int64) * X.shape[1], n_trees)
+        nodes = np.repeat(self._roots, n_rows)
+        leaves = np.empty(n_rows * n_trees, dtype=np.int32)
+
+        level = 0
+        while pair_index.size:
+            values = flat_X[row_offsets + self._feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if self._has_missing_rule:
+                missing = np.isnan(values)
+                if missing.any():
+                    go_left[missing] = self.missing_go_left[nodes[missing]]
+            nodes = self._children[2 * nodes + go_left]
+
+            # Dropping finished pairs costs a few copies, so it is only done every few levels.
+            level += 1
+            if level % _COMPACT_EVERY_LEVELS == 0:
+                done = self.is_leaf[nodes]
+                if done.any():
+                    leaves[pair_index[done]] = nodes[done]
+                    active = ~done
+                    pair_index, row_offsets, nodes = pair_index[active], row_offsets[active], nodes[active]
+
+        leaf_values = self.leaf_values[leaves].reshape(n_trees, n_rows, -1)
+        # Accumulate tree by tree, like sklearn's forest, rather than with a pairwise sum.
+        totals = np.zeros((n_rows, leaf_values.shape[2]), dtype=float)
+        for tree_values in leaf_values:
+            totals += tree_values
+        return totals / n_trees
+
+
+def flatten_pipeline_forest(model) -> FlatForest | None:
+    """FlatForest for a pipeline whose classifier is a fitted RandomForestClassifier, else None."""
+    classifier = model.named_steps.get("classifier") if hasattr(model, "named_steps") else None
+    if classifier is None or type(classifier).__name__ != "RandomForestClassifier":
+        return None
+    if not hasattr(classifier, "estimators_") or getattr(classifier, "n_outputs_", 1) != 1:
+        return None
+    return FlatForest.from_estimator(classifier)
@@ -1,15 +1,39 @@
 ﻿from __future__ import annotations
 
-import joblib
+import hashlib
+import json
+from pathlib import Path
+
 import pandas as pd
 
 
 def load_model(model_path: str):
     """Load a persisted churn model pipeline."""
+    # joblib (and sklearn, pulled in by unpickling) is only imported once a model is needed.
+    import joblib
+
     print(f"[inference] Loading model from: {model_path}")
     return joblib.load(model_path)
 
 
+def compute_model_version(model_path: str) -> str:
+    """Return a short content hash identifying a persisted model artifact."""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as model_file:
+        for block in iter(lambda: model_file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def load_threshold_report(metrics_path: str) -> dict | None:
+    """Load the selected model's threshold analysis written by training, if any."""
+    path = Path(metrics_path)
+    if not path.exists():
+        return None
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return payload.get("threshold_analysis")
+
+
 def predict_churn_proba(model, client_dict: dict) -> tuple[float, str]:
     """Predict churn probability for a single client dict."""
     client_df = pd.DataFrame([client_dict])
@@ -0,0 +1,455 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.inference.flat_forest import PARITY_ATOL, FlatForest, flatten_pipeline_forest
+from src.inference.predictor import compute_model_version, load_model
+from src.models.cascade import escalation_mask
+from src.utils.config import FLAT_FOREST_MAX_ROWS, HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, SHADOW_MAX_QUEUED
+
+SERVING_MODES = ("single", "shadow", "ab", "cascade")
+_SCORE_HISTOGRAM_BINS = 10
+_MAX_LATENCY_SAMPLES = 2048
+
+
+class ModelRegistryError(RuntimeError):
+    """Raised when the model registry is missing or inconsistent."""
+
+
+def write_registry(
+    registry_path: str,
+    models: dict[str, Any],
+    primary: str,
+    metrics_by_model: dict[str, dict],
+    cascade: dict | None = None,
+) -> dict:
+    """Persist every trained model next to the registry file and index them in JSON."""
+    import joblib
+
+    path = Path(registry_path)
+    models_dir = path.parent / "registry"
+    models_dir.mkdir(parents=True, exist_ok=True)
+
+    entries = {}
+    for name, model in models.items():
+        model_path = models_dir / f"{name}.joblib"
+        joblib.dump(model, model_path)
+        entries[name] = {
+            "path": str(model_path.relative_to(path.parent)),
+            "version": compute_model_version(str(model_path)),
+            "roc_auc": metrics_by_model.get(name, {}).get("roc_auc"),
+        }
+
+    payload = {"primary": primary, "models": entries}
+    if cascade is not None:
+        payload["cascade"] = {
+            key: cascade[key] for key in ("cheap_model", "expensive_model", "thresholds", "band_width")
+        }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return payload
+
+
+def parse_traffic_split(value: str) -> dict[str, float]:
+    split: dict[str, float] = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        split[name.strip()] = float(weight or 1.0)
+    return split
+
+
+class ModelStats:
+    """Latency and score distribution of one served model."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.rows = 0
+        self.probability_sum = 0.0
+        self.high_risk_count = 0
+        self.histogram = np.zeros(_SCORE_HISTOGRAM_BINS, dtype=np.int64)
+        self.latencies_ms: deque[float] = deque(maxlen=_MAX_LATENCY_SAMPLES)
+        self.compared_rows = 0
+        self.abs_diff_sum = 0.0
+        self.risk_level_agreements = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency_seconds: float, probabilities: np.ndarray, reference: np.ndarray | None = None) -> None:
+        probs = np.asarray(probabilities, dtype=float)
+        bins = np.clip((probs * _SCORE_HISTOGRAM_BINS).astype(int), 0, _SCORE_HISTOGRAM_BINS - 1)
+        with self._lock:
+            self.calls += 1
+            self.rows += int(len(probs))
+            self.probability_sum += float(probs.sum())
+            self.high_risk_count += int((probs >= HIGH_RISK_THRESHOLD).sum())
+            self.histogram += np.bincount(bins, minlength=_SCORE_HISTOGRAM_BINS)
+            self.latencies_ms.append(latency_seconds * 1000.0)
+            if reference is not None:
+                self.compared_rows += int(len(probs))
+                self.abs_diff_sum += float(np.abs(probs - reference).sum())
+                self.risk_level_agreements += int((_risk_band(probs) == _risk_band(reference)).sum())
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = np.asarray(self.latencies_ms, dtype=float)
+            summary: dict[str, Any] = {
+                "calls": self.calls,
+                "rows": self.rows,
+                "mean_probability": self.probability_sum / self.rows if self.rows else 0.0,
+                "high_risk_rate": self.high_risk_count / self.rows if self.rows else 0.0,
+                "score_histogram": self.histogram.tolist(),
+            }
+            if latencies.size:
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                summary["latency_ms"] = {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+            if self.compared_rows:
+                summary["vs_primary"] = {
+                    "rows": self.compared_rows,
+                    "mean_abs_diff": self.abs_diff_sum / self.compared_rows,
+                    "risk_level_agreement": self.risk_level_agreements / self.compared_rows,
+                }
+            return summary
+
+
+class ModelRegistry:
+    """Serves one primary model plus optional shadow or A/B-routed challengers.
+
+    - ``single``: only the primary model scores.
+    - ``shadow``: the primary answers; shadow models score the same preprocessed matrix
+      on a background thread and only feed the comparison stats.
+    - ``ab``: rows are routed to a model by a stable hash of their CustomerID.
+    - ``cascade``: the cheap model scores every row; rows within the tuned band of a risk
+      threshold are rescored by the expensive model.
+    """
+
+    def __init__(
+        self,
+        models: dict[str, Any],
+        versions: dict[str, str],
+        primary: str,
+        mode: str = "single",
+        shadow_models: list[str] | None = None,
+        traffic_split: dict[str, float] | None = None,
+        cascade: dict | None = None,
+    ) -> None:
+        if mode not in SERVING_MODES:
+            raise ModelRegistryError(f"Unknown serving mode: {mode}. Expected one of {list(SERVING_MODES)}")
+        if primary not in models:
+            raise ModelRegistryError(f"Primary model '{primary}' is not registered.")
+
+        self.models = models
+        self.versions = versions
+        self.primary = primary
+        self.mode = mode
+        self.shadow_models: list[str] = []
+        if mode == "shadow":
+            candidates = shadow_models or list(models)
+            self.shadow_models = [name for name in candidates if name != primary]
+        self.traffic_split = {primary: 1.0}
+        if mode == "ab":
+            self.traffic_split = _normalize_split(traffic_split or {primary: 1.0}, models)
+        self.cascade: dict | None = None
+        if mode == "cascade":
+            if not cascade:
+                raise ModelRegistryError("Cascade mode needs a tuned cascade entry. Retrain: python -m src.main")
+            missing = [cascade[key] for key in ("cheap_model", "expensive_model") if cascade[key] not in models]
+            if missing:
+                raise ModelRegistryError(f"Cascade models are not registered: {missing}")
+            self.cascade = cascade
+        self.stats = {name: ModelStats() for name in models}
+        self._cascade_rows = 0
+        self._cascade_escalated = 0
+        self._cascade_lock = threading.Lock()
+
+        unknown = [name for name in self.shadow_models if name not in models]
+        if unknown:
+            raise ModelRegistryError(f"Unknown shadow models: {unknown}")
+
+        self.flat_forest_max_rows = FLAT_FOREST_MAX_ROWS
+        self._flat_forests: dict[str, FlatForest] = {}
+        if self.flat_forest_max_rows > 0:
+            for name, model in models.items():
+                flat_forest = flatten_pipeline_forest(model)
+                if flat_forest is not None:
+                    self._flat_forests[name] = flat_forest
+
+        # Whether a shadow model's fitted preprocessor matches the primary one; checked on first use.
+        self._shares_preprocessing: dict[str, bool | None] = {name: None for name in self.shadow_models}
+        self._shadow_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-scoring") if self.shadow_models else None
+        )
+        # One slot per batch being shadow-scored or waiting; the primary never waits for a slot.
+        self.shadow_max_queued = SHADOW_MAX_QUEUED
+        self._shadow_slots = threading.BoundedSemaphore(1 + self.shadow_max_queued)
+        self._shadow_dropped_batches = 0
+        self._shadow_dropped_rows = 0
+        self._shadow_lock = threading.Lock()
+
+    @classmethod
+    def from_registry_file(
+        cls,
+        registry_path: str,
+        mode: str = "single",
+        shadow_models: list[str] | None = None,
+        traffic_split: dict[str, float] | None = None,
+        loaded_models: dict[str, Any] | None = None,
+    ) -> ModelRegistry:
+        """Load the models the serving mode needs from the registry file.
+
+        ``loaded_models`` maps an artifact version to a model already in memory; entries
+        with that version reuse it instead of loading a second copy.
+        """
+        path = Path(registry_path)
+        if not path.exists():
+            raise ModelRegistryError(f"Model registry not found at {path}. Run training first: python -m src.main")
+
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        wanted = {payload["primary"], *(shadow_models or []), *(traffic_split or {})}
+        if mode == "shadow" and not shadow_models:
+            wanted.update(payload["models"])
+        cascade = payload.get("cascade")
+        if mode == "cascade" and cascade:
+            wanted.update([cascade["cheap_model"], cascade["expensive_model"]])
+
+        models, versions = {}, {}
+        for name in wanted:
+            entry = payload["models"].get(name)
+            if entry is None:
+                raise ModelRegistryError(f"Model '{name}' is not in the registry.")
+            loaded = (loaded_models or {}).get(entry["version"])
+            models[name] = loaded if loaded is not None else load_model(str(path.parent / entry["path"]))
+            versions[name] = entry["version"]
+
+        return cls(
+            models=models,
+            versions=versions,
+            primary=payload["primary"],
+            mode=mode,
+            shadow_models=shadow_models,
+            traffic_split=traffic_split,
+            cascade=cascade,
+        )
+
+    @property
+    def version(self) -> str:
+        if self.mode == "single":
+            return self.versions[self.primary]
+        if self.mode == "cascade":
+            cheap, expensive = self.cascade["cheap_model"], self.cascade["expensive_model"]
+            return (
+                f"cascade:{cheap}@{self.versions[cheap]}>{expensive}@{self.versions[expensive]}"
+                f":band={self.cascade['band_width']:.6g}"
+            )
+        served = self.traffic_split if self.mode == "ab" else {self.primary: 1.0}
+        return f"{self.mode}:" + ",".join(f"{name}@{self.versions[name]}={weight:g}" for name, weight in served.items())
+
+    def score(self, features_df: pd.DataFrame, routing_keys: pd.Series | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Return the served probability and the name of the model that produced it, per row."""
+        if self.mode == "ab":
+            return self._score_ab(features_df, routing_keys)
+        if self.mode == "cascade":
+            return self._score_cascade(features_df)
+
+        started = time.perf_counter()
+        primary_model = self.models[self.primary]
+        transformed = None
+        if self.shadow_models and hasattr(primary_model, "named_steps"):
+            transformed = primary_model.named_steps["preprocessor"].transform(features_df)
+            probabilities = self._classifier_proba(self.primary, transformed)
+        else:
+            probabilities = self._predict_proba(self.primary, features_df)
+        self.stats[self.primary].record(time.perf_counter() - started, probabilities)
+
+        if self._shadow_executor is not None:
+            self._submit_shadow_scoring(features_df, transformed, probabilities)
+
+        return probabilities, np.full(len(probabilities), self.primary, dtype=object)
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "primary": self.primary,
+            "version": self.version,
+            "shadow_models": self.shadow_models,
+            "shadow_queue": self._describe_shadow_queue(),
+            "traffic_split": self.traffic_split,
+            "flat_forest": {
+                "max_rows": self.flat_forest_max_rows,
+                "models": {
+                    name: {"trees": flat_forest.n_trees, "nodes": int(len(flat_forest.feature))}
+                    for name, flat_forest in self._flat_forests.items()
+                },
+            },
+            "models": {
+                name: {"version": self.versions.get(name), **self.stats[name].summary()} for name in self.models
+            },
+            "cascade": self._describe_cascade(),
+        }
+
+    def check_flat_forests(self, features_df: pd.DataFrame) -> dict[str, bool]:
+        """Compare each flattened forest with its sklearn model; mismatching ones are disabled."""
+        results = {}
+        for name, flat_forest in list(self._flat_forests.items()):
+            model = self.models[name]
+            expected = model.predict_proba(features_df)
+            actual = flat_forest.predict_proba(model.named_steps["preprocessor"].transform(features_df))
+            results[name] = bool(np.allclose(actual, expected, rtol=0.0, atol=PARITY_ATOL))
+            if not results[name]:
+                print(f"[registry] Flattened forest for '{name}' disagrees with sklearn; disabling it.")
+                del self._flat_forests[name]
+        return results
+
+    def close(self) -> None:
+        if self._shadow_executor is not None:
+            self._shadow_executor.shutdown(wait=True)
+
+    def _score_ab(self, features_df: pd.DataFrame, routing_keys: pd.Series | None) -> tuple[np.ndarray, np.ndarray]:
+        assigned = self._route(routing_keys, len(features_df))
+        probabilities = np.empty(len(features_df), dtype=float)
+        for name in self.traffic_split:
+            mask = assigned == name
+            if not mask.any():
+                continue
+            started = time.perf_counter()
+            probabilities[mask] = self._predict_proba(name, features_df.loc[mask])
+            self.stats[name].record(time.perf_counter() - started, probabilities[mask])
+        return probabilities, assigned
+
+    def _score_cascade(self, features_df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        cheap, expensive = self.cascade["cheap_model"], self.cascade["expensive_model"]
+        started = time.perf_counter()
+        probabilities = np.array(self._predict_proba(cheap, features_df), dtype=float)
+        self.stats[cheap].record(time.perf_counter() - started, probabilities)
+
+        served_by = np.full(len(probabilities), cheap, dtype=object)
+        escalate = escalation_mask(probabilities, self.cascade["band_width"], self.cascade["thresholds"])
+        if escalate.any():
+            started = time.perf_counter()
+            probabilities[escalate] = self._predict_proba(expensive, features_df.loc[escalate])
+            self.stats[expensive].record(time.perf_counter() - started, probabilities[escalate])
+            served_by[escalate] = expensive
+
+        with self._cascade_lock:
+            self._cascade_rows += int(len(probabilities))
+            self._cascade_escalated += int(escalate.sum())
+        return probabilities, served_by
+
+    def _describe_cascade(self) -> dict[str, Any] | None:
+        if self.cascade is None:
+            return None
+        with self._cascade_lock:
+            rows, escalated = self._cascade_rows, self._cascade_escalated
+        return {
+            **self.cascade,
+            "rows": rows,
+            "escalated_rows": escalated,
+            "escalation_rate": escalated / rows if rows else 0.0,
+        }
+
+    def _route(self, routing_keys: pd.Series | None, n_rows: int) -> np.ndarray:
+        assigned = np.full(n_rows, self.primary, dtype=object)
+        if routing_keys is None:
+            return assigned
+
+        keys = pd.Series(routing_keys).reset_index(drop=True)
+        has_key = keys.notna().to_numpy()
+        if not has_key.any():
+            return assigned
+
+        # hash_pandas_object uses a fixed hash key, so a customer lands in the same arm on every call.
+        hashed = pd.util.hash_pandas_object(keys[has_key].astype(str), index=False).to_numpy()
+        buckets = hashed / float(2**64)
+        names = list(self.traffic_split)
+        edges = np.cumsum([self.traffic_split[name] for name in names])
+        arm_index = np.minimum(np.searchsorted(edges, buckets, side="right"), len(names) - 1)
+        assigned[has_key] = np.asarray(names, dtype=object)[arm_index]
+        return assigned
+
+    def _submit_shadow_scoring(self, features_df: pd.DataFrame, transformed, probabilities: np.ndarray) -> None:
+        # A slower shadow model must not grow a backlog of retained frames, so excess batches are dropped.
+        if not self._shadow_slots.acquire(blocking=False):
+            with self._shadow_lock:
+                self._shadow_dropped_batches += 1
+                self._shadow_dropped_rows += int(len(features_df))
+            return
+        try:
+            future = self._shadow_executor.submit(self._score_shadows, features_df, transformed, probabilities)
+        except BaseException:
+            self._shadow_slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._shadow_slots.release())
+
+    def _describe_shadow_queue(self) -> dict[str, Any] | None:
+        if self._shadow_executor is None:
+            return None
+        with self._shadow_lock:
+            return {
+                "max_queued": self.shadow_max_queued,
+                "dropped_batches": self._shadow_dropped_batches,
+                "dropped_rows": self._shadow_dropped_rows,
+            }
+
+    def _score_shadows(self, features_df: pd.DataFrame, transformed, primary_probabilities: np.ndarray) -> None:
+        for name in self.shadow_models:
+            model = self.models[name]
+            try:
+                started = time.perf_counter()
+                if transformed is not None and self._can_share_preprocessing(name, features_df, transformed):
+                    probabilities = self._classifier_proba(name, transformed)
+                else:
+                    probabilities = self._predict_proba(name, features_df)
+                self.stats[name].record(time.perf_counter() - started, probabilities, reference=primary_probabilities)
+            except Exception as exc:
+                print(f"[registry] Shadow model '{name}' failed: {exc}")
+
+    def _predict_proba(self, name: str, features_df: pd.DataFrame) -> np.ndarray:
+        model = self.models[name]
+        if name in self._flat_forests and len(features_df) <= self.flat_forest_max_rows:
+            transformed = model.named_steps["preprocessor"].transform(features_df)
+            return self._flat_forests[name].predict_proba(transformed)[:, 1]
+        return model.predict_proba(features_df)[:, 1]
+
+    def _classifier_proba(self, name: str, transformed) -> np.ndarray:
+        if name in self._flat_forests and transformed.shape[0] <= self.flat_forest_max_rows:
+            return self._flat_forests[name].predict_proba(transformed)[:, 1]
+        return self.models[name].named_steps["classifier"].predict_proba(transformed)[:, 1]
+
+    def _can_share_preprocessing(self, name: str, features_df: pd.DataFrame, transformed) -> bool:
+        shares = self._shares_preprocessing.get(name)
+        if shares is None:
+            model = self.models[name]
+            shares = False
+            if hasattr(model, "named_steps"):
+                own = model.named_steps["preprocessor"].transform(features_df)
+                shares = own.shape == transformed.shape and np.allclose(_to_dense(own), _to_dense(transformed))
+            self._shares_preprocessing[name] = shares
+        return shares
+
+
+def _normalize_split(traffic_split: dict[str, float], models: dict[str, Any]) -> dict[str, float]:
+    unknown = [name for name in traffic_split if name not in models]
+    if unknown:
+        raise ModelRegistryError(f"Unknown models in traffic split: {unknown}")
+    total = sum(weight for weight in traffic_split.values() if weight > 0)
+    if total <= 0:
+        raise ModelRegistryError("Traffic split must contain at least one positive weight.")
+    return {name: weight / total for name, weight in traffic_split.items() if weight > 0}
+
+
+def _risk_band(probabilities: np.ndarray) -> np.ndarray:
+    return np.digitize(probabilities, [MEDIUM_RISK_THRESHOLD, HIGH_RISK_THRESHOLD])
+
+
+def _to_dense(values) -> np.ndarray:
+    if hasattr(values, "toarray"):
+        return values.toarray()
+    return np.asarray(values)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.inference.batch_frame import factorize_labels
+from src.utils.config import HIGH_RISK_THRESHOLD
+
+UNKNOWN_SEGMENT = "unknown"
+
+CATEGORICAL_DIMENSIONS = ("Gender", "Contract", "PaymentMethod")
+
+# Bucket edges are left-closed: [edge_i, edge_i+1).
+NUMERIC_BUCKETS: dict[str, tuple[str, list[float], list[str]]] = {
+    "AgeBand": ("Age", [0, 30, 45, 60, np.inf], ["<30", "30-44", "45-59", "60+"]),
+    "TenureBand": ("Tenure", [0, 12, 24, 48, np.inf], ["0-11", "12-23", "24-47", "48+"]),
+    "MonthlyChargesBand": ("MonthlyCharges", [0, 40, 70, np.inf], ["<40", "40-69", "70+"]),
+    "TotalChargesBand": ("TotalCharges", [0, 1000, 3000, np.inf], ["<1000", "1000-2999", "3000+"]),
+}
+
+CUBE_DIMENSIONS = [*CATEGORICAL_DIMENSIONS, *NUMERIC_BUCKETS]
+_MEASURES = ["count", "probability_sum", "high_risk_count"]
+_MAX_PENDING_PARTIALS = 16
+
+
+class SegmentCube:
+    """Aggregated cube of scored rows over every categorical value and numeric bucket.
+
+    Each cell holds the row count, the probability sum and the high-risk count, so any
+    group-by over a subset of dimensions is a sum over cells and never needs rescoring.
+    """
+
+    def __init__(self) -> None:
+        self.n_rows = 0
+        self._partials: list[pd.DataFrame] = []
+        self._cells: pd.DataFrame | None = None
+
+    @classmethod
+    def from_records(cls, records: list[dict[str, Any]], n_rows: int) -> SegmentCube:
+        cube = cls()
+        cube._cells = pd.DataFrame(records, columns=[*CUBE_DIMENSIONS, *_MEASURES])
+        cube._partials = [cube._cells]
+        cube.n_rows = int(n_rows)
+        return cube
+
+    def to_records(self) -> list[dict[str, Any]]:
+        return self.cells().to_dict(orient="records")
+
+    def update(
+        self,
+        features_df: pd.DataFrame,
+        probabilities: np.ndarray,
+        labels: dict[str, tuple[np.ndarray, np.ndarray]] | None = None,
+    ) -> None:
+        """Add scored rows; ``labels`` (see ``BatchFrame``) supplies the factorized categorical columns.
+
+        Rows are aggregated on integer dimension codes, so only the cells, never a per-row
+        frame of dimension values, are materialized.
+        """
+        probs = np.asarray(probabilities, dtype=float)
+        if len(probs) == 0:
+            return
+
+        dimensions = _dimension_codes(features_df, labels)
+        stacked_codes = np.column_stack([codes for codes, _ in dimensions])
+        cell_codes, cell_index = np.unique(stacked_codes, axis=0, return_inverse=True)
+        cell_index = cell_index.reshape(-1)
+        n_cells = len(cell_codes)
+
+        partial = {
+            # Code -1 picks the appended unknown label.
+            dimension: np.append(values, UNKNOWN_SEGMENT)[cell_codes[:, position]]
+            for position, (dimension, (_, values)) in enumerate(zip(CUBE_DIMENSIONS, dimensions))
+        }
+        partial["count"] = np.bincount(cell_index, minlength=n_cells)
+        partial["probability_sum"] = np.bincount(cell_index, weights=probs, minlength=n_cells)
+        high_risk = (probs >= HIGH_RISK_THRESHOLD).astype(float)
+        partial["high_risk_count"] = np.bincount(cell_index, weights=high_risk, minlength=n_cells).astype(int)
+
+        self._partials.append(pd.DataFrame(partial))
+        self._cells = None
+        self.n_rows += int(len(probs))
+
+        if len(self._partials) >= _MAX_PENDING_PARTIALS:
+            self._partials = [self.cells()]
+
+    def cells(self) -> pd.DataFrame:
+        if self._cells is None:
+            if not self._partials:
+                self._cells = pd.DataFrame(columns=[*CUBE_DIMENSIONS, *_MEASURES])
+            else:
+                merged = pd.concat(self._partials, ignore_index=True)
+                self._cells = merged.groupby(CUBE_DIMENSIONS, sort=False)[_MEASURES].sum().reset_index()
+            self._partials = [self._cells]
+        return self._cells
+
+    def query(
+        self,
+        group_by: list[str],
+        filters: dict[str, list[str]] | None = None,
+    ) -> list[dict[str, Any]]:
+        unknown = [dim for dim in [*group_by, *(filters or {})] if dim not in CUBE_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown segment dimensions: {unknown}. Available: {CUBE_DIMENSIONS}")
+
+        cells = self.cells()
+        for dimension, values in (filters or {}).items():
+            cells = cells[cells[dimension].isin([str(value) for value in values])]
+
+        if cells.empty:
+            return []
+
+        if group_by:
+            grouped = cells.groupby(list(group_by), sort=False)[_MEASURES].sum().reset_index()
+        else:
+            grouped = cells[_MEASURES].sum().to_frame().T
+
+        grouped["mean_probability"] = grouped["probability_sum"] / grouped["count"]
+        grouped["high_risk_rate"] = grouped["high_risk_count"] / grouped["count"]
+        grouped["share"] = grouped["count"] / max(1, self.n_rows)
+        grouped = grouped.sort_values(by="mean_probability", ascending=False)
+
+        return [
+            {
+                **{dimension: row[dimension] for dimension in group_by},
+                "count": int(row["count"]),
+                "mean_probability": round(float(row["mean_probability"]), 6),
+                "high_risk_count": int(row["high_risk_count"]),
+                "high_risk_rate": round(float(row["high_risk_rate"]), 6),
+                "share": round(float(row["share"]), 6),
+            }
+            for row in grouped.to_dict(orient="records")
+        ]
+
+    def describe(self) -> dict[str, Any]:
+        cells = self.cells()
+        return {
+            "n_rows": self.n_rows,
+            "n_cells": int(len(cells)),
+            "dimensions": {dimension: sorted(cells[dimension].unique().tolist()) for dimension in CUBE_DIMENSIONS},
+        }
+
+
+def _dimension_codes(
+    features_df: pd.DataFrame,
+    labels: dict[str, tuple[np.ndarray, np.ndarray]] | None = None,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Per-row codes and their labels for every cube dimension, in ``CUBE_DIMENSIONS`` order."""
+    dimensions = []
+
+    for column in CATEGORICAL_DIMENSIONS:
+        if labels is not None and column in labels:
+            dimensions.append(labels[column])
+        else:
+            dimensions.append(factorize_labels(features_df[column]))
+
+    for column, edges, bucket_labels in NUMERIC_BUCKETS.values():
+        values = features_df[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+        # Left-closed buckets: a value equal to an edge opens the next bucket.
+        codes = np.searchsorted(edges, values, side="right") - 1
+        codes[(codes >= len(bucket_labels)) | np.isnan(values)] = -1
+        dimensions.append((codes, np.asarray(bucket_labels, dtype=object)))
+
+    return dimensions
@@ -0,0 +1,592 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.inference.batch_frame import BatchFrame, BatchHeader, BatchHeaderResolver
+from src.inference.explainer import BatchInsightAccumulator
+from src.inference.predictor import compute_model_version, load_model
+from src.utils.config import (
+    BATCH_EXPLANATION_TIMEOUT_SECONDS,
+    CATEGORICAL_COLUMNS,
+    CSV_COLUMN_ALIASES,
+    EXPECTED_COLUMNS,
+    HIGH_RISK_THRESHOLD,
+    MEDIUM_RISK_THRESHOLD,
+    MODEL_PATH,
+    PROJECT_ROOT,
+    SHARD_BYTES,
+    SHARD_MAX_ATTEMPTS,
+    SHARD_TIMEOUT_SECONDS,
+)
+
+REQUIRED_FEATURES = [column for column in EXPECTED_COLUMNS if column not in ("CustomerID", "Churn")]
+NUMERIC_FEATURES = [feature for feature in REQUIRED_FEATURES if feature not in CATEGORICAL_COLUMNS]
+DEFAULT_OUTPUT_PATH = str(PROJECT_ROOT / "reports" / "sharded_scores.csv")
+DEFAULT_REPORT_PATH = str(PROJECT_ROOT / "reports" / "sharded_scoring.json")
+
+# Every message is a fixed prefix (JSON header length, payload length), the JSON header, then raw payload bytes.
+_FRAME_PREFIX = struct.Struct("!IQ")
+_CSV_ENCODINGS = ("utf-8-sig", "latin-1")
+_RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"], dtype=object)
+_MAX_RECONNECT_ATTEMPTS = 3
+_READY_MARKER = "[sharded] worker ready on "
+
+
+class ShardingError(RuntimeError):
+    """Raised when a sharded scoring run cannot produce a complete output."""
+
+
+class WorkerError(RuntimeError):
+    """A worker received a request but answered it with an error."""
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    header_bytes = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME_PREFIX.pack(len(header_bytes), len(payload)) + header_bytes)
+    if payload:
+        sock.sendall(payload)
+
+
+def receive_message(sock: socket.socket) -> tuple[dict, bytes]:
+    header_length, payload_length = _FRAME_PREFIX.unpack(_receive_exactly(sock, _FRAME_PREFIX.size))
+    header = json.loads(_receive_exactly(sock, header_length))
+    return header, _receive_exactly(sock, payload_length)
+
+
+def _receive_exactly(sock: socket.socket, n_bytes: int) -> bytes:
+    buffer = bytearray(n_bytes)
+    view = memoryview(buffer)
+    received = 0
+    while received < n_bytes:
+        count = sock.recv_into(view[received:], n_bytes - received)
+        if count == 0:
+            raise ConnectionError("Connection closed in the middle of a message.")
+        received += count
+    return bytes(buffer)
+
+
+class Shard:
+    """A newline-aligned byte range of the input CSV, header line excluded."""
+
+    def __init__(self, shard_id: int, start: int, end: int) -> None:
+        self.shard_id = shard_id
+        self.start = start
+        self.end = end
+        self.attempts = 0
+
+
+def plan_shards(input_path: str, shard_bytes: int) -> tuple[bytes, list[Shard]]:
+    """Header line of ``input_path`` and byte ranges covering the rows after it.
+
+    Each range is extended to the end of the row it stops in, so no row is split. Rows
+    are assumed not to contain quoted line breaks, as in every upload this API accepts.
+    """
+    shard_bytes = max(1, int(shard_bytes))
+    shards: list[Shard] = []
+    with open(input_path, "rb") as input_file:
+        header_line = input_file.readline()
+        size = os.fstat(input_file.fileno()).st_size
+        start = input_file.tell()
+        while start < size:
+            if start + shard_bytes >= size:
+                end = size
+            else:
+                input_file.seek(start + shard_bytes - 1)
+                input_file.readline()
+                end = input_file.tell()
+            shards.append(Shard(len(shards), start, end))
+            start = end
+    return header_line, shards
+
+
+def _read_range(input_path: str, start: int, end: int) -> bytes:
+    with open(input_path, "rb") as input_file:
+        input_file.seek(start)
+        return input_file.read(end - start)
+
+
+def _read_csv_bytes(data: bytes, **read_options) -> pd.DataFrame:
+    for encoding in _CSV_ENCODINGS:
+        try:
+            return pd.read_csv(io.BytesIO(data), encoding=encoding, **read_options)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Unable to decode the CSV with any of {list(_CSV_ENCODINGS)}.")
+
+
+def _read_shard_csv(data: bytes, headers: BatchHeaderResolver) -> tuple[pd.DataFrame, BatchHeader]:
+    # CustomerID is read as text, as /predict-csv does, so IDs reach the output exactly as written.
+    columns = _read_csv_bytes(data, nrows=0).columns
+    batch_header = headers.resolve(columns)
+    id_position = batch_header.customer_id_position
+    dtype = None if id_position is None else {columns[id_position]: str}
+    return _read_csv_bytes(data, dtype=dtype), batch_header
+
+
+def _sample_to_json(sample: pd.DataFrame | None) -> bytes:
+    # JSON keeps each value's type (text IDs, categoricals with commas or quotes, exact floats),
+    # which a CSV round trip would re-infer.
+    return b"" if sample is None else json.dumps(sample.to_dict(orient="split", index=False)).encode("utf-8")
+
+
+def _sample_from_json(data: bytes) -> pd.DataFrame | None:
+    if not data:
+        return None
+    split = json.loads(data)
+    return pd.DataFrame(split["data"], columns=split["columns"])
+
+
+class ShardWorker:
+    """Scores shards for a coordinator; the model is loaded once per worker process.
+
+    Every shard gets its own insight accumulator, so a retried shard is merged exactly
+    once no matter which worker answered it first.
+    """
+
+    def __init__(self, model_path: str) -> None:
+        self.model = load_model(model_path)
+        self.model_version = compute_model_version(model_path)
+        self.headers = BatchHeaderResolver(REQUIRED_FEATURES, CSV_COLUMN_ALIASES)
+
+    def handle(self, header: dict, payload: bytes) -> tuple[dict, bytes]:
+        message_type = header.get("type")
+        if message_type == "hello":
+            return {"type": "hello", "model_version": self.model_version, "pid": os.getpid()}, b""
+        if message_type == "score":
+            return self.score_shard(int(header["shard_id"]), payload)
+        raise ValueError(f"Unknown message type: {message_type}")
+
+    def score_shard(self, shard_id: int, csv_bytes: bytes) -> tuple[dict, bytes]:
+        started = time.perf_counter()
+        raw_df, batch_header = _read_shard_csv(csv_bytes, self.headers)
+        if batch_header.missing_features:
+            raise ValueError(f"Missing required columns for prediction: {batch_header.missing_features}")
+
+        batch = BatchFrame(raw_df, batch_header, NUMERIC_FEATURES)
+        probabilities = (
+            self.model.predict_proba(batch.features)[:, 1] if len(raw_df) else np.empty(0, dtype=float)
+        )
+        accumulator = BatchInsightAccumulator(model=self.model, required_features=REQUIRED_FEATURES)
+        accumulator.update(batch.features, probabilities, batch.label_keys)
+        counts, sample = accumulator.export_state()
+
+        scores_df = pd.DataFrame(
+            {
+                "churn_probability": probabilities,
+                "risk_level": _RISK_LEVELS[np.digitize(probabilities, (MEDIUM_RISK_THRESHOLD, HIGH_RISK_THRESHOLD))],
+            }
+        )
+        if batch.customer_ids is not None:
+            scores_df.insert(0, "CustomerID", batch.customer_ids.to_numpy())
+        scores_bytes = scores_df.to_csv(index=False, header=False).encode("utf-8")
+        sample_bytes = _sample_to_json(sample)
+
+        reply = {
+            "type": "result",
+            "shard_id": shard_id,
+            "rows": int(len(raw_df)),
+            "model_version": self.model_version,
+            "insights": counts,
+            "scores_bytes": len(scores_bytes),
+            "seconds": time.perf_counter() - started,
+        }
+        return reply, scores_bytes + sample_bytes
+
+
+class _ShardRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        worker: ShardWorker = self.server.worker
+        while True:
+            try:
+                header, payload = receive_message(self.request)
+            except (ConnectionError, struct.error):
+                return
+            try:
+                reply, reply_payload = worker.handle(header, payload)
+            except Exception as exc:
+                reply, reply_payload = {"type": "error", "message": f"{type(exc).__name__}: {exc}"}, b""
+            try:
+                send_message(self.request, reply, reply_payload)
+            except OSError:
+                # The coordinator gave up on this exchange (timeout) and will resend the shard.
+                return
+
+
+class ShardWorkerServer(socketserver.TCPServer):
+    """One coordinator connection at a time: a worker process scores one shard at a time."""
+
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], worker: ShardWorker) -> None:
+        super().__init__(address, _ShardRequestHandler)
+        self.worker = worker
+
+
+def serve_worker(host: str, port: int, model_path: str) -> None:
+    server = ShardWorkerServer((host, port), ShardWorker(model_path))
+    bound_host, bound_port = server.server_address[:2]
+    print(f"{_READY_MARKER}{bound_host}:{bound_port}", flush=True)
+    with server:
+        server.serve_forever()
+
+
+class WorkerConnection:
+    """Coordinator side of one worker, reconnected after a transport failure."""
+
+    def __init__(self, address: tuple[str, int], timeout: float) -> None:
+        self.address = address
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.address[0]}:{self.address[1]}"
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self) -> None:
+        if self._sock is None:
+            self._sock = socket.create_connection(self.address, timeout=self.timeout)
+
+    def request(self, header: dict, payload: bytes = b"") -> tuple[dict, bytes]:
+        self.connect()
+        try:
+            send_message(self._sock, header, payload)
+            reply, reply_payload = receive_message(self._sock)
+        except (OSError, ValueError):
+            # A timed out or broken exchange leaves the stream mid-message, so it is never reused.
+            self.close()
+            raise
+        if reply.get("type") == "error":
+            raise WorkerError(reply.get("message", "unknown worker error"))
+        return reply, reply_payload
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class ShardCoordinator:
+    """Scores a CSV file across shard workers and merges their results in input order.
+
+    Shards are pulled from one queue by a thread per worker. A shard whose exchange fails
+    (worker error, timeout, dropped connection) goes back to the queue until it has used
+    ``max_attempts``; a worker that cannot be reached after a few reconnects is dropped
+    and the remaining workers take over its shards.
+    """
+
+    def __init__(
+        self,
+        model,
+        model_version: str,
+        workers: list[tuple[str, int]],
+        max_attempts: int = SHARD_MAX_ATTEMPTS,
+        timeout_seconds: float = SHARD_TIMEOUT_SECONDS,
+    ) -> None:
+        self.model = model
+        self.model_version = model_version
+        self.connections = [WorkerConnection(address, timeout_seconds) for address in workers]
+        self.max_attempts = max(1, int(max_attempts))
+
+    def run(self, input_path: str, output_path: str, shard_bytes: int = SHARD_BYTES) -> dict:
+        started = time.perf_counter()
+        header_line, shards = plan_shards(input_path, shard_bytes)
+        batch_header = BatchHeaderResolver(REQUIRED_FEATURES, CSV_COLUMN_ALIASES).resolve(
+            _read_csv_bytes(header_line).columns
+        )
+        if batch_header.missing_features:
+            raise ValueError(
+                f"Missing required columns for prediction: {batch_header.missing_features}. "
+                f"Columns found in CSV: {batch_header.columns_found}"
+            )
+        live_workers = self._handshake()
+
+        output_columns = ["churn_probability", "risk_level"]
+        if batch_header.customer_id_position is not None:
+            output_columns.insert(0, "CustomerID")
+        partial_path = Path(f"{output_path}.partial")
+        partial_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._input_path = input_path
+        self._header_line = header_line
+        self._shards = queue.Queue()
+        for shard in shards:
+            self._shards.put(shard)
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._remaining = len(shards)
+        self._live_workers = len(live_workers)
+        self._failure: str | None = None
+        self._pending: dict[int, tuple[dict, bytes]] = {}
+        self._next_shard = 0
+        self._accumulator = BatchInsightAccumulator(
+            model=self.model,
+            required_features=REQUIRED_FEATURES,
+            explanation_timeout_seconds=BATCH_EXPLANATION_TIMEOUT_SECONDS,
+        )
+        self._worker_stats = {
+            connection.name: {"shards": 0, "rows": 0, "busy_seconds": 0.0, "failures": 0} for connection in live_workers
+        }
+        self._retries = 0
+        if not shards:
+            self._done.set()
+
+        with open(partial_path, "wb") as self._output:
+            self._output.write((",".join(output_columns) + "\n").encode("utf-8"))
+            threads = [
+                threading.Thread(target=self._drive_worker, args=(connection,), daemon=True)
+                for connection in live_workers
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        for connection in live_workers:
+            connection.close()
+
+        if self._failure is not None or self._next_shard != len(shards):
+            partial_path.unlink(missing_ok=True)
+            raise ShardingError(self._failure or "Sharded scoring stopped before every shard was scored.")
+        os.replace(partial_path, output_path)
+
+        wall_seconds = time.perf_counter() - started
+        rows = self._accumulator.n_rows
+        print(
+            f"[sharded] {rows} rows in {len(shards)} shards on {len(live_workers)} workers "
+            f"in {wall_seconds:.2f}s ({self._retries} retries)"
+        )
+        return {
+            "input": str(input_path),
+            "output": str(output_path),
+            "model_version": self.model_version,
+            "rows": rows,
+            "shards": len(shards),
+            "shard_bytes": int(shard_bytes),
+            "retries": self._retries,
+            "wall_seconds": wall_seconds,
+            "rows_per_second": rows / wall_seconds if wall_seconds > 0 else 0.0,
+            "workers": self._worker_stats,
+            "insights": self._accumulator.finalize(),
+        }
+
+    def _handshake(self) -> list[WorkerConnection]:
+        live_workers = []
+        for connection in self.connections:
+            try:
+                reply, _ = connection.request({"type": "hello"})
+            except (OSError, ValueError, WorkerError) as exc:
+                print(f"[sharded] Worker {connection.name} unreachable, skipping it: {exc}")
+                connection.close()
+                continue
+            if reply.get("model_version") != self.model_version:
+                raise ShardingError(
+                    f"Worker {connection.name} serves model {reply.get('model_version')}, "
+                    f"expected {self.model_version}. Every worker must load the same model."
+                )
+            live_workers.append(connection)
+        if not live_workers:
+            raise ShardingError("No shard worker is reachable.")
+        return live_workers
+
+    def _drive_worker(self, connection: WorkerConnection) -> None:
+        reconnect_failures = 0
+        while not self._done.is_set():
+            if not connection.connected:
+                try:
+                    connection.connect()
+                    reconnect_failures = 0
+                except OSError as exc:
+                    reconnect_failures += 1
+                    if reconnect_failures >= _MAX_RECONNECT_ATTEMPTS:
+                        self._drop_worker(connection, exc)
+                        return
+                    time.sleep(0.2 * reconnect_failures)
+                    continue
+
+            try:
+                shard = self._shards.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            shard.attempts += 1
+            payload = self._header_line + _read_range(self._input_path, shard.start, shard.end)
+            try:
+                reply, reply_payload = connection.request({"type": "score", "shard_id": shard.shard_id}, payload)
+                if reply.get("model_version") != self.model_version:
+                    raise WorkerError(f"answered with model {reply.get('model_version')}")
+            except (OSError, ValueError, WorkerError) as exc:
+                self._retry_or_fail(shard, connection, exc)
+                continue
+            self._complete(shard, connection, reply, reply_payload)
+
+    def _retry_or_fail(self, shard: Shard, connection: WorkerConnection, exc: Exception) -> None:
+        with self._lock:
+            self._worker_stats[connection.name]["failures"] += 1
+            if shard.attempts >= self.max_attempts:
+                self._failure = f"Shard {shard.shard_id} failed after {shard.attempts} attempts: {exc}"
+                self._done.set()
+                return
+            self._retries += 1
+        print(f"[sharded] Shard {shard.shard_id} failed on {connection.name} (attempt {shard.attempts}): {exc}")
+        self._shards.put(shard)
+
+    def _drop_worker(self, connection: WorkerConnection, exc: Exception) -> None:
+        print(f"[sharded] Dropping worker {connection.name}: {exc}")
+        with self._lock:
+            self._live_workers -= 1
+            if self._live_workers == 0 and not self._done.is_set():
+                self._failure = f"Every shard worker was lost with {self._remaining} shards left."
+                self._done.set()
+
+    def _complete(self, shard: Shard, connection: WorkerConnection, reply: dict, payload: bytes) -> None:
+        with self._lock:
+            stats = self._worker_stats[connection.name]
+            stats["shards"] += 1
+            stats["rows"] += int(reply["rows"])
+            stats["busy_seconds"] += float(reply["seconds"])
+
+            # Shards are written and merged strictly in input order, whatever order they finish in.
+            self._pending[shard.shard_id] = (reply, payload)
+            while self._next_shard in self._pending:
+                ready_reply, ready_payload = self._pending.pop(self._next_shard)
+                scores_bytes = int(ready_reply["scores_bytes"])
+                self._output.write(ready_payload[:scores_bytes])
+                sample = _sample_from_json(ready_payload[scores_bytes:])
+                self._accumulator.merge_state(ready_reply["insights"], sample)
+                self._next_shard += 1
+
+            self._remaining -= 1
+            if self._remaining == 0:
+                self._done.set()
+
+
+def start_local_workers(
+    count: int,
+    model_path: str,
+    host: str = "127.0.0.1",
+) -> tuple[list[subprocess.Popen], list[tuple[str, int]]]:
+    """Start ``count`` worker processes on free ports of this host."""
+    command = [sys.executable, "-m", "src.inference.sharded_scoring", "worker", "--host", host, "--port", "0"]
+    command += ["--model-path", str(Path(model_path).resolve())]
+    processes = [
+        subprocess.Popen(command, cwd=str(PROJECT_ROOT), stdout=subprocess.PIPE, text=True) for _ in range(count)
+    ]
+    try:
+        # Workers load the model concurrently; each one reports its port once it is listening.
+        addresses = [_wait_until_ready(process) for process in processes]
+    except Exception:
+        stop_local_workers(processes)
+        raise
+    return processes, addresses
+
+
+def _wait_until_ready(process: subprocess.Popen) -> tuple[str, int]:
+    for line in process.stdout:
+        if line.startswith(_READY_MARKER):
+            host, _, port = line[len(_READY_MARKER):].strip().rpartition(":")
+            # Keep draining the worker's output so a full pipe never blocks it.
+            threading.Thread(target=_forward_output, args=(process.stdout,), daemon=True).start()
+            return host, int(port)
+        print(line, end="")
+    raise RuntimeError(f"Shard worker exited during startup with code {process.wait()}.")
+
+
+def _forward_output(stream) -> None:
+    for line in stream:
+        print(line, end="")
+
+
+def stop_local_workers(processes: list[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait(timeout=30)
+
+
+def _parse_address(value: str) -> tuple[str, int]:
+    host, _, port = value.strip().rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"Worker address must look like host:port, got {value!r}")
+    return host, int(port)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Score a large CSV across worker processes over local sockets.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    worker_parser = subparsers.add_parser("worker", help="Load the model once and score shards sent by a coordinator.")
+    worker_parser.add_argument("--host", default="127.0.0.1")
+    worker_parser.add_argument("--port", type=int, default=9100, help="0 picks a free port.")
+    worker_parser.add_argument("--model-path", default=MODEL_PATH)
+
+    score_parser = subparsers.add_parser("score", help="Split a CSV into shards and score them on the workers.")
+    score_parser.add_argument("input", help="Plain CSV file to score.")
+    score_parser.add_argument("--workers", default="", help="Running workers as host:port,host:port.")
+    score_parser.add_argument(
+        "--local-workers",
+        type=int,
+        default=None,
+        help="Worker processes to start on this host (default: one per core when --workers is empty).",
+    )
+    score_parser.add_argument("--model-path", default=MODEL_PATH)
+    score_parser.add_argument("--shard-bytes", type=int, default=SHARD_BYTES)
+    score_parser.add_argument("--max-attempts", type=int, default=SHARD_MAX_ATTEMPTS)
+    score_parser.add_argument(
+        "--timeout", type=float, default=SHARD_TIMEOUT_SECONDS, help="Seconds a worker may stay silent."
+    )
+    score_parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    score_parser.add_argument("--report", default=DEFAULT_REPORT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        serve_worker(args.host, args.port, args.model_path)
+        return
+
+    addresses = [_parse_address(part) for part in args.workers.split(",") if part.strip()]
+    local_workers = args.local_workers
+    if local_workers is None:
+        local_workers = 0 if addresses else os.cpu_count() or 1
+
+    processes: list[subprocess.Popen] = []
+    try:
+        if local_workers:
+            processes, local_addresses = start_local_workers(local_workers, args.model_path)
+            addresses += local_addresses
+        coordinator = ShardCoordinator(
+            model=load_model(args.model_path),
+            model_version=compute_model_version(args.model_path),
+            workers=addresses,
+            max_attempts=args.max_attempts,
+            timeout_seconds=args.timeout,
+        )
+        report = coordinator.run(args.input, args.output, shard_bytes=args.shard_bytes)
+    finally:
+        stop_local_workers(processes)
+
+    report_path = Path(args.report)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[sharded] Saved scores to: {args.output}")
+    print(f"[sharded] Saved report to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,141 @@
 ﻿from __future__ import annotations
 
+import argparse
 import json
 from pathlib import Path
 
 import joblib
+import numpy as np
+import pandas as pd
 from sklearn.model_selection import train_test_split
 
 from src.data.data_loader import load_data
 from src.features.preprocessing import build_preprocessor
-from src.inference.predictor import print_example_predictions
-from src.models.evaluation import evaluate, select_best_model
+from src.inference.predictor import load_model, print_example_predictions
+from src.inference.registry import write_registry
+from src.models.cascade import build_cascade_report
+from src.models.cross_validation import cross_validate_models
+from src.models.evaluation import evaluate, select_model_within_budget
+from src.models.incremental import (
+    build_training_fingerprint,
+    file_prefix_sha256,
+    guard_metrics,
+    load_training_fingerprint,
+    regressed_metrics,
+    split_segments,
+    vocabulary_changes,
+    warm_start_model,
+    write_training_fingerprint,
+)
+from src.models.profiling import BATCH_ROWS, profile_model
 from src.models.training import train_models
-from src.utils.config import DATA_PATH, METRICS_PATH, MODEL_PATH, RANDOM_STATE
+from src.utils.config import (
+    CASCADE_CHEAP_MODEL,
+    CASCADE_EXPENSIVE_MODEL,
+    CASCADE_MAX_DISAGREEMENT,
+    DATA_PATH,
+    INCREMENTAL_EXTRA_TREES,
+    INCREMENTAL_MAX_METRIC_DROP,
+    INCREMENTAL_REPORT_PATH,
+    METRICS_PATH,
+    MODEL_PATH,
+    MODEL_REGISTRY_PATH,
+    RANDOM_STATE,
+    TRAINING_FINGERPRINT_PATH,
+)
 from src.utils.data_utils import drop_identifier_columns, encode_target, find_target_column
+from src.utils.memory import StageMemoryProfiler
 
 
-def main() -> None:
-    data = load_data(DATA_PATH)
+def main(
+    low_memory: bool = False,
+    selection_metric: str = "roc_auc",
+    budgets: dict | None = None,
+    cv_folds: int = 0,
+    cv_cores: int | None = None,
+) -> None:
+    profiler = StageMemoryProfiler(log_prefix="[main][memory]")
+
+    with profiler.stage("load_data"):
+        data = load_data(DATA_PATH, low_memory=low_memory)
 
     target_col = find_target_column(list(data.columns))
     print(f"[main] Target column detected: {target_col}")
 
-    data = drop_identifier_columns(data)
+    with profiler.stage("split"):
+        # Copy-on-write turns the column drops into views until a write actually happens.
+        with pd.option_context("mode.copy_on_write", low_memory):
+            data = drop_identifier_columns(data)
 
-    y = encode_target(data[target_col])
-    X = data.drop(columns=[target_col])
+            y = encode_target(data[target_col])
+            X = data.drop(columns=[target_col])
+            if low_memory:
+                y = y.astype(np.int8)
 
-    print("[main] Target distribution:")
-    print(y.value_counts(normalize=False).sort_index())
+            print("[main] Target distribution:")
+            print(y.value_counts(normalize=False).sort_index())
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=0.2,
-        random_state=RANDOM_STATE,
-        stratify=y,
-    )
+            X_train, X_test, y_train, y_test = train_test_split(
+                X,
+                y,
+                test_size=0.2,
+                random_state=RANDOM_STATE,
+                stratify=y,
+            )
+        del data, X, y
+
+    preprocessor = build_preprocessor(X_train, low_memory=low_memory)
+
+    cv_report = None
+    if cv_folds > 1:
+        with profiler.stage("cross_validate"):
+            cv_report = cross_validate_models(X_train, y_train, preprocessor, n_splits=cv_folds, core_budget=cv_cores)
+
+    with profiler.stage("train"):
+        models = train_models(X_train, y_train, preprocessor)
 
-    preprocessor = build_preprocessor(X_train)
-    models = train_models(X_train, y_train, preprocessor)
+    with profiler.stage("evaluate"):
+        all_metrics = {}
+        for model_name, model in models.items():
+            print(f"[main] Evaluating model: {model_name}")
+            all_metrics[model_name] = evaluate(model, X_test, y_test)
 
-    all_metrics = {}
-    for model_name, model in models.items():
-        print(f"[main] Evaluating model: {model_name}")
-        all_metrics[model_name] = evaluate(model, X_test, y_test)
+    with profiler.stage("profile_serving"):
+        profile_sample = X_test.iloc[:BATCH_ROWS]
+        for model_name, model in models.items():
+            profile = profile_model(model, profile_sample)
+            all_metrics[model_name]["serving_profile"] = profile
+            print(
+                f"[main] Serving profile {model_name}: single_row_p95_ms={profile['single_row_latency_ms']['p95']} "
+                f"batch_ms={profile['batch_latency_ms']} size_bytes={profile['model_size_bytes']} "
+                f"explanation_ms={profile['explanation_ms']}"
+            )
 
-    best_model_name = select_best_model(all_metrics)
+    cascade_report = None
+    if CASCADE_CHEAP_MODEL in models and CASCADE_EXPENSIVE_MODEL in models:
+        with profiler.stage("tune_cascade"):
+            cascade_report = build_cascade_report(
+                models[CASCADE_CHEAP_MODEL],
+                models[CASCADE_EXPENSIVE_MODEL],
+                X_test,
+                y_test,
+                max_disagreement=CASCADE_MAX_DISAGREEMENT,
+                names=(CASCADE_CHEAP_MODEL, CASCADE_EXPENSIVE_MODEL),
+            )
+
+    # With cross-validation the fold means replace the single holdout scores for selection;
+    # serving profiles, thresholds and the cascade still come from the holdout split.
+    selection_metrics = all_metrics
+    if cv_report is not None:
+        for model_name in models:
+            all_metrics[model_name]["cross_validation"] = cv_report["models"][model_name]
+        selection_metrics = {
+            model_name: {**metrics, **cv_report["models"][model_name]["mean"]}
+            for model_name, metrics in all_metrics.items()
+        }
+    selection = select_model_within_budget(selection_metrics, metric=selection_metric, budgets=budgets)
+    selection["source"] = "cross_validation" if cv_report is not None else "holdout"
+    best_model_name = selection["best_model"]
     best_model = models[best_model_name]
     print(f"[main] Best model selected: {best_model_name}")
 
@@ -54,13 +144,36 @@ def main() -> None:
     model_path.parent.mkdir(parents=True, exist_ok=True)
     metrics_path.parent.mkdir(parents=True, exist_ok=True)
 
-    joblib.dump(best_model, model_path)
+    with profiler.stage("save_model"):
+        joblib.dump(best_model, model_path)
+        registry_payload = write_registry(
+            MODEL_REGISTRY_PATH,
+            models,
+            primary=best_model_name,
+            metrics_by_model=all_metrics,
+            cascade=cascade_report,
+        )
+        write_training_fingerprint(
+            TRAINING_FINGERPRINT_PATH,
+            build_training_fingerprint(
+                DATA_PATH,
+                n_rows=len(X_train) + len(X_test),
+                X_train=X_train,
+                model_versions={name: entry["version"] for name, entry in registry_payload["models"].items()},
+            ),
+        )
     print(f"[main] Saved best model to: {model_path}")
+    print(f"[main] Registered {len(models)} models in: {MODEL_REGISTRY_PATH}")
 
     metrics_payload = {
-        "selection_metric": "roc_auc (fallback: f1)",
+        "selection_metric": f"{selection_metric} (fallback: f1)",
         "best_model": best_model_name,
+        "selection": selection,
         "metrics_by_model": all_metrics,
+        "threshold_analysis": all_metrics[best_model_name]["threshold_analysis"],
+        "cascade": cascade_report,
+        "cross_validation": cv_report,
+        "memory_profile": {"low_memory": low_memory, "stages": profiler.report()},
     }
     metrics_path.write_text(json.dumps(metrics_payload, indent=2), encoding="utf-8")
     print(f"[main] Saved metrics to: {metrics_path}")
@@ -68,5 +181,223 @@ def main() -> None:
     print_example_predictions(best_model)
 
 
+def retrain_incremental(
+    extra_trees: int = INCREMENTAL_EXTRA_TREES,
+    max_metric_drop: float = INCREMENTAL_MAX_METRIC_DROP,
+) -> dict:
+    """Warm-start the registered models on rows appended since the last training fingerprint.
+
+    Each updated model is compared with the one it would replace on the holdout rows of
+    every training batch so far, and the registry only gets a new version of the models
+    whose holdout metrics did not regress. Publishing also retunes the cascade band and
+    rewrites the thresholds in the metrics report for the new versions.
+    """
+    profiler = StageMemoryProfiler(log_prefix="[incremental][memory]")
+    fingerprint = load_training_fingerprint(TRAINING_FINGERPRINT_PATH)
+    report: dict = {"previous_rows": fingerprint["rows"], "generation": fingerprint["generation"]}
+
+    data_bytes = Path(DATA_PATH).stat().st_size
+    if data_bytes < fingerprint["data_bytes"] or (
+        file_prefix_sha256(DATA_PATH, fingerprint["data_bytes"]) != fingerprint["data_sha256"]
+    ):
+        return _finish_incremental(report, "history_changed", "Trained rows were modified; run a full training.")
+
+    with profiler.stage("load_data"):
+        data = drop_identifier_columns(load_data(DATA_PATH))
+        target_col = find_target_column(list(data.columns))
+        y = encode_target(data[target_col])
+        X = data.drop(columns=[target_col])
+        del data
+
+    new_rows = len(X) - fingerprint["rows"]
+    report["new_rows"] = new_rows
+    if new_rows <= 0:
+        return _finish_incremental(report, "up_to_date", "No rows appended since the last training.")
+
+    changes = vocabulary_changes(fingerprint, X.iloc[fingerprint["rows"] :])
+    if changes:
+        report["vocabulary_changes"] = changes
+        return _finish_incremental(report, "vocabulary_changed", f"Unseen categories {changes}; run a full training.")
+
+    segments = [*fingerprint["segments"], len(X)]
+    train_positions, holdout_positions = split_segments(y, segments)
+    new_train_positions = train_positions[train_positions >= fingerprint["rows"]]
+    X_holdout, y_holdout = X.iloc[holdout_positions], y.iloc[holdout_positions]
+    report["holdout_rows"] = int(len(holdout_positions))
+
+    registry_path = Path(MODEL_REGISTRY_PATH)
+    registry = json.loads(registry_path.read_text(encoding="utf-8"))
+    models = {name: load_model(str(registry_path.parent / entry["path"])) for name, entry in registry["models"].items()}
+
+    decisions, accepted = {}, {}
+    with profiler.stage("warm_start"):
+        for name, model in models.items():
+            current = guard_metrics(model, X_holdout, y_holdout)
+            candidate_model = warm_start_model(
+                name,
+                model,
+                X.iloc[new_train_positions],
+                y.iloc[new_train_positions],
+                X.iloc[train_positions],
+                y.iloc[train_positions],
+                extra_trees=extra_trees,
+            )
+            if candidate_model is None:
+                decisions[name] = {"status": "unchanged", "current": current}
+                continue
+
+            candidate = guard_metrics(candidate_model, X_holdout, y_holdout)
+            regressed = regressed_metrics(current, candidate, max_metric_drop)
+            decisions[name] = {
+                "status": "rejected" if regressed else "accepted",
+                "current": current,
+                "candidate": candidate,
+                "regressed_metrics": regressed,
+            }
+            if not regressed:
+                accepted[name] = candidate_model
+            print(
+                f"[incremental] {name}: roc_auc {current['roc_auc']:.4f} -> {candidate['roc_auc']:.4f} "
+                f"average_precision {current['average_precision']:.4f} -> {candidate['average_precision']:.4f} "
+                f"({decisions[name]['status']})"
+            )
+    report["models"] = decisions
+
+    if not accepted:
+        return _finish_incremental(report, "rejected", "Every warm-started model regressed; registry left unchanged.")
+
+    with profiler.stage("publish"):
+        published = {**models, **accepted}
+        primary = registry["primary"]
+        # Thresholds and the cascade band describe the served models, so they are refreshed with them.
+        evaluations = {name: evaluate(published[name], X_holdout, y_holdout) for name in sorted(accepted)}
+        cascade_report = registry.get("cascade")
+        if cascade_report is not None:
+            cheap, expensive = cascade_report["cheap_model"], cascade_report["expensive_model"]
+            if cheap in accepted or expensive in accepted:
+                cascade_report = build_cascade_report(
+                    published[cheap],
+                    published[expensive],
+                    X_holdout,
+                    y_holdout,
+                    max_disagreement=cascade_report.get("max_disagreement", CASCADE_MAX_DISAGREEMENT),
+                    names=(cheap, expensive),
+                )
+        registry_payload = write_registry(
+            MODEL_REGISTRY_PATH,
+            published,
+            primary=primary,
+            metrics_by_model={
+                name: decisions[name].get("candidate" if name in accepted else "current") for name in published
+            },
+            cascade=cascade_report,
+        )
+        if primary in accepted:
+            joblib.dump(published[primary], MODEL_PATH)
+        _refresh_metrics_report(evaluations, primary, cascade_report, generation=fingerprint["generation"] + 1)
+
+        fingerprint.update(
+            data_bytes=data_bytes,
+            data_sha256=file_prefix_sha256(DATA_PATH, data_bytes),
+            rows=len(X),
+            segments=segments,
+            generation=fingerprint["generation"] + 1,
+            model_versions={name: entry["version"] for name, entry in registry_payload["models"].items()},
+        )
+        write_training_fingerprint(TRAINING_FINGERPRINT_PATH, fingerprint)
+
+    report["published_models"] = sorted(accepted)
+    report["memory_profile"] = profiler.report()
+    return _finish_incremental(report, "published", f"Published new versions of {sorted(accepted)}.")
+
+
+def _refresh_metrics_report(evaluations: dict, primary: str, cascade_report: dict | None, generation: int) -> None:
+    """Write the republished models' holdout metrics, thresholds and cascade into the training metrics report."""
+    metrics_path = Path(METRICS_PATH)
+    if metrics_path.exists():
+        metrics_payload = json.loads(metrics_path.read_text(encoding="utf-8"))
+    else:
+        metrics_payload = {"best_model": primary, "metrics_by_model": {}}
+
+    for name, metrics in evaluations.items():
+        # Entries the incremental run does not measure (serving profile, cross-validation) are kept.
+        metrics_payload["metrics_by_model"][name] = {**metrics_payload["metrics_by_model"].get(name, {}), **metrics}
+    if primary in evaluations:
+        metrics_payload["threshold_analysis"] = evaluations[primary]["threshold_analysis"]
+    metrics_payload["cascade"] = cascade_report
+    metrics_payload["incremental_generation"] = generation
+
+    metrics_path.parent.mkdir(parents=True, exist_ok=True)
+    metrics_path.write_text(json.dumps(metrics_payload, indent=2), encoding="utf-8")
+    print(f"[incremental] Updated metrics in: {metrics_path}")
+
+
+def _finish_incremental(report: dict, status: str, message: str) -> dict:
+    report.update(status=status, message=message)
+    print(f"[incremental] {status}: {message}")
+    report_path = Path(INCREMENTAL_REPORT_PATH)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train churn models and persist the best one.")
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Categorical/downcast dtypes, copy-free column selection and a float32 transformed matrix.",
+    )
+    parser.add_argument(
+        "--selection-metric",
+        default="roc_auc",
+        help="Evaluation metric to maximise when picking the served model (default: roc_auc).",
+    )
+    parser.add_argument("--max-latency-ms", type=float, help="Budget on p95 single-row inference latency.")
+    parser.add_argument("--max-batch-latency-ms", type=float, help=f"Budget on scoring a {BATCH_ROWS}-row batch.")
+    parser.add_argument("--max-model-size-mb", type=float, help="Budget on the serialized model size.")
+    parser.add_argument("--max-explain-ms", type=float, help="Budget on a single-client explanation.")
+    parser.add_argument(
+        "--cv-folds",
+        type=int,
+        default=0,
+        help="Select the model on stratified k-fold cross-validation over the training split (0 = holdout only).",
+    )
+    parser.add_argument("--cv-cores", type=int, help="Cores shared by parallel cross-validation folds (default: all).")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Warm-start the registered models on rows appended since the last training instead of refitting.",
+    )
+    parser.add_argument(
+        "--extra-trees",
+        type=int,
+        default=INCREMENTAL_EXTRA_TREES,
+        help=f"Trees added to the random forest per incremental run (default: {INCREMENTAL_EXTRA_TREES}).",
+    )
+    parser.add_argument(
+        "--max-metric-drop",
+        type=float,
+        default=INCREMENTAL_MAX_METRIC_DROP,
+        help="Largest holdout roc_auc / average_precision drop an incremental update may show and still publish.",
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.incremental:
+        retrain_incremental(extra_trees=args.extra_trees, max_metric_drop=args.max_metric_drop)
+    else:
+        main(
+            low_memory=args.low_memory,
+            selection_metric=args.selection_metric,
+            budgets={
+                "max_single_row_latency_ms": args.max_latency_ms,
+                "max_batch_latency_ms": args.max_batch_latency_ms,
+                "max_model_size_mb": args.max_model_size_mb,
+                "max_explanation_ms": args.max_explain_ms,
+            },
+            cv_folds=args.cv_folds,
+            cv_cores=args.cv_cores,
+        )
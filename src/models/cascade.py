@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.models.evaluation import compute_threshold_sweep, roc_auc_from_sweep
+from src.utils.config import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD, RANDOM_STATE
+
+RISK_THRESHOLDS = (MEDIUM_RISK_THRESHOLD, HIGH_RISK_THRESHOLD)
+
+
+def risk_threshold_distance(probabilities, thresholds=RISK_THRESHOLDS) -> np.ndarray:
+    """Distance from each probability to the nearest risk-band boundary."""
+    probs = np.asarray(probabilities, dtype=float)
+    return np.min(np.abs(probs[:, None] - np.asarray(thresholds, dtype=float)[None, :]), axis=1)
+
+
+def escalation_mask(probabilities, band_width: float, thresholds=RISK_THRESHOLDS) -> np.ndarray:
+    """Rows the cheap model is unsure about: within ``band_width`` of a risk-band boundary."""
+    return risk_threshold_distance(probabilities, thresholds) < band_width
+
+
+def tune_cascade_band(
+    cheap_proba,
+    full_proba,
+    max_disagreement: float,
+    thresholds=RISK_THRESHOLDS,
+) -> float:
+    """Narrowest band keeping the cascade's risk band equal to the full model's on all but
+    ``max_disagreement`` of the rows.
+
+    A row disagrees only if the two models put it in different bands and it is not escalated,
+    so sorting the disagreeing rows by distance to a boundary gives the exact width.
+    """
+    cheap_bands = np.digitize(cheap_proba, thresholds)
+    full_bands = np.digitize(full_proba, thresholds)
+    distances = np.sort(risk_threshold_distance(cheap_proba, thresholds)[cheap_bands != full_bands])[::-1]
+
+    allowed = int(np.floor(max_disagreement * len(cheap_bands)))
+    if allowed >= len(distances):
+        return 0.0
+    # Escalate every disagreeing row except the `allowed` farthest ones.
+    return float(np.nextafter(distances[allowed], np.inf))
+
+
+def evaluate_cascade(cheap_proba, full_proba, y_true, band_width: float, thresholds=RISK_THRESHOLDS) -> dict:
+    cheap_proba = np.asarray(cheap_proba, dtype=float)
+    full_proba = np.asarray(full_proba, dtype=float)
+    escalate = escalation_mask(cheap_proba, band_width, thresholds)
+    cascade_proba = np.where(escalate, full_proba, cheap_proba)
+    disagreements = np.digitize(cascade_proba, thresholds) != np.digitize(full_proba, thresholds)
+
+    return {
+        "rows": int(len(cascade_proba)),
+        "escalation_rate": float(escalate.mean()) if len(escalate) else 0.0,
+        "disagreement_rate": float(disagreements.mean()) if len(disagreements) else 0.0,
+        "roc_auc_cascade": roc_auc_from_sweep(compute_threshold_sweep(y_true, cascade_proba)),
+        "roc_auc_full": roc_auc_from_sweep(compute_threshold_sweep(y_true, full_proba)),
+    }
+
+
+def build_cascade_report(
+    cheap_model,
+    full_model,
+    X_test,
+    y_test,
+    max_disagreement: float,
+    names: tuple[str, str],
+) -> dict:
+    """Tune the band on one half of the test split and report the cascade on the other half."""
+    y_true = np.asarray(y_test).astype(int)
+    cheap_proba = cheap_model.predict_proba(X_test)[:, 1]
+    full_proba = full_model.predict_proba(X_test)[:, 1]
+
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(y_true))
+    tune_rows, holdout_rows = order[: len(order) // 2], order[len(order) // 2 :]
+    band_width = tune_cascade_band(cheap_proba[tune_rows], full_proba[tune_rows], max_disagreement)
+
+    report = {
+        "cheap_model": names[0],
+        "expensive_model": names[1],
+        "thresholds": list(RISK_THRESHOLDS),
+        "band_width": band_width,
+        "max_disagreement": max_disagreement,
+        "tuning_rows": int(len(tune_rows)),
+        "holdout": evaluate_cascade(
+            cheap_proba[holdout_rows], full_proba[holdout_rows], y_true[holdout_rows], band_width
+        ),
+    }
+    print(
+        "[cascade] band_width={band_width:.4f} escalation_rate={escalation_rate:.3f} "
+        "disagreement_rate={disagreement_rate:.4f}".format(band_width=band_width, **report["holdout"])
+    )
+    return report
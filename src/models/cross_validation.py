@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+from threadpoolctl import threadpool_limits
+
+from src.models.evaluation import (
+    DEFAULT_DECISION_THRESHOLD,
+    average_precision_from_sweep,
+    compute_threshold_sweep,
+    metrics_at_threshold,
+    roc_auc_from_sweep,
+)
+from src.models.training import build_model_specs
+from src.utils.config import RANDOM_STATE
+
+CV_METRICS = ("roc_auc", "average_precision", "f1", "precision", "recall", "accuracy")
+
+
+def cross_validate_models(X, y, preprocessor, n_splits: int = 5, core_budget: int | None = None) -> dict:
+    """Stratified k-fold scores of every candidate from ``build_model_specs``.
+
+    Each fold fits its own clone of ``preprocessor`` once and every candidate is trained
+    on that fold's transformed matrices, so preprocessing runs k times rather than
+    k x candidates. Folds run in parallel worker processes; ``core_budget`` (default: all
+    cores) is split between concurrent folds and the threads each fold may use.
+    """
+    core_budget = max(1, int(core_budget or os.cpu_count() or 1))
+    fold_workers = min(n_splits, core_budget)
+    threads_per_fold = max(1, core_budget // fold_workers)
+
+    y = np.asarray(y).astype(int)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=RANDOM_STATE)
+    model_specs = build_model_specs(n_jobs=threads_per_fold)
+
+    started = time.perf_counter()
+    folds = Parallel(n_jobs=fold_workers)(
+        delayed(_run_fold)(fold, X, y, train_index, validation_index, preprocessor, model_specs, threads_per_fold)
+        for fold, (train_index, validation_index) in enumerate(splitter.split(X, y))
+    )
+    wall_seconds = time.perf_counter() - started
+
+    models = {name: _summarize_model(name, folds) for name in model_specs}
+    for name, summary in models.items():
+        print(
+            f"[cv] {name}: "
+            + " ".join(f"{metric}={summary['mean'][metric]:.4f}±{np.sqrt(summary['variance'][metric]):.4f}" for metric in CV_METRICS)
+        )
+    fold_seconds = [fold["wall_seconds"] for fold in folds]
+    print(f"[cv] {n_splits} folds on {fold_workers} workers x {threads_per_fold} threads in {wall_seconds:.2f}s")
+
+    return {
+        "n_splits": n_splits,
+        "core_budget": core_budget,
+        "fold_workers": fold_workers,
+        "threads_per_fold": threads_per_fold,
+        "wall_seconds": wall_seconds,
+        "fold_seconds_total": float(sum(fold_seconds)),
+        "models": models,
+        "folds": folds,
+    }
+
+
+def _run_fold(fold, X, y, train_index, validation_index, preprocessor, model_specs, n_threads) -> dict:
+    started = time.perf_counter()
+    with threadpool_limits(limits=n_threads):
+        fold_preprocessor = clone(preprocessor)
+        X_train = fold_preprocessor.fit_transform(X.iloc[train_index], y[train_index])
+        X_validation = fold_preprocessor.transform(X.iloc[validation_index])
+        preprocess_seconds = time.perf_counter() - started
+
+        models = {}
+        for name, estimator in model_specs.items():
+            fit_started = time.perf_counter()
+            classifier = clone(estimator).fit(X_train, y[train_index])
+            fit_seconds = time.perf_counter() - fit_started
+            probabilities = classifier.predict_proba(X_validation)[:, 1]
+            models[name] = {**_fold_metrics(y[validation_index], probabilities), "fit_seconds": fit_seconds}
+
+    return {
+        "fold": fold,
+        "train_rows": int(len(train_index)),
+        "validation_rows": int(len(validation_index)),
+        "preprocess_seconds": preprocess_seconds,
+        "wall_seconds": time.perf_counter() - started,
+        "models": models,
+    }
+
+
+def _fold_metrics(y_true, probabilities) -> dict:
+    sweep = compute_threshold_sweep(y_true, probabilities)
+    default_metrics = metrics_at_threshold(sweep, DEFAULT_DECISION_THRESHOLD)
+    return {
+        "roc_auc": roc_auc_from_sweep(sweep),
+        "average_precision": average_precision_from_sweep(sweep),
+        **{metric: default_metrics[metric] for metric in ("f1", "precision", "recall", "accuracy")},
+    }
+
+
+def _summarize_model(name: str, folds: list[dict]) -> dict:
+    per_fold = {metric: np.array([fold["models"][name][metric] for fold in folds]) for metric in CV_METRICS}
+    return {
+        "mean": {metric: float(values.mean()) for metric, values in per_fold.items()},
+        # Sample variance across folds (ddof=1), as usual for k-fold estimates.
+        "variance": {metric: float(values.var(ddof=1)) if len(values) > 1 else 0.0 for metric, values in per_fold.items()},
+        "fit_seconds_mean": float(np.mean([fold["models"][name]["fit_seconds"] for fold in folds])),
+    }
@@ -1,30 +1,42 @@
 ﻿from __future__ import annotations
 
 import numpy as np
-from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score
+
+from src.utils.config import (
+    FALSE_NEGATIVE_COST,
+    FALSE_POSITIVE_COST,
+    HIGH_RISK_THRESHOLD,
+    MEDIUM_RISK_THRESHOLD,
+)
+
+# model.predict labels a row positive only when p > 0.5, i.e. p >= the next float above 0.5.
+DEFAULT_DECISION_THRESHOLD = float(np.nextafter(0.5, 1.0))
+_MAX_CURVE_POINTS = 200
 
 
 def evaluate(model, X_test, y_test) -> dict:
     """Evaluate a binary classifier and return key metrics."""
-    y_pred = model.predict(X_test)
+    y_true = np.asarray(y_test).astype(int)
     y_proba = model.predict_proba(X_test)[:, 1]
 
-    labels, counts = np.unique(y_test, return_counts=True)
+    labels, counts = np.unique(y_true, return_counts=True)
     class_distribution = {str(label): int(count) for label, count in zip(labels, counts)}
 
-    try:
-        roc_auc = roc_auc_score(y_test, y_proba)
-    except ValueError:
-        roc_auc = float("nan")
+    sweep = compute_threshold_sweep(y_true, y_proba)
+    default_metrics = metrics_at_threshold(sweep, DEFAULT_DECISION_THRESHOLD)
 
     metrics = {
-        "accuracy": float(accuracy_score(y_test, y_pred)),
-        "precision": float(precision_score(y_test, y_pred, zero_division=0)),
-        "recall": float(recall_score(y_test, y_pred, zero_division=0)),
-        "f1": float(f1_score(y_test, y_pred, zero_division=0)),
-        "roc_auc": float(roc_auc),
-        "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
+        "accuracy": default_metrics["accuracy"],
+        "precision": default_metrics["precision"],
+        "recall": default_metrics["recall"],
+        "f1": default_metrics["f1"],
+        "roc_auc": roc_auc_from_sweep(sweep),
+        "confusion_matrix": [
+            [default_metrics["tn"], default_metrics["fp"]],
+            [default_metrics["fn"], default_metrics["tp"]],
+        ],
         "class_distribution": class_distribution,
+        "threshold_analysis": build_threshold_report(sweep),
     }
 
     print("[evaluation] Class distribution:", class_distribution)
@@ -32,17 +44,238 @@ def evaluate(model, X_test, y_test) -> dict:
         "[evaluation] accuracy={accuracy:.4f} precision={precision:.4f} "
         "recall={recall:.4f} f1={f1:.4f} roc_auc={roc_auc:.4f}".format(**metrics)
     )
+    cost_optimal = metrics["threshold_analysis"]["cost_optimal"]
+    print(
+        "[evaluation] cost-optimal threshold={threshold:.4f} expected_cost={expected_cost:.4f}".format(
+            **cost_optimal
+        )
+    )
 
     return metrics
 
 
-def select_best_model(metrics_by_model: dict) -> str:
+def compute_threshold_sweep(y_true, y_proba) -> dict:
+    """Confusion counts at every distinct score threshold from a single descending sort.
+
+    Entry i describes the rule "predict churn when p >= thresholds[i]".
+    """
+    y_true = np.asarray(y_true).astype(int)
+    scores = np.asarray(y_proba, dtype=float)
+    if len(scores) == 0:
+        raise ValueError("Cannot compute a threshold sweep on an empty set of scores.")
+
+    order = np.argsort(-scores, kind="mergesort")
+    sorted_scores = scores[order]
+    sorted_true = y_true[order]
+
+    # Last position of each run of tied scores.
+    run_ends = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    tp = np.cumsum(sorted_true)[run_ends]
+    fp = run_ends + 1 - tp
+
+    n_pos = int(sorted_true.sum())
+    n_neg = int(len(sorted_true) - n_pos)
+
+    return {
+        "thresholds": sorted_scores[run_ends],
+        "tp": tp,
+        "fp": fp,
+        "fn": n_pos - tp,
+        "tn": n_neg - fp,
+        "n_pos": n_pos,
+        "n_neg": n_neg,
+    }
+
+
+def metrics_at_threshold(sweep: dict, threshold: float) -> dict:
+    # thresholds are descending; count rows scoring >= threshold.
+    position = int(np.searchsorted(-sweep["thresholds"], -threshold, side="right")) - 1
+    if position >= 0:
+        tp, fp = int(sweep["tp"][position]), int(sweep["fp"][position])
+    else:
+        tp, fp = 0, 0
+    fn = sweep["n_pos"] - tp
+    tn = sweep["n_neg"] - fp
+    return _confusion_metrics(tp=tp, fp=fp, fn=fn, tn=tn, threshold=threshold)
+
+
+def roc_auc_from_sweep(sweep: dict) -> float:
+    if sweep["n_pos"] == 0 or sweep["n_neg"] == 0:
+        return float("nan")
+    tpr = np.r_[0.0, sweep["tp"] / sweep["n_pos"]]
+    fpr = np.r_[0.0, sweep["fp"] / sweep["n_neg"]]
+    return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0))
+
+
+def average_precision_from_sweep(sweep: dict) -> float:
+    if sweep["n_pos"] == 0:
+        return float("nan")
+    recall = sweep["tp"] / sweep["n_pos"]
+    precision = sweep["tp"] / (sweep["tp"] + sweep["fp"])
+    recall_steps = np.diff(np.r_[0.0, recall])
+    return float(np.sum(recall_steps * precision))
+
+
+def find_cost_optimal_threshold(
+    sweep: dict,
+    false_negative_cost: float = FALSE_NEGATIVE_COST,
+    false_positive_cost: float = FALSE_POSITIVE_COST,
+) -> dict:
+    n_rows = max(1, sweep["n_pos"] + sweep["n_neg"])
+    # Candidate 0 is "never predict churn"; candidate i+1 is sweep threshold i.
+    fn = np.r_[sweep["n_pos"], sweep["fn"]]
+    fp = np.r_[0, sweep["fp"]]
+    costs = (false_negative_cost * fn + false_positive_cost * fp) / n_rows
+    best = int(np.argmin(costs))
+
+    if best == 0:
+        threshold = float(np.nextafter(sweep["thresholds"][0], np.inf))
+    else:
+        threshold = float(sweep["thresholds"][best - 1])
+    return {
+        "threshold": threshold,
+        "expected_cost": float(costs[best]),
+        "false_negative_cost": float(false_negative_cost),
+        "false_positive_cost": float(false_positive_cost),
+        **metrics_at_threshold(sweep, threshold),
+    }
+
+
+def evaluate_risk_bands(
+    sweep: dict,
+    medium_threshold: float = MEDIUM_RISK_THRESHOLD,
+    high_threshold: float = HIGH_RISK_THRESHOLD,
+) -> dict:
+    at_medium = metrics_at_threshold(sweep, medium_threshold)
+    at_high = metrics_at_threshold(sweep, high_threshold)
+    n_rows = sweep["n_pos"] + sweep["n_neg"]
+
+    # Band membership follows from the cumulative counts at the two cutoffs.
+    band_counts = {
+        "low": (n_rows - at_medium["tp"] - at_medium["fp"], at_medium["fn"]),
+        "medium": (at_medium["tp"] + at_medium["fp"] - at_high["tp"] - at_high["fp"], at_medium["tp"] - at_high["tp"]),
+        "high": (at_high["tp"] + at_high["fp"], at_high["tp"]),
+    }
+    bands = {
+        band_name: {
+            "count": int(count),
+            "share": count / n_rows if n_rows else 0.0,
+            "churners": int(churners),
+            "churn_rate": churners / count if count else 0.0,
+            "churner_capture_rate": churners / sweep["n_pos"] if sweep["n_pos"] else 0.0,
+        }
+        for band_name, (count, churners) in band_counts.items()
+    }
+
+    return {
+        "medium_threshold": float(medium_threshold),
+        "high_threshold": float(high_threshold),
+        "bands": bands,
+        "at_medium_threshold": at_medium,
+        "at_high_threshold": at_high,
+    }
+
+
+def build_threshold_report(sweep: dict) -> dict:
+    n_pos, n_neg = sweep["n_pos"], sweep["n_neg"]
+    tp, fp = sweep["tp"], sweep["fp"]
+    curve_index = _curve_sample_index(len(sweep["thresholds"]))
+
+    return {
+        "n_thresholds": int(len(sweep["thresholds"])),
+        "average_precision": average_precision_from_sweep(sweep),
+        "roc_curve": {
+            "thresholds": sweep["thresholds"][curve_index].round(6).tolist(),
+            "fpr": (fp[curve_index] / max(1, n_neg)).round(6).tolist(),
+            "tpr": (tp[curve_index] / max(1, n_pos)).round(6).tolist(),
+        },
+        "pr_curve": {
+            "thresholds": sweep["thresholds"][curve_index].round(6).tolist(),
+            "precision": (tp[curve_index] / (tp[curve_index] + fp[curve_index])).round(6).tolist(),
+            "recall": (tp[curve_index] / max(1, n_pos)).round(6).tolist(),
+        },
+        "cost_optimal": find_cost_optimal_threshold(sweep),
+        "risk_bands": evaluate_risk_bands(sweep),
+    }
+
+
+def select_best_model(metrics_by_model: dict, metric: str = "roc_auc") -> str:
     def score(item):
         _, metrics = item
-        roc_auc = metrics.get("roc_auc", float("nan"))
-        if np.isnan(roc_auc):
+        value = metrics.get(metric, float("nan"))
+        if value is None or np.isnan(value):
             return metrics.get("f1", float("-inf"))
-        return roc_auc
+        return value
 
     best_name, _ = max(metrics_by_model.items(), key=score)
     return best_name
+
+
+# Serving budget name -> how to read the measured value from a model's "serving_profile".
+SERVING_BUDGETS = {
+    "max_single_row_latency_ms": lambda profile: profile["single_row_latency_ms"]["p95"],
+    "max_batch_latency_ms": lambda profile: profile["batch_latency_ms"],
+    "max_model_size_mb": lambda profile: profile["model_size_bytes"] / (1024 * 1024),
+    "max_explanation_ms": lambda profile: profile["explanation_ms"],
+}
+
+
+def select_model_within_budget(metrics_by_model: dict, metric: str = "roc_auc", budgets: dict | None = None) -> dict:
+    """Best model on ``metric`` among those whose serving profile meets every budget.
+
+    A cost that could not be measured (e.g. no explainer available) counts as over budget.
+    When no model fits, the unconstrained best is kept and ``within_budget`` is False.
+    """
+    budgets = {name: limit for name, limit in (budgets or {}).items() if limit is not None}
+    unknown = [name for name in budgets if name not in SERVING_BUDGETS]
+    if unknown:
+        raise ValueError(f"Unknown serving budgets: {unknown}. Expected: {list(SERVING_BUDGETS)}")
+
+    violations: dict[str, list[str]] = {}
+    for model_name, metrics in metrics_by_model.items():
+        profile = metrics.get("serving_profile", {})
+        violations[model_name] = []
+        for budget_name, limit in budgets.items():
+            measured = SERVING_BUDGETS[budget_name](profile) if profile else None
+            if measured is None or measured > limit:
+                violations[model_name].append(budget_name)
+
+    eligible = [name for name, failed in violations.items() if not failed]
+    within_budget = bool(eligible)
+    candidates = {name: metrics_by_model[name] for name in eligible} if within_budget else metrics_by_model
+    best_name = select_best_model(candidates, metric=metric)
+    if not within_budget:
+        print(f"[evaluation] No model meets the serving budgets {budgets}; keeping best on {metric}.")
+
+    return {
+        "best_model": best_name,
+        "metric": metric,
+        "budgets": budgets,
+        "eligible_models": eligible,
+        "budget_violations": {name: failed for name, failed in violations.items() if failed},
+        "within_budget": within_budget,
+    }
+
+
+def _confusion_metrics(tp: int, fp: int, fn: int, tn: int, threshold: float) -> dict:
+    n_rows = tp + fp + fn + tn
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "threshold": float(threshold),
+        "accuracy": (tp + tn) / n_rows if n_rows else 0.0,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "tp": int(tp),
+        "fp": int(fp),
+        "fn": int(fn),
+        "tn": int(tn),
+    }
+
+
+def _curve_sample_index(n_points: int) -> np.ndarray:
+    if n_points <= _MAX_CURVE_POINTS:
+        return np.arange(n_points)
+    return np.unique(np.linspace(0, n_points - 1, _MAX_CURVE_POINTS).round().astype(int))
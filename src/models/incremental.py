@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from src.models.evaluation import average_precision_from_sweep, compute_threshold_sweep, roc_auc_from_sweep
+from src.utils.config import RANDOM_STATE
+
+TEST_SIZE = 0.2
+# Holdout metrics a warm-started model must not lose to the model it would replace.
+GUARD_METRICS = ("roc_auc", "average_precision")
+WARM_STARTABLE_MODELS = ("random_forest", "logistic_regression")
+
+
+def build_training_fingerprint(data_path: str, n_rows: int, X_train: pd.DataFrame, model_versions: dict[str, str]) -> dict:
+    """Identify the data a model set was trained on, so a later run can tell which rows are new.
+
+    The CSV is expected to grow by appending rows only: its byte length and a hash of
+    those bytes prove that the trained history is still an unchanged prefix.
+    """
+    data_bytes = Path(data_path).stat().st_size
+    return {
+        "data_path": str(data_path),
+        "data_bytes": data_bytes,
+        "data_sha256": file_prefix_sha256(data_path, data_bytes),
+        "rows": int(n_rows),
+        # Row boundaries of every training batch; each batch has its own stratified holdout.
+        "segments": [int(n_rows)],
+        "generation": 0,
+        "trained_at": time.time(),
+        "categorical_vocabulary": categorical_vocabulary(X_train),
+        "model_versions": dict(model_versions),
+    }
+
+
+def write_training_fingerprint(path: str, fingerprint: dict) -> None:
+    fingerprint_path = Path(path)
+    fingerprint_path.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint_path.write_text(json.dumps(fingerprint, indent=2), encoding="utf-8")
+
+
+def load_training_fingerprint(path: str) -> dict:
+    fingerprint_path = Path(path)
+    if not fingerprint_path.exists():
+        raise FileNotFoundError(
+            f"Training fingerprint not found at {fingerprint_path}. Run a full training first: python -m src.main"
+        )
+    return json.loads(fingerprint_path.read_text(encoding="utf-8"))
+
+
+def file_prefix_sha256(path: str, n_bytes: int) -> str:
+    digest = hashlib.sha256()
+    remaining = int(n_bytes)
+    with open(path, "rb") as data_file:
+        while remaining > 0:
+            block = data_file.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def categorical_vocabulary(X: pd.DataFrame) -> dict[str, list[str]]:
+    """Observed values of the columns the preprocessor one-hot encodes (same detection as build_preprocessor)."""
+    numeric = set(X.select_dtypes(include=["number", "bool"]).columns)
+    return {
+        column: sorted(X[column].dropna().astype(str).unique().tolist())
+        for column in X.columns
+        if column not in numeric
+    }
+
+
+def vocabulary_changes(fingerprint: dict, X_new: pd.DataFrame) -> dict[str, list[str]]:
+    """Categorical values in ``X_new`` the trained encoders have never seen, by column.
+
+    Fitted one-hot encoders ignore unknown categories and a warm start cannot add
+    feature columns, so any change here calls for a full retrain.
+    """
+    known = fingerprint["categorical_vocabulary"]
+    observed = categorical_vocabulary(X_new)
+    changes = {column: ["<new column>"] for column in observed if column not in known}
+    for column, values in known.items():
+        if column not in X_new.columns:
+            changes[column] = ["<missing column>"]
+            continue
+        unseen = sorted(set(X_new[column].dropna().astype(str)) - set(values))
+        if unseen:
+            changes[column] = unseen
+    return changes
+
+
+def split_segments(y: pd.Series, segments: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """Train/holdout row positions, split batch by batch.
+
+    The first segment is split exactly like the full training run, and each appended
+    batch gets its own stratified split, so holdout rows never enter training.
+    """
+    train_parts, test_parts = [], []
+    start = 0
+    for end in segments:
+        positions = np.arange(start, end)
+        labels = y.iloc[start:end]
+        stratify = labels if labels.value_counts().min() >= 2 and labels.nunique() > 1 else None
+        train_positions, test_positions = train_test_split(
+            positions,
+            test_size=TEST_SIZE,
+            random_state=RANDOM_STATE,
+            stratify=stratify,
+        )
+        train_parts.append(train_positions)
+        test_parts.append(test_positions)
+        start = end
+    return np.concatenate(train_parts), np.concatenate(test_parts)
+
+
+def warm_start_model(name: str, model, X_new: pd.DataFrame, y_new, X_history: pd.DataFrame, y_history, extra_trees: int):
+    """Copy of ``model`` updated with warm start, or None when the model has no incremental path.
+
+    The fitted preprocessor is kept as is, so the feature space never changes. The
+    forest grows ``extra_trees`` trees fitted on the new rows only. The logistic
+    regression restarts its solver from the previous coefficients over the whole
+    training history: its objective is convex, so fitting the new rows alone would
+    converge to a model of those rows and drop the history, while the warm start
+    keeps the refit to a few iterations.
+    """
+    if name not in WARM_STARTABLE_MODELS:
+        return None
+
+    updated = copy.deepcopy(model)
+    preprocessor = updated.named_steps["preprocessor"]
+    classifier = updated.named_steps["classifier"]
+
+    if name == "random_forest":
+        classifier.set_params(warm_start=True, n_estimators=len(classifier.estimators_) + int(extra_trees))
+        with warnings.catch_warnings():
+            # balanced_subsample reweights each new tree's own bootstrap of the new rows, which is the intent here.
+            warnings.filterwarnings("ignore", message="class_weight presets", category=UserWarning)
+            classifier.fit(preprocessor.transform(X_new), np.asarray(y_new))
+    else:
+        classifier.set_params(warm_start=True)
+        classifier.fit(preprocessor.transform(X_history), np.asarray(y_history))
+    classifier.set_params(warm_start=False)
+    return updated
+
+
+def guard_metrics(model, X_holdout: pd.DataFrame, y_holdout) -> dict[str, float]:
+    sweep = compute_threshold_sweep(np.asarray(y_holdout).astype(int), model.predict_proba(X_holdout)[:, 1])
+    return {"roc_auc": roc_auc_from_sweep(sweep), "average_precision": average_precision_from_sweep(sweep)}
+
+
+def regressed_metrics(current: dict[str, float], candidate: dict[str, float], max_drop: float) -> list[str]:
+    return [metric for metric in GUARD_METRICS if candidate[metric] < current[metric] - max_drop]
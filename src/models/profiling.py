@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import io
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.inference.explainer import ShapComputationError, ShapDependencyError, explain_client_prediction
+
+SINGLE_ROW_REPEATS = 50
+BATCH_ROWS = 1000
+BATCH_REPEATS = 3
+EXPLANATION_REPEATS = 3
+
+
+def profile_model(model, X_sample: pd.DataFrame) -> dict:
+    """Measure what a model costs to serve: single-row and batch latency, size and explanation time."""
+    single_row = X_sample.iloc[[0]]
+    batch = X_sample.iloc[:BATCH_ROWS]
+
+    # One untimed call so lazy initialisation does not land in the first sample.
+    model.predict_proba(single_row)
+    single_row_ms = _time_calls_ms(lambda: model.predict_proba(single_row), SINGLE_ROW_REPEATS)
+    batch_ms = _time_calls_ms(lambda: model.predict_proba(batch), BATCH_REPEATS)
+    batch_median_ms = float(np.median(batch_ms))
+
+    profile = {
+        "single_row_latency_ms": {
+            "p50": round(float(np.percentile(single_row_ms, 50)), 4),
+            "p95": round(float(np.percentile(single_row_ms, 95)), 4),
+        },
+        "batch_rows": int(len(batch)),
+        "batch_latency_ms": round(batch_median_ms, 4),
+        "batch_rows_per_second": round(len(batch) / (batch_median_ms / 1000.0), 1) if batch_median_ms > 0 else None,
+        "model_size_bytes": serialized_size_bytes(model),
+    }
+    profile.update(_profile_explanation(model, X_sample))
+    return profile
+
+
+def serialized_size_bytes(model) -> int:
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getbuffer().nbytes
+
+
+def _profile_explanation(model, X_sample: pd.DataFrame) -> dict:
+    required_features = list(X_sample.columns)
+    rows = X_sample.iloc[:EXPLANATION_REPEATS].to_dict(orient="records")
+    try:
+        durations_ms = []
+        for client_features in rows:
+            started = time.perf_counter()
+            explain_client_prediction(model, client_features, required_features)
+            durations_ms.append((time.perf_counter() - started) * 1000.0)
+    except (ShapDependencyError, ShapComputationError) as exc:
+        return {"explanation_ms": None, "explanation_error": str(exc)}
+    return {"explanation_ms": round(float(np.median(durations_ms)), 4)}
+
+
+def _time_calls_ms(call, repeats: int) -> np.ndarray:
+    durations = np.empty(repeats, dtype=float)
+    for index in range(repeats):
+        started = time.perf_counter()
+        call()
+        durations[index] = (time.perf_counter() - started) * 1000.0
+    return durations
@@ -1,16 +1,16 @@
 ﻿from __future__ import annotations
 
 from sklearn.base import clone
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 
 from src.utils.config import RANDOM_STATE
 
 
-def train_models(X_train, y_train, preprocessor) -> dict:
-    """Train multiple pipelined models and return a model dict."""
-    model_specs = {
+def build_model_specs(n_jobs: int = -1) -> dict:
+    """Unfitted candidate classifiers, keyed by model name."""
+    return {
         "logistic_regression": LogisticRegression(
             max_iter=1000,
             class_weight="balanced",
@@ -20,12 +20,22 @@ def train_models(X_train, y_train, preprocessor) -> dict:
             n_estimators=300,
             class_weight="balanced_subsample",
             random_state=RANDOM_STATE,
-            n_jobs=-1,
+            n_jobs=n_jobs,
+        ),
+        "hist_gradient_boosting": HistGradientBoostingClassifier(
+            max_iter=200,
+            learning_rate=0.1,
+            early_stopping=True,
+            class_weight="balanced",
+            random_state=RANDOM_STATE,
         ),
     }
 
+
+def train_models(X_train, y_train, preprocessor) -> dict:
+    """Train multiple pipelined models and return a model dict."""
     trained_models = {}
-    for name, estimator in model_specs.items():
+    for name, estimator in build_model_specs().items():
         print(f"[training] Training model: {name}")
         pipeline = Pipeline(
             steps=[
@@ -1,13 +1,66 @@
-﻿from pathlib import Path
+﻿import os
+from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
 DATA_PATH = str(PROJECT_ROOT / "data" / "synthetic_customer_churn_100k.csv")
 MODEL_PATH = str(PROJECT_ROOT / "models" / "churn_model.joblib")
+MODEL_REGISTRY_PATH = str(PROJECT_ROOT / "models" / "registry.json")
 METRICS_PATH = str(PROJECT_ROOT / "reports" / "metrics.json")
+TRAINING_FINGERPRINT_PATH = str(PROJECT_ROOT / "models" / "training_fingerprint.json")
+INCREMENTAL_REPORT_PATH = str(PROJECT_ROOT / "reports" / "incremental_retrain.json")
+RESULT_CACHE_DIR = str(PROJECT_ROOT / "cache" / "predict_csv")
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+CUSTOMER_STORE_PATH = str(PROJECT_ROOT / "cache" / "customer_scores.sqlite3")
+# Largest CSV a compressed /predict-csv upload may expand to; larger ones are rejected with 413.
+UPLOAD_MAX_DECOMPRESSED_BYTES = int(os.environ.get("CHURN_UPLOAD_MAX_DECOMPRESSED_BYTES", str(1024 * 1024 * 1024)))
 
 RANDOM_STATE = 42
 
+# Multi-model serving: "single", "shadow", "ab" or "cascade" (see src.inference.registry).
+SERVING_MODE = os.environ.get("CHURN_SERVING_MODE", "single")
+SHADOW_MODELS = [name for name in os.environ.get("CHURN_SHADOW_MODELS", "").split(",") if name.strip()]
+AB_TRAFFIC_SPLIT = os.environ.get("CHURN_AB_TRAFFIC_SPLIT", "")
+# Scored batches waiting for the shadow models; further batches are dropped (and counted) rather than queued.
+SHADOW_MAX_QUEUED = int(os.environ.get("CHURN_SHADOW_MAX_QUEUED", "8"))
+
+# Cascade: the cheap model scores every row and only rows near a risk boundary reach the expensive one.
+# The band is tuned at training so risk levels differ from the expensive model on at most this share of rows.
+CASCADE_CHEAP_MODEL = "logistic_regression"
+CASCADE_EXPENSIVE_MODEL = "random_forest"
+CASCADE_MAX_DISAGREEMENT = 0.01
+
+# Incremental retraining (python -m src.main --incremental): trees added to the forest per run, and how far
+# a holdout metric may drop before the warm-started model is rejected.
+INCREMENTAL_EXTRA_TREES = 50
+INCREMENTAL_MAX_METRIC_DROP = 0.0
+
+# Load models, build explainers and run dummy predictions in the background when the API starts.
+WARM_UP_ON_STARTUP = os.environ.get("CHURN_WARM_UP_ON_STARTUP", "1").lower() not in {"0", "false", "no"}
+
+# Batches up to this many rows are scored by the flattened random forest (src.inference.flat_forest);
+# larger ones go to sklearn's compiled per-tree traversal. 0 disables the flat engine.
+FLAT_FOREST_MAX_ROWS = int(os.environ.get("CHURN_FLAT_FOREST_MAX_ROWS", "256"))
+
+# Deadlines on explanation work; past them the API answers with a cheaper, flagged attribution.
+EXPLANATION_TIMEOUT_SECONDS = float(os.environ.get("CHURN_EXPLANATION_TIMEOUT_SECONDS", "2.0"))
+BATCH_EXPLANATION_TIMEOUT_SECONDS = float(os.environ.get("CHURN_BATCH_EXPLANATION_TIMEOUT_SECONDS", "5.0"))
+EXPLANATION_WORKERS = int(os.environ.get("CHURN_EXPLANATION_WORKERS", "4"))
+# Explanations allowed to wait for a busy worker; past that, new ones fall back right away.
+EXPLANATION_MAX_QUEUED = int(os.environ.get("CHURN_EXPLANATION_MAX_QUEUED", "4"))
+
+# Sharded bulk scoring (python -m src.inference.sharded_scoring): bytes of CSV per shard, attempts per
+# shard before the run fails, and how long a worker may take to answer one shard.
+SHARD_BYTES = 16 * 1024 * 1024
+SHARD_MAX_ATTEMPTS = 3
+SHARD_TIMEOUT_SECONDS = 300.0
+
+# Risk bands used by serving, and the business cost of each error type for threshold tuning.
+MEDIUM_RISK_THRESHOLD = 0.40
+HIGH_RISK_THRESHOLD = 0.70
+FALSE_NEGATIVE_COST = 5.0
+FALSE_POSITIVE_COST = 1.0
+
 EXPECTED_COLUMNS = [
     "CustomerID",
     "Age",
@@ -37,5 +90,15 @@ COLUMN_NAME_MAPPING = {
     "label": "Churn",
 }
 
+CATEGORICAL_COLUMNS = ["Gender", "Contract", "PaymentMethod"]
+
+# Alternative upload headers renamed to the model features before standardize_columns runs.
+CSV_COLUMN_ALIASES = {
+    "Tenure in Months": "Tenure",
+    "Monthly Charge": "MonthlyCharges",
+    "Payment Method": "PaymentMethod",
+    "Total Charges": "TotalCharges",
+}
+
 TARGET_COLUMN_ALIASES = {"churn", "target", "label", "ischurn", "churned"}
 ID_COLUMN_ALIASES = {"customerid", "idclient", "id"}
@@ -63,3 +63,21 @@ def encode_target(series: pd.Series) -> pd.Series:
         raise ValueError(f"Unrecognized target values: {invalid_values}")
 
     return encoded.astype(int)
+
+
+def optimize_dtypes(df: pd.DataFrame, max_category_ratio: float = 0.5) -> pd.DataFrame:
+    """Downcast numerics and turn low-cardinality text columns into categoricals."""
+    optimized: dict[str, pd.Series] = {}
+    n_rows = max(1, len(df))
+    for col in df.columns:
+        series = df[col]
+        kind = series.dtype.kind
+        if kind in {"i", "u"}:
+            optimized[col] = pd.to_numeric(series, downcast="integer")
+        elif kind == "f":
+            optimized[col] = series.astype(np.float32)
+        elif kind == "O" and series.nunique(dropna=True) / n_rows <= max_category_ratio:
+            optimized[col] = series.astype("category")
+        else:
+            optimized[col] = series
+    return pd.DataFrame(optimized, index=df.index)
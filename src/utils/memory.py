@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+_PROC_STATUS_PATH = "/proc/self/status"
+_PROC_CLEAR_REFS_PATH = "/proc/self/clear_refs"
+
+
+def current_rss_mb() -> float | None:
+    return _read_proc_status_mb("VmRSS")
+
+
+def peak_rss_mb() -> float:
+    peak = _read_proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel peak-RSS watermark (Linux only). Returns False when unsupported."""
+    try:
+        with open(_PROC_CLEAR_REFS_PATH, "w", encoding="ascii") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+class StageMemoryProfiler:
+    """Records wall time and peak resident memory for each named pipeline stage."""
+
+    def __init__(self, log_prefix: str = "[memory]") -> None:
+        self.log_prefix = log_prefix
+        self.stages: list[dict] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # Without a watermark reset the peak is process-wide and only grows between stages.
+        per_stage_peak = reset_peak_rss()
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {
+                "stage": name,
+                "seconds": round(time.perf_counter() - started, 3),
+                "rss_before_mb": _round_mb(rss_before),
+                "rss_after_mb": _round_mb(current_rss_mb()),
+                "peak_rss_mb": _round_mb(peak_rss_mb()),
+                "peak_scope": "stage" if per_stage_peak else "process",
+            }
+            self.stages.append(record)
+            print(
+                f"{self.log_prefix} {name}: peak_rss={record['peak_rss_mb']} MB "
+                f"rss_after={record['rss_after_mb']} MB time={record['seconds']}s"
+            )
+
+    def report(self) -> list[dict]:
+        return list(self.stages)
+
+
+def _read_proc_status_mb(field: str) -> float | None:
+    try:
+        with open(_PROC_STATUS_PATH, encoding="ascii") as status_file:
+            for line in status_file:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def _round_mb(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO
+
+_HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def build_cache_key(data: bytes | BinaryIO, model_version: str) -> str:
+    """Key for an upload under a model version; ``data`` may be a seekable file, read in blocks and rewound."""
+    digest = hashlib.sha256()
+    digest.update(model_version.encode("utf-8"))
+    digest.update(b"\0")
+    if isinstance(data, bytes):
+        digest.update(data)
+    else:
+        data.seek(0)
+        for block in iter(lambda: data.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+        data.seek(0)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded JSON result cache on local disk with least-recently-used eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        entry_path = self._entry_path(key)
+        with self._lock:
+            try:
+                payload = json.loads(entry_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            # Touch the entry so eviction follows access order.
+            os.utime(entry_path)
+            self.hits += 1
+        return payload
+
+    def put(self, key: str, payload: dict[str, Any]) -> None:
+        encoded = json.dumps(payload).encode("utf-8")
+        if len(encoded) > self.max_bytes:
+            return
+
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            file_descriptor, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(file_descriptor, "wb") as tmp_file:
+                tmp_file.write(encoded)
+            os.replace(tmp_path, self._entry_path(key))
+            self._evict()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries = self._list_entries()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "size_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _list_entries(self) -> list[tuple[Path, int, float]]:
+        if not self.cache_dir.exists():
+            return []
+        entries = []
+        for entry_path in self.cache_dir.glob("*.json"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((entry_path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._list_entries(), key=lambda entry: entry[2])
+        total_bytes = sum(size for _, size, _ in entries)
+        for entry_path, size, _ in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                entry_path.unlink()
+            except OSError:
+                continue
+            total_bytes -= size
+            self.evictions += 1
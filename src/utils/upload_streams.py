@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import codecs
+import gzip
+import io
+import zipfile
+from typing import BinaryIO
+
+_DECODE_CHECK_BLOCK_BYTES = 1024 * 1024
+
+# Accepted upload suffixes and the container each one names.
+UPLOAD_FORMATS = {
+    ".csv": "csv",
+    ".csv.gz": "gzip",
+    ".csv.zst": "zstd",
+    ".zip": "zip",
+}
+
+
+class UploadFormatError(ValueError):
+    """The upload is not a supported CSV container or its container cannot be opened."""
+
+
+class UploadTooLargeError(ValueError):
+    """The decompressed upload grew past the size limit it was opened with."""
+
+
+class UploadDependencyError(RuntimeError):
+    """Raised when decompressing an upload needs an optional package that is not installed."""
+
+
+def detect_upload_format(filename: str | None) -> str | None:
+    name = (filename or "").lower()
+    for suffix, upload_format in UPLOAD_FORMATS.items():
+        if name.endswith(suffix):
+            return upload_format
+    return None
+
+
+def open_decompressed(fileobj: BinaryIO, upload_format: str, max_bytes: int | None = None) -> BinaryIO:
+    """Binary stream of the CSV bytes inside ``fileobj``, decompressed on the fly as it is read.
+
+    ``fileobj`` must be seekable; it is rewound first so the upload can be opened more than
+    once. Plain CSV uploads are returned as-is, and closing any returned stream leaves
+    ``fileobj`` open. With ``max_bytes``, reading a compressed upload past that many
+    decompressed bytes raises ``UploadTooLargeError``, so a compression bomb is never
+    expanded in full.
+    """
+    fileobj.seek(0)
+    if upload_format == "csv":
+        return fileobj
+    if upload_format == "gzip":
+        stream = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    elif upload_format == "zstd":
+        zstandard = _import_zstandard()
+        stream = zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True, closefd=False)
+    elif upload_format == "zip":
+        stream = _open_single_zip_member(fileobj)
+    else:
+        raise UploadFormatError(f"Unsupported upload format: {upload_format}")
+    if max_bytes is None:
+        return stream
+    return io.BufferedReader(_CappedReader(stream, max_bytes))
+
+
+def decodes_as(stream: BinaryIO, encoding: str) -> bool:
+    """Whether every byte of ``stream`` decodes in ``encoding``; read block by block, nothing is kept."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        for block in iter(lambda: stream.read(_DECODE_CHECK_BLOCK_BYTES), b""):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+class _CappedReader(io.RawIOBase):
+    def __init__(self, stream: BinaryIO, max_bytes: int):
+        self._stream = stream
+        self._remaining = max_bytes
+        self._max_bytes = max_bytes
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # Ask for one byte past the limit so an upload of exactly max_bytes still reads cleanly.
+        data = self._stream.read(min(len(buffer), self._remaining + 1))
+        if len(data) > self._remaining:
+            raise UploadTooLargeError(f"Decompressed upload exceeds the limit of {self._max_bytes} bytes.")
+        self._remaining -= len(data)
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self._stream.close()
+        super().close()
+
+
+def _open_single_zip_member(fileobj: BinaryIO) -> BinaryIO:
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as exc:
+        raise UploadFormatError(f"Invalid ZIP archive: {exc}") from exc
+
+    members = [member for member in archive.infolist() if not member.is_dir()]
+    if len(members) != 1:
+        raise UploadFormatError(f"ZIP uploads must contain exactly one CSV file, found {len(members)} files.")
+    return archive.open(members[0])
+
+
+def _import_zstandard():
+    try:
+        import zstandard  # type: ignore
+    except ImportError as exc:
+        raise UploadDependencyError(
+            "zstandard is required for .csv.zst uploads. Install it with: pip install zstandard"
+        ) from exc
+    return zstandard
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.inference.flat_forest import PARITY_ATOL, FlatForest
+
+N_FEATURES = 6
+
+
+def _training_data(with_nan: bool):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, N_FEATURES))
+    y = (X[:, 0] + 0.5 * X[:, 1] - X[:, 2] * X[:, 3] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int)
+    if with_nan:
+        X[rng.random(X.shape) < 0.1] = np.nan
+    return X, y
+
+
+def _scoring_rows(n_rows: int, with_nan: bool) -> np.ndarray:
+    rng = np.random.default_rng(n_rows)
+    X = rng.normal(size=(n_rows, N_FEATURES))
+    if with_nan:
+        X[rng.random(X.shape) < 0.2] = np.nan
+    return X
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["dense", "nan"])
+def fitted_forest(request):
+    X, y = _training_data(with_nan=request.param)
+    forest = RandomForestClassifier(n_estimators=50, min_samples_leaf=2, random_state=42).fit(X, y)
+    return forest, request.param
+
+
+@pytest.mark.parametrize("n_rows", [1, 7, 10_000])
+def test_predict_proba_matches_sklearn(fitted_forest, n_rows):
+    forest, with_nan = fitted_forest
+    X = _scoring_rows(n_rows, with_nan)
+
+    expected = forest.predict_proba(X)
+    actual = FlatForest.from_estimator(forest).predict_proba(X)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0.0, atol=PARITY_ATOL)
+
+
+@pytest.mark.parametrize("with_nan", [False, True], ids=["dense", "nan"])
+def test_single_tree_forest_matches_sklearn(with_nan):
+    X, y = _training_data(with_nan)
+    forest = RandomForestClassifier(n_estimators=1, random_state=42).fit(X, y)
+    rows = _scoring_rows(500, with_nan)
+
+    np.testing.assert_allclose(
+        FlatForest.from_estimator(forest).predict_proba(rows), forest.predict_proba(rows), rtol=0.0, atol=PARITY_ATOL
+    )
+
+
+def test_rejects_wrong_feature_count(fitted_forest):
+    forest, _ = fitted_forest
+    with pytest.raises(ValueError):
+        FlatForest.from_estimator(forest).predict_proba(np.zeros((3, N_FEATURES + 1)))
@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src import api
+from src.inference.batch_frame import BatchFrame
+from src.inference.explainer import (
+    MONTHLY_CHARGES_HIGH_THRESHOLD,
+    build_batch_recommendations,
+    build_recommendations,
+    get_risk_level,
+)
+from src.utils.config import HIGH_RISK_THRESHOLD, MEDIUM_RISK_THRESHOLD
+
+FRENCH_RISK_LEVELS = {"LOW": "FAIBLE", "MEDIUM": "MOYEN", "HIGH": "ÉLEVÉ"}
+
+
+def _edge_rows() -> pd.DataFrame:
+    charges_edge = MONTHLY_CHARGES_HIGH_THRESHOLD
+    return pd.DataFrame(
+        {
+            "CustomerID": ["C1", None, "C3", "C4", "C5", "C6", "C7", "C8"],
+            "Age": [30, 41, 52, 63, 25, 38, 47, 59],
+            "Gender": ["Female", " Male ", "Female", "Male", "Female", "Male", None, "Female"],
+            "Tenure": [np.nan, 11.999, 12.0, 0.0, 11.5, np.nan, 72.0, 12.5],
+            "MonthlyCharges": [
+                charges_edge,
+                np.nextafter(charges_edge, 0.0),
+                np.nan,
+                120.0,
+                20.0,
+                charges_edge,
+                69.99,
+                0.0,
+            ],
+            "Contract": [
+                "  Month-to-month ",
+                "MONTH-TO-MONTH",
+                "One year",
+                None,
+                "Two year ",
+                "month-to-month",
+                " One year",
+                "Two year",
+            ],
+            "PaymentMethod": [
+                "Electronic check  ",
+                " ELECTRONIC CHECK",
+                "Credit card",
+                None,
+                "Bank transfer",
+                "electronic check",
+                "Mailed check",
+                "Credit card ",
+            ],
+            "TotalCharges": [np.nan, 840.0, 1200.0, 0.0, 230.0, 99.5, 5000.0, 0.0],
+        }
+    )
+
+
+def _batch(raw_df: pd.DataFrame) -> BatchFrame:
+    return BatchFrame(raw_df, api._BATCH_HEADERS.resolve(raw_df.columns), api.NUMERIC_FEATURES)
+
+
+def test_batch_recommendations_match_per_row_rules_on_edge_values():
+    raw_df = _edge_rows()
+    batch = _batch(raw_df)
+    expected = [build_recommendations(row) for row in raw_df.to_dict(orient="records")]
+
+    assert list(build_batch_recommendations(raw_df)) == expected
+    assert list(build_batch_recommendations(batch.features, batch.label_keys)) == expected
+
+
+def test_actionable_rows_match_per_row_formatting_at_risk_boundaries():
+    raw_df = _edge_rows()
+    probabilities = np.array(
+        [
+            MEDIUM_RISK_THRESHOLD,
+            np.nextafter(MEDIUM_RISK_THRESHOLD, 0.0),
+            HIGH_RISK_THRESHOLD,
+            np.nextafter(HIGH_RISK_THRESHOLD, 0.0),
+            0.0,
+            1.0,
+            0.5,
+            0.123456789,
+        ]
+    )
+    batch = _batch(raw_df)
+
+    rows = api._format_actionable_rows(api._build_actionable_frame(batch, probabilities, np.arange(len(raw_df))))
+
+    json.dumps(rows, allow_nan=False)
+    raw_records = raw_df.astype(object).where(raw_df.notna(), None).to_dict(orient="records")
+    expected_recommendations = [build_recommendations(row) for row in raw_df.to_dict(orient="records")]
+    for row, raw_row, probability, recommendations in zip(rows, raw_records, probabilities, expected_recommendations):
+        assert row["Customer ID"] == raw_row["CustomerID"]
+        assert row["risk_level"] == FRENCH_RISK_LEVELS[get_risk_level(probability)]
+        assert row["churn_risk_percent"] == f"{probability * 100:.2f}%"
+        assert row["Tenure"] == (None if raw_row["Tenure"] is None else int(round(raw_row["Tenure"])))
+        assert row["Contract"] == raw_row["Contract"]
+        assert row["recommendations"] == recommendations
@@ -0,0 +1,102 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.features.preprocessing import build_preprocessor
+from src.inference.predictor import compute_model_version
+from src.inference.sharded_scoring import (
+    REQUIRED_FEATURES,
+    ShardCoordinator,
+    ShardWorker,
+    plan_shards,
+    start_local_workers,
+    stop_local_workers,
+)
+
+SHARD_BYTES = 2_000
+
+
+def _customers(n_rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    tenure = rng.integers(0, 72, n_rows).astype(float)
+    tenure[::17] = np.nan
+    monthly = rng.uniform(20, 120, n_rows).round(2)
+    return pd.DataFrame(
+        {
+            # Text IDs with leading zeros and a few blanks: reading them back as numbers would change them.
+            "CustomerID": [f"{index:05d}" if index % 23 else "" for index in range(n_rows)],
+            "Age": rng.integers(18, 90, n_rows),
+            "Gender": rng.choice(["Female", "Male", " Female "], n_rows),
+            "Tenure": tenure,
+            "MonthlyCharges": monthly,
+            "Contract": rng.choice(["Month-to-month", "One year", "Two year"], n_rows),
+            "PaymentMethod": rng.choice(['Electronic check, "paperless"', "Credit card", "Bank transfer"], n_rows),
+            "TotalCharges": (monthly * np.nan_to_num(tenure)).round(2),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def churn_model_path(tmp_path_factory):
+    customers = _customers(400)
+    X = customers[REQUIRED_FEATURES]
+    y = (customers["Contract"] == "Month-to-month") & (customers["MonthlyCharges"] > 60)
+    model = Pipeline([("preprocessor", build_preprocessor(X)), ("classifier", LogisticRegression(max_iter=500))])
+    model.fit(X, y.astype(int))
+    model_path = tmp_path_factory.mktemp("model") / "churn_model.joblib"
+    joblib.dump(model, model_path)
+    return str(model_path)
+
+
+class _KillFirstWorkerCoordinator(ShardCoordinator):
+    """Kills one worker process as soon as the first shard is merged, while shards are still queued."""
+
+    def __init__(self, processes, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.processes = processes
+        self.killed = False
+
+    def _complete(self, shard, connection, reply, payload) -> None:
+        super()._complete(shard, connection, reply, payload)
+        if not self.killed:
+            self.killed = True
+            self.processes[0].kill()
+            self.processes[0].wait()
+
+
+def test_killed_worker_shards_are_retried_and_output_matches_in_process(churn_model_path, tmp_path):
+    input_path = tmp_path / "customers.csv"
+    _customers(1_500).to_csv(input_path, index=False)
+    output_path = tmp_path / "scores.csv"
+
+    processes, addresses = start_local_workers(2, churn_model_path)
+    try:
+        coordinator = _KillFirstWorkerCoordinator(
+            processes,
+            model=joblib.load(churn_model_path),
+            model_version=compute_model_version(churn_model_path),
+            workers=addresses,
+            timeout_seconds=30.0,
+        )
+        report = coordinator.run(str(input_path), str(output_path), shard_bytes=SHARD_BYTES)
+    finally:
+        stop_local_workers(processes)
+
+    header_line, shards = plan_shards(str(input_path), SHARD_BYTES)
+    worker = ShardWorker(churn_model_path)
+    expected_scores = b""
+    for shard in shards:
+        with open(input_path, "rb") as input_file:
+            input_file.seek(shard.start)
+            reply, payload = worker.score_shard(shard.shard_id, header_line + input_file.read(shard.end - shard.start))
+        expected_scores += payload[: reply["scores_bytes"]]
+
+    assert coordinator.killed and report["retries"] >= 1
+    assert report["rows"] == 1_500
+    assert output_path.read_bytes() == b"CustomerID,churn_probability,risk_level\n" + expected_scores
+    ids = pd.read_csv(output_path, dtype={"CustomerID": str})["CustomerID"]
+    assert ids.iloc[1] == "00001"
+    assert ids.isna().sum() == len(range(0, 1_500, 23))
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import numpy as np
+
+from src import api
+
+CLIENT = {
+    "Age": 45,
+    "Gender": "Female",
+    "Tenure": 10,
+    "MonthlyCharges": 70.5,
+    "Contract": "Month-to-month",
+    "PaymentMethod": "Electronic check",
+    "TotalCharges": 705.0,
+}
+
+
+class _ConstantRegistry:
+    def score(self, features_df, routing_keys=None):
+        return np.full(len(features_df), 0.25), np.full(len(features_df), "constant", dtype=object)
+
+
+class _ChunkedRequest:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _run_stream(chunks) -> list[dict]:
+    async def collect():
+        return [
+            part
+            async for part in api._stream_predictions(_ChunkedRequest(chunks), _ConstantRegistry())
+        ]
+
+    output = b"".join(asyncio.run(collect()))
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def _record_line(customer_id: str) -> bytes:
+    return json.dumps({**CLIENT, "CustomerID": customer_id}).encode() + b"\n"
+
+
+def test_oversized_unterminated_record_keeps_accepted_and_later_records():
+    oversized = b'{"Age": "' + b"9" * (api._STREAM_MAX_LINE_BYTES + 10)
+    chunks = [
+        _record_line("A") + _record_line("B"),
+        oversized[: len(oversized) // 2],
+        oversized[len(oversized) // 2 :],
+        b'"}\n' + _record_line("C"),
+    ]
+
+    results = _run_stream(chunks)
+
+    scored = sorted((row["line"], row["CustomerID"]) for row in results if "churn_probability" in row)
+    errors = [row for row in results if "error" in row]
+    assert scored == [(1, "A"), (2, "B"), (4, "C")]
+    assert errors == [{"line": 3, "error": api._STREAM_LINE_TOO_LONG}]
+
+
+def test_oversized_record_at_end_of_stream_still_flushes_pending():
+    chunks = [_record_line("A"), b"x" * (api._STREAM_MAX_LINE_BYTES + 1)]
+
+    results = _run_stream(chunks)
+
+    assert [row.get("CustomerID") for row in results if "churn_probability" in row] == ["A"]
+    assert {"line": 2, "error": api._STREAM_LINE_TOO_LONG} in results